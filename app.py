@@ -1,9 +1,23 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, make_response
 from flask_cors import CORS
 from flask_login import LoginManager
 from config import Config
 from models import db, Technician
+from database import init_database
+from passwords import init_passwords
 from email_service import mail, init_mail
+from rollups import init_rollups
+from search import init_search
+from cache import init_cache
+from ratelimit import init_rate_limits
+from user_cache import user_cache, init_user_cache
+from events import init_events
+from outbox import init_outbox
+from scheduler import init_scheduler
+from replica import init_replica
+from instrumentation import init_instrumentation
+from compression import init_compression
+from assets import init_assets
 
 def create_app():
     """Application factory"""
@@ -11,9 +25,18 @@ def create_app():
     app.config.from_object(Config)
     
     # Initialize extensions
-    db.init_app(app)
+    init_database(app)  # Engine pools and SQLite profile, then db.init_app
+    init_passwords(app)  # Hash parameters and hashing pool
     CORS(app)
     init_mail(app)  # Initialize Flask-Mail
+    init_rollups(app)  # Register rollup CLI commands
+    init_search(app)  # Register search index CLI commands
+    init_cache(app)  # Configure the report response cache
+    init_user_cache(app)  # Size the authenticated user cache
+    init_rate_limits(app)  # Rate limit rules and the concurrency cap
+    init_instrumentation(app)  # Query counts, Server-Timing and metrics (if enabled)
+    init_compression(app)  # gzip/brotli for large text responses
+    init_assets(app)  # Content-hashed static URLs with long-lived caching
     
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -22,7 +45,7 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        return Technician.query.get(int(user_id))
+        return user_cache.load(int(user_id))
 
     @login_manager.unauthorized_handler
     def unauthorized():
@@ -35,11 +58,21 @@ def create_app():
     # Main route
     @app.route('/')
     def index():
-        return render_template('index.html')
+        response = make_response(render_template('index.html'))
+        response.headers['Cache-Control'] = 'no-cache'  # Always the current asset hashes
+        return response
     
-    # Create database tables
+    # Create database tables and upgrade existing ones (on the primary; the read pool and replica only read)
+    from migrations import upgrade_schema
     with app.app_context():
-        db.create_all()
+        db.create_all(bind_key=None)
+        upgrade_schema()
+    
+    # Start background email delivery, the live event relay, scheduled jobs and the replica heartbeat once the schema is ready
+    init_outbox(app)
+    init_events(app)  # Size the live update event buffer and relay events from every worker
+    init_scheduler(app)
+    init_replica(app)
     
     return app
 
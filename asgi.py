@@ -0,0 +1,428 @@
+"""
+ASGI entry point
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Wraps the Flask app from create_app(). The live update stream and the
+read-heavy search and downtime endpoints are served natively on the event
+loop: /api/events waits on the event hub without a thread, and the two
+reports query through an async engine (aiosqlite, asyncpg or aiomysql)
+using the same report code as the Flask views (the downtime report reads the
+replica under the same rules as replica.replica_read), behind the same
+concurrency cap, instrumentation and compression as the Flask routes. Every other route runs the
+WSGI app on a bounded thread pool (ASGI_WSGI_THREADS), so slow or idle
+clients never hold a worker while the pool stays free for real work.
+"""
+import asyncio
+import hashlib
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from app import create_app
+from cache import report_cache
+from database import READ_BIND, REPLICA_BIND, engine_options, sqlite_profile_enabled, apply_sqlite_profile
+from downtime import downtime_report
+from events import event_hub
+from compression import COMPRESSIBLE_TYPES, encode_body
+from instrumentation import metrics, begin_request, end_request, clear_request
+from ratelimit import admission, forwarded_client
+from models import db, Technician, TableVersion
+from replica import replica_monitor
+from user_cache import user_cache, STAMP as USERS_STAMP, STALE
+from routes import search_args, search_response, downtime_args, downtime_tags, downtime_response
+from search import search
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+    'mariadb': 'mariadb+aiomysql'
+}
+ADMISSION_EXEMPT_PATHS = {'/api/events'}  # ratelimit.ADMISSION_EXEMPT by path
+
+
+def async_database_url(url):
+    """Same database as a sync engine URL, through the backend's async driver"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend}; set ASYNC_DATABASE_URL')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class _RequestBody(io.RawIOBase):
+    """wsgi.input that pulls the ASGI request body on demand from a worker thread"""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b''
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                raise OSError('Client disconnected')
+            self._buffer = message.get('body', b'')
+            self._done = not message.get('more_body', False)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class AsgiApp:
+    """ASGI application: native async routes, everything else through WSGI"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config['ASGI_WSGI_THREADS'], thread_name_prefix='wsgi'
+        )
+
+        # The async views only read, so they use the read pool's database when there is one
+        with flask_app.app_context():
+            read_only = READ_BIND in db.engines
+            sync_url = db.engines[READ_BIND if read_only else None].url
+            replica_url = db.engines[REPLICA_BIND].url if REPLICA_BIND in db.engines else None
+        url = make_url(self.config.get('ASYNC_DATABASE_URL') or async_database_url(sync_url))
+        self.engine = self.create_engine(url, read_only)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.replica_engine = self.create_engine(async_database_url(replica_url), True) if replica_url else None
+        self.replica_sessions = async_sessionmaker(self.replica_engine, expire_on_commit=False) if replica_url else None
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+        self.routes = {
+            '/api/events': self.event_stream,
+            '/api/search': self.search_records,
+            '/api/reports/downtime': self.downtime_report
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        if self.config['PROXY_FIX_X_FOR']:
+            scope = dict(scope, client=forwarded_client(scope, self.config['PROXY_FIX_X_FOR']))
+
+        view = self.routes.get(scope['path']) if scope['method'] == 'GET' else None
+        if view is None:
+            return await self.wsgi(scope, receive, send)
+        await self.native(view, scope, receive, send)
+
+    async def native(self, view, scope, receive, send):
+        """
+        Run a native view behind what the Flask app applies to its routes:
+        instrumentation, the concurrency cap (the event stream excepted, as
+        in ratelimit.ADMISSION_EXEMPT) and response compression. The rate
+        limit rules only cover logins, signups and writes, never these GETs.
+        """
+        if metrics.enabled:
+            begin_request(scope['path'])
+        send = self.wrap_send(scope, send)
+        admitted = False
+        try:
+            if scope['path'] not in ADMISSION_EXEMPT_PATHS:
+                if not admission.admit():
+                    return await self.respond(send, 503, self.json({'error': 'Server busy, retry shortly'}),
+                                              [(b'retry-after', b'1')])
+                admitted = True
+
+            session = await self.current_session(scope)
+            if session is None:
+                return await self.respond(send, 401, self.json({'error': 'Unauthorized access'}))
+            scope['session'] = session
+            await view(scope, receive, send)
+        finally:
+            if admitted:
+                admission.release()
+            if metrics.enabled:
+                clear_request()
+
+    def wrap_send(self, scope, send):
+        """send adding Server-Timing and compressing whole JSON bodies, like the Flask after_request hooks"""
+        accept_encoding = self.header(scope, b'accept-encoding') or ''
+        pending = {}
+
+        async def wrapped(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message['headers'])
+                server_timing = end_request(scope['path'], scope['method'], message['status']) if metrics.enabled else None
+                if server_timing:
+                    headers.append((b'server-timing', server_timing.encode()))
+                message = {**message, 'headers': headers}
+                content_type = dict(headers).get(b'content-type', b'').decode('latin-1')
+                if message['status'] == 200 and content_type.split(';')[0] in COMPRESSIBLE_TYPES:
+                    pending['start'], pending['content_type'] = message, content_type
+                    return  # Sent with the body, once its encoding is known
+                return await send(message)
+
+            start = pending.pop('start', None)
+            if start is not None:
+                headers = start['headers'] + [(b'vary', b'Accept-Encoding')]
+                encoded = None if message.get('more_body') else encode_body(
+                    message.get('body', b''), pending['content_type'], accept_encoding, self.config
+                )
+                if encoded:
+                    coding, body = encoded
+                    headers = [
+                        (name, b'W/' + value if name == b'etag' and not value.startswith(b'W/') else value)
+                        for name, value in headers if name != b'content-length'
+                    ] + [(b'content-encoding', coding.encode()), (b'content-length', str(len(body)).encode())]
+                    message = {**message, 'body': body}
+                await send({**start, 'headers': headers})
+            await send(message)
+
+        return wrapped
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                if self.replica_engine is not None:
+                    await self.replica_engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Helpers
+
+    def create_engine(self, url, read_only):
+        engine = create_async_engine(url, **engine_options(self.config, url))
+        if sqlite_profile_enabled(self.config, url):
+            apply_sqlite_profile(engine.sync_engine, self.config, read_only=read_only)
+        return engine
+
+    def json(self, data):
+        """Serialize like jsonify, so bodies and ETags match the Flask views"""
+        return self.flask_app.json.response(data).get_data()
+
+    async def respond(self, send, status, body, headers=(), content_type=b'application/json'):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()),
+                        *headers]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    def header(scope, name):
+        for key, value in scope['headers']:
+            if key == name:
+                return value.decode('latin-1')
+        return None
+
+    @staticmethod
+    def args(scope):
+        return MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+
+    async def current_session(self, scope):
+        """Flask session from the cookie, if it names an active user (through the user cache)"""
+        cookie = SimpleCookie(self.header(scope, b'cookie') or '')
+        morsel = cookie.get(self.config['SESSION_COOKIE_NAME'])
+        if morsel is None or self.serializer is None:
+            return None
+        try:
+            session = self.serializer.loads(
+                morsel.value, max_age=int(self.flask_app.permanent_session_lifetime.total_seconds())
+            )
+        except Exception:
+            return None
+
+        user_id = session.get('_user_id')
+        if user_id is None:
+            return None
+        user_id = int(user_id)
+        async with self.sessions() as db_session:
+            version, generation = user_cache.cached_version()
+            if version is STALE:
+                stamp = (await db_session.execute(
+                    select(TableVersion.version, TableVersion.changed_at).where(TableVersion.name == USERS_STAMP)
+                )).first()
+                version = user_cache.store_version(tuple(stamp) if stamp else None, generation)
+            snapshot = user_cache.get(user_id, version)
+            if snapshot is None:
+                row = (await db_session.execute(
+                    select(Technician.__table__).where(Technician.id == user_id)
+                )).mappings().first()
+                if row is None:
+                    return None
+                snapshot = dict(row)
+                user_cache.put(user_id, version, snapshot)
+        return session if snapshot['is_active'] else None
+
+    # Native async views
+
+    async def event_stream(self, scope, receive, send):
+        """Server-Sent Events (see routes.event_stream) without a thread per client"""
+        after_id = event_hub.parse_id(self.header(scope, b'last-event-id'))
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                        (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]
+        })
+
+        async def pump():
+            stream = event_hub.stream_async(
+                after_id,
+                keepalive=self.config['EVENTS_KEEPALIVE_SECONDS'],
+                duration=self.config['EVENTS_STREAM_SECONDS']
+            )
+            try:
+                async for message in stream:
+                    await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+                await send({'type': 'http.response.body'})
+            finally:
+                await stream.aclose()
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        # Stop as soon as the client goes away rather than at the next keepalive
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), OSError):
+                raise task.exception()
+
+    async def search_records(self, scope, receive, send):
+        """Same contract as routes.search_records, on the async engine"""
+        try:
+            query, kind, limit, offset = search_args(self.args(scope))
+        except ValueError as e:
+            return await self.respond(send, 400, self.json({'error': str(e)}))
+
+        async with self.sessions() as session:
+            hits, has_more = await session.run_sync(
+                lambda sync_session: search(query, kind=kind, limit=limit, offset=offset,
+                                            executor=sync_session)
+            )
+        await self.respond(send, 200, self.json(search_response(query, hits, has_more, limit, offset)))
+
+    async def downtime_report(self, scope, receive, send):
+        """Same contract and cache entries as routes.get_downtime_report"""
+        args = self.args(scope)
+        key = report_cache.key(scope['path'], args.items(multi=True), downtime_tags(args))
+        entry = report_cache.get(key)
+
+        if entry is None:
+            replica_beat = None
+            if self.replica_sessions is not None:
+                replica_beat = await asyncio.to_thread(replica_monitor.fresh_beat, scope['session'].get('last_write'))
+            sessions = self.sessions if replica_beat is None else self.replica_sessions
+            try:
+                params = downtime_args(args)
+                async with sessions() as session:
+                    report = await session.run_sync(
+                        lambda sync_session: downtime_report(**params, executor=sync_session)
+                    )
+            except ValueError as e:
+                return await self.respond(send, 400, self.json({'error': str(e)}))
+            body = self.json(downtime_response(report))
+            entry = (hashlib.sha1(body).hexdigest(), body)
+            if replica_beat is None or not report_cache.stale_read(replica_beat):
+                report_cache.set(key, *entry)
+
+        etag, body = entry[0], entry[1]
+        headers = [(b'etag', f'"{etag}"'.encode()), (b'cache-control', b'private, no-cache')]
+        if parse_etags(self.header(scope, b'if-none-match')).contains_weak(etag):  # Weakened if compressed
+            return await self.respond(send, 304, b'', headers)
+        await self.respond(send, 200, body, headers)
+
+    # WSGI fallback
+
+    async def wsgi(self, scope, receive, send):
+        """Run the Flask app for this request on the thread pool"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._run_wsgi, scope, receive, send, loop)
+
+    def _run_wsgi(self, scope, receive, send, loop):
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        output = self.flask_app.wsgi_app(self._environ(scope, receive, loop), start_response)
+        try:
+            for chunk in output:
+                if not chunk:
+                    continue
+                if 'sent' not in response:
+                    response['sent'] = True
+                    send_sync({'type': 'http.response.start', 'status': response['status'],
+                               'headers': response['headers']})
+                send_sync({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if 'sent' not in response:
+                send_sync({'type': 'http.response.start', 'status': response['status'],
+                           'headers': response['headers']})
+            send_sync({'type': 'http.response.body'})
+        except OSError:
+            pass  # Client went away mid-response
+        finally:
+            if hasattr(output, 'close'):
+                output.close()
+
+    def _environ(self, scope, receive, loop):
+        script_name = scope.get('root_path', '')
+        path = scope['path']
+        if script_name and path.startswith(script_name):
+            path = path[len(script_name):]
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': script_name.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BufferedReader(_RequestBody(receive, loop)),
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            environ[name] = f'{environ[name]},{value}' if name in environ else value
+        return environ
+
+
+def create_asgi_app():
+    """Application factory for ASGI servers"""
+    return AsgiApp(create_app())
+
+
+app = create_asgi_app()
@@ -0,0 +1,55 @@
+"""
+Content-hashed static asset URLs
+templates use static_url('js/app.js'), which adds ?v=<hash of the file>.
+A request whose v matches the file's current hash is served with a one-year
+immutable Cache-Control, so browsers reuse the asset without revalidating
+until a deploy changes its content, and with it the URL. The page itself is
+served with no-cache so it always points at the current hashes. Unversioned
+or outdated URLs keep Flask's default: revalidate with ETag/Last-Modified.
+"""
+import hashlib
+import os
+import threading
+from flask import url_for, request
+
+HASH_LENGTH = 12
+
+
+class AssetHashes:
+    """Content hash of each static file, recomputed when it changes on disk"""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            entry = self._hashes.get(path)
+        if entry is None or entry[0] != mtime:
+            with open(path, 'rb') as f:
+                entry = (mtime, hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH])
+            with self._lock:
+                self._hashes[path] = entry
+        return entry[1]
+
+
+asset_hashes = AssetHashes()
+
+
+def init_assets(app):
+    """Register static_url() for templates and the long-lived caching of versioned assets"""
+    def static_path(filename):
+        return os.path.join(app.static_folder, filename)
+
+    @app.template_global()
+    def static_url(filename):
+        return url_for('static', filename=filename, v=asset_hashes.get(static_path(filename)))
+
+    @app.after_request
+    def cache_versioned_assets(response):
+        if request.endpoint != 'static' or 'v' not in request.args or response.status_code not in (200, 304):
+            return response
+        if request.args['v'] == asset_hashes.get(static_path(request.view_args['filename'])):
+            response.headers['Cache-Control'] = f"public, max-age={app.config['STATIC_ASSET_MAX_AGE']}, immutable"
+        return response
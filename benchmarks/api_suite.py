@@ -0,0 +1,382 @@
+"""
+Benchmark suite: every API route against a generated fleet
+
+Generates a deterministic dataset with seed_data.generate_dataset (or reuses
+--database if it exists), then drives every route in routes.py through the
+Flask test client, one request at a time. For each route it records
+requests/s, p50/p99 latency, SQL statements per request and the peak
+memory Python allocates while serving one request (a separate pass under
+tracemalloc, so the timings are not skewed by it).
+
+Report routes are measured cold: the report cache is cleared before each
+request, so a regression in the report queries cannot hide behind a cache
+hit. Mutating routes get fresh rows to work on, created outside the timing.
+
+Save a run as the baseline, then compare later runs against it; the exit
+status is 1 if any route got slower at the median, issued more queries or
+used more memory than the tolerance allows:
+
+    python benchmarks/api_suite.py --save baseline.json
+    python benchmarks/api_suite.py --compare baseline.json --tolerance 0.25
+
+Usage:
+    python benchmarks/api_suite.py --assets 2000 --plants 5 --years 3 --requests 50
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ADMIN = {'email': 'admin@maintenance.com', 'password': 'admin123'}
+GENERATED_TECHNICIAN = 3  # First technician of generate_dataset, safe to edit
+IGNORED_METHODS = {'HEAD', 'OPTIONS'}
+
+
+class Route:
+    """
+    One benchmarked request
+
+    path and body may be callables of (iteration, context), where context is
+    what setup(client, iteration) returned; setup runs outside the timing.
+    """
+
+    def __init__(self, method, path, body=None, setup=None, status=200, client='admin',
+                 cold=False, stream=False, content_type=None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.setup = setup
+        self.status = status
+        self.client = client
+        self.cold = cold
+        self.stream = stream
+        self.content_type = content_type
+
+    def request(self, client, iteration):
+        context = self.setup(client, iteration) if self.setup else None
+        path = self.path(iteration, context) if callable(self.path) else self.path
+        body = self.body(iteration, context) if callable(self.body) else self.body
+        kwargs = {'buffered': not self.stream}
+        if isinstance(body, (dict, list)):
+            kwargs['json'] = body
+        elif body is not None:
+            kwargs['data'] = body
+            kwargs['content_type'] = self.content_type
+        return path, kwargs
+
+
+def created_id(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 201, (path, response.status_code, response.get_data(as_text=True))
+    return response.get_json()['id']
+
+
+def new_user(client, i):
+    return created_id(client, '/api/users', {
+        'full_name': f'Bench User {i}', 'email': f'bench-delete-{i}@bench.local',
+        'password': 'bench-password', 'role': 'technician'
+    })
+
+
+def new_equipment(client, i):
+    return created_id(client, '/api/equipment', {'name': f'Bench Asset {i}', 'type': 'Pump',
+                                                 'serial_number': f'BENCH-DELETE-{i}'})
+
+
+def new_failure(client, i):
+    return created_id(client, '/api/failures', {'equipment_id': 1 + i % 50, 'severity': 'Low',
+                                                'failure_description': f'Bench failure {i}'})
+
+
+def log_in(client, i):
+    client.post('/api/login', json=ADMIN)
+
+
+def import_body(i, context):
+    return ''.join(
+        json.dumps({'equipment_id': 1 + (i * 100 + n) % 50, 'maintenance_type': 'Preventive',
+                    'description': f'Bench import {i}-{n}', 'downtime_hours': 1.5}) + '\n'
+        for n in range(100)
+    )
+
+
+def build_routes(end, config):
+    """Route name -> Route; names are 'METHOD rule' so they match routes.py"""
+    since = (end - timedelta(days=90)).isoformat()
+    return {
+        'POST /api/login': Route('POST', '/api/login', ADMIN, client='guest'),
+        'POST /api/logout': Route('POST', '/api/logout', setup=log_in, client='guest'),
+        'GET /api/current_user': Route('GET', '/api/current_user'),
+        'GET /api/users': Route('GET', '/api/users'),
+        'POST /api/users': Route('POST', '/api/users', lambda i, _: {
+            'full_name': f'Bench User {i}', 'email': f'bench-create-{i}@bench.local',
+            'password': 'bench-password', 'role': 'technician'
+        }, status=201),
+        'PUT /api/users/<int:user_id>': Route('PUT', f'/api/users/{GENERATED_TECHNICIAN}',
+                                              lambda i, _: {'full_name': f'Technician {i}'}),
+        'DELETE /api/users/<int:user_id>': Route('DELETE', lambda i, user_id: f'/api/users/{user_id}', setup=new_user),
+        'PUT /api/users/<int:user_id>/toggle-active': Route('PUT', f'/api/users/{GENERATED_TECHNICIAN}/toggle-active'),
+        'POST /api/signup': Route('POST', '/api/signup', lambda i, _: {
+            'full_name': f'Bench Signup {i}', 'email': f'bench-signup-{i}@bench.local', 'password': 'bench-password'
+        }, status=201, client='guest'),
+        'GET /api/equipment': Route('GET', '/api/equipment?limit=50'),
+        'GET /api/equipment/<int:equipment_id>': Route('GET', lambda i, _: f'/api/equipment/{1 + i % 50}'),
+        'POST /api/equipment': Route('POST', '/api/equipment', lambda i, _: {
+            'name': f'Bench Asset {i}', 'type': 'Pump', 'serial_number': f'BENCH-CREATE-{i}'
+        }, status=201),
+        'PUT /api/equipment/<int:equipment_id>': Route('PUT', lambda i, _: f'/api/equipment/{1 + i % 50}',
+                                                       {'location': 'Plant A - Workshop'}),
+        'DELETE /api/equipment/<int:equipment_id>': Route('DELETE', lambda i, equipment_id: f'/api/equipment/{equipment_id}',
+                                                          setup=new_equipment),
+        'GET /api/maintenance': Route('GET', '/api/maintenance?limit=50'),
+        'POST /api/maintenance': Route('POST', '/api/maintenance', lambda i, _: {
+            'equipment_id': 1 + i % 50, 'maintenance_type': 'Preventive',
+            'description': f'Bench maintenance {i}', 'downtime_hours': 1.0
+        }, status=201),
+        'GET /api/schedule': Route('GET', '/api/schedule?window=30&limit=50'),
+        'GET /api/failures': Route('GET', '/api/failures?limit=50'),
+        'POST /api/failures': Route('POST', '/api/failures', lambda i, _: {
+            'equipment_id': 1 + i % 50, 'severity': 'Low', 'failure_description': f'Bench failure {i}'
+        }, status=201),
+        'PUT /api/failures/<int:failure_id>': Route('PUT', lambda i, failure_id: f'/api/failures/{failure_id}',
+                                                    {'resolved': True}, setup=new_failure),
+        'GET /api/events': Route('GET', '/api/events', stream=True),
+        'GET /api/search': Route('GET', '/api/search?q=bearing+vibration&limit=20'),
+        'POST /api/import/<kind>': Route('POST', '/api/import/maintenance', import_body,
+                                         content_type='application/x-ndjson'),
+        'GET /api/export/<kind>': Route('GET', f'/api/export/maintenance?format=ndjson&equipment_id=1&from={since}'),
+        'GET /api/reports/dashboard': Route('GET', '/api/reports/dashboard', cold=True),
+        'GET /api/reports/equipment/<int:equipment_id>': Route('GET', lambda i, _: f'/api/reports/equipment/{1 + i % 50}',
+                                                               cold=True),
+        'GET /api/reports/downtime': Route('GET', '/api/reports/downtime?bucket=week&group_by=equipment', cold=True),
+        'GET /api/reports/reliability': Route('GET', '/api/reports/reliability?group_by=type', cold=True),
+        'GET /api/reports/cache-stats': Route('GET', '/api/reports/cache-stats'),
+        'GET /api/admin/metrics': Route('GET', '/api/admin/metrics',
+                                        status=200 if config['INSTRUMENTATION_ENABLED'] else 404)
+    }
+
+
+def api_routes(app):
+    """'METHOD rule' of every route registered on the API blueprint"""
+    return {
+        f'{method} {rule.rule}'
+        for rule in app.url_map.iter_rules() if rule.endpoint.startswith('api.')
+        for method in rule.methods - IGNORED_METHODS
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float('nan')
+
+
+def copy_database(source, target):
+    """Consistent copy of a SQLite file, WAL included"""
+    source, target = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def run_suite(args):
+    """Generate or open the dataset and measure every route"""
+    workdir = tempfile.mkdtemp(prefix='cmms-suite-')
+    database = os.path.join(workdir, 'suite.db')
+    generated = not (args.database and os.path.exists(args.database))
+    if not generated:
+        copy_database(args.database, database)  # The suite's writes never accumulate in the saved dataset
+    os.environ['DATABASE_URL'] = 'sqlite:///' + database
+    for name, value in (('OUTBOX_WORKER_ENABLED', 'false'), ('SCHEDULER_ENABLED', 'false'),
+                        ('RATE_LIMIT_ENABLED', 'false'),  # The suite hammers login and signup
+                        ('PASSWORD_HASH_WORKERS', '0'),
+                        ('LAST_LOGIN_FLUSH_SECONDS', '3600')):  # No background writes between requests
+        os.environ.setdefault(name, value)
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import create_app
+    from cache import report_cache
+    from seed_data import generate_dataset
+
+    end = args.end or date.today()
+    app = create_app()
+    if generated:
+        with app.app_context():
+            generate_dataset(plants=args.plants, assets=args.assets, years=args.years, seed=args.seed, end=end)
+        if args.database:
+            copy_database(database, args.database)
+
+    # Statements issued by the request thread; the app's own threads do not count
+    main_thread = threading.get_ident()
+    statements = [0]
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def count_statement(*_):
+        if threading.get_ident() == main_thread:
+            statements[0] += 1
+
+    routes = build_routes(end, app.config)
+    uncovered = sorted(api_routes(app) - set(routes))
+    if uncovered:
+        print('Routes without a benchmark: ' + ', '.join(uncovered), file=sys.stderr)
+
+    clients = {'admin': app.test_client(), 'guest': app.test_client()}
+    clients['admin'].post('/api/login', json=ADMIN)
+    iteration = 0
+
+    def measure(route):
+        nonlocal iteration
+        iteration += 1
+        client = clients[route.client]
+        path, kwargs = route.request(client, iteration)
+        if route.cold:
+            report_cache.clear()
+        statements[0] = 0
+        started = time.perf_counter()
+        response = client.open(path, method=route.method, **kwargs)
+        if not route.stream:
+            response.get_data()
+        elapsed = time.perf_counter() - started
+        queries = statements[0]
+        response.close()
+        return response.status_code == route.status, elapsed, queries
+
+    results = {}
+    for name, route in routes.items():
+        for _ in range(args.warmup):
+            measure(route)
+
+        latencies, queries, errors = [], [], 0
+        for _ in range(args.requests):
+            ok, elapsed, count = measure(route)
+            latencies.append(elapsed)
+            queries.append(count)
+            errors += not ok
+
+        tracemalloc.start()
+        peak = 0
+        for _ in range(args.memory_requests):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            measure(route)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+
+        results[name] = {
+            'requests_per_s': len(latencies) / sum(latencies),
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'queries': statistics.median(queries),
+            'peak_kib': peak / 1024,
+            'errors': errors
+        }
+        print(f"{name:<48} {results[name]['p50_ms']:>8.2f} ms  {results[name]['queries']:>5g} queries", file=sys.stderr)
+
+    return {
+        'dataset': {'plants': args.plants, 'assets': args.assets, 'years': args.years, 'seed': args.seed,
+                    'end': end.isoformat()},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'settings': {'requests': args.requests, 'warmup': args.warmup, 'memory_requests': args.memory_requests},
+        'uncovered': uncovered,
+        'routes': results
+    }
+
+
+def compare(baseline, current, tolerance, min_delta_ms):
+    """
+    Regressions of current against baseline
+
+    Median latency and peak memory may grow by the tolerance fraction (and
+    latency by at least min_delta_ms, so sub-millisecond noise is ignored);
+    query counts are deterministic for a given dataset and may not grow at
+    all. p99 is reported but not checked: with a few dozen requests per
+    route it is one or two samples.
+    """
+    regressions = []
+    for name, old in baseline['routes'].items():
+        new = current['routes'].get(name)
+        if new is None:
+            regressions.append((name, 'missing from this run', None, None))
+            continue
+        if new['p50_ms'] > old['p50_ms'] * (1 + tolerance) and new['p50_ms'] - old['p50_ms'] > min_delta_ms:
+            regressions.append((name, 'p50_ms', old['p50_ms'], new['p50_ms']))
+        if new['peak_kib'] > old['peak_kib'] * (1 + tolerance):
+            regressions.append((name, 'peak_kib', old['peak_kib'], new['peak_kib']))
+        if new['queries'] > old['queries']:
+            regressions.append((name, 'queries', old['queries'], new['queries']))
+        if new['errors'] > old['errors']:
+            regressions.append((name, 'errors', old['errors'], new['errors']))
+    return regressions
+
+
+def print_table(current, baseline=None):
+    print(f"{'route':<48} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KiB':>9} {'errors':>7}"
+          + (f" {'p50 vs base':>12}" if baseline else ''))
+    for name, result in current['routes'].items():
+        line = (f"{name:<48} {result['requests_per_s']:>8.1f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{result['queries']:>8g} {result['peak_kib']:>9.1f} {result['errors']:>7}")
+        old = baseline['routes'].get(name) if baseline else None
+        if old:
+            line += f" {(result['p50_ms'] / old['p50_ms'] - 1) * 100:>+11.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plants', type=int, default=5)
+    parser.add_argument('--assets', type=int, default=2000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=date.fromisoformat, help='Last day of generated history (default: today)')
+    parser.add_argument('--database', help='Keep the generated dataset in this SQLite file, or reuse it if it exists')
+    parser.add_argument('--requests', type=int, default=50, help='Timed requests per route')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route first')
+    parser.add_argument('--memory-requests', type=int, default=5, help='Requests per route traced for peak memory')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to check the results against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency/memory growth (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Latency changes below this never count')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if args.end is None and baseline['dataset'].get('end'):
+            args.end = date.fromisoformat(baseline['dataset']['end'])  # Same rows as the baseline
+
+    current = run_suite(args)
+    print_table(current, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved {args.save}")
+
+    if baseline:
+        if baseline['dataset'] != current['dataset']:
+            print(f"\nWarning: dataset differs from the baseline's: {baseline['dataset']}")
+        regressions = compare(baseline, current, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for name, metric, old, new in regressions:
+                print(f"  {name}: {metric}" + (f" {old:.2f} -> {new:.2f}" if old is not None else ''))
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Load test: threaded WSGI server vs the ASGI entry point
+
+Builds a throwaway SQLite database, then for each serving mode starts the
+server, logs in and runs the same workload: --concurrency clients issuing
+requests to --path URLs back to back for --duration seconds, while
+--sse-clients idle Server-Sent Events connections stay open. Reports
+requests/s, p50/p99 latency, errors and the server's thread count.
+
+    wsgi  Flask's threaded development server (what app.py runs)
+    asgi  uvicorn asgi:app
+
+Usage:
+    python benchmarks/load_test.py --concurrency 50 --sse-clients 200 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_PATHS = [
+    '/api/search?q=bearing+vibration&limit=20',
+    '/api/reports/downtime?bucket=week&group_by=equipment',
+    '/api/equipment?limit=50'
+]
+SERVERS = {
+    'wsgi': "from app import create_app; create_app().run(host='127.0.0.1', port={port}, threaded=True)",
+    'asgi': None  # uvicorn, see start_server
+}
+
+
+def build_database(path, assets, events):
+    """Seed a database with an admin user, equipment, logs and failures"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    os.environ['OUTBOX_WORKER_ENABLED'] = 'false'
+
+    import random
+    from sqlalchemy import insert
+    from app import create_app
+    from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+    from rollups import rebuild_rollups
+    from search import rebuild_search_index
+
+    rng = random.Random(42)
+    words = ['bearing', 'vibration', 'seal', 'leak', 'motor', 'overheating', 'pump', 'valve', 'belt', 'filter']
+    app = create_app()
+    with app.app_context():
+        admin = Technician(full_name='Load Test', email='load@test.local', role='admin')
+        admin.set_password('load-test')
+        db.session.add(admin)
+        db.session.flush()
+        db.session.execute(insert(Equipment), [
+            {'name': f'Asset {i}', 'type': ['Pump', 'Turbine', 'Compressor'][i % 3],
+             'serial_number': f'LOAD-{i}', 'location': f'Plant {i % 10}', 'status': 'Active'}
+            for i in range(assets)
+        ])
+        origin = datetime.utcnow() - timedelta(days=365)
+        for model, rows in ((MaintenanceLog, [
+            {'equipment_id': rng.randint(1, assets), 'technician_id': admin.id,
+             'maintenance_type': rng.choice(['Preventive', 'Corrective']),
+             'description': ' '.join(rng.choices(words, k=6)), 'downtime_hours': rng.random() * 8,
+             'maintenance_date': origin + timedelta(minutes=rng.randint(0, 525600))}
+            for _ in range(events // 2)
+        ]), (FailureReport, [
+            {'equipment_id': rng.randint(1, assets), 'reported_by': admin.id,
+             'failure_description': ' '.join(rng.choices(words, k=6)), 'severity': 'Low',
+             'reported_date': origin + timedelta(minutes=rng.randint(0, 525600)), 'resolved': True}
+            for _ in range(events // 2)
+        ])):
+            db.session.execute(insert(model), rows)
+        rebuild_rollups()
+        rebuild_search_index()
+        db.session.commit()
+
+
+def start_server(mode, port, env):
+    if mode == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+                   '--port', str(port), '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-c', SERVERS[mode].format(port=port)]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def thread_count(pid):
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def http(port, method, path, cookie=None, body=None):
+    """One request on its own connection; returns (status, headers, body)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode() if body is not None else b''
+    head = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+    if cookie:
+        head += f'Cookie: {cookie}\r\n'
+    if body is not None:
+        head += f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n'
+    writer.write(head.encode() + b'\r\n' + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    header_block, _, content = response.partition(b'\r\n\r\n')
+    lines = header_block.decode('latin-1').split('\r\n')
+    headers = [line.split(':', 1) for line in lines[1:] if ':' in line]
+    return int(lines[0].split()[1]), {name.lower(): value.strip() for name, value in headers}, content
+
+
+async def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await http(port, 'GET', '/api/current_user')
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+async def open_sse(port, cookie, count):
+    streams = []
+    for _ in range(count):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'GET /api/events HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n\r\n'.encode())
+        await writer.drain()
+        streams.append((reader, writer))
+    for reader, _ in streams:
+        await asyncio.wait_for(reader.readuntil(b'retry:'), 30)
+    return streams
+
+
+async def run_workload(port, cookie, paths, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client(offset):
+        nonlocal errors
+        index = offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                status, _, _ = await http(port, 'GET', path, cookie)
+                if status != 200:
+                    errors += 1
+            except OSError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float('nan')
+
+
+async def measure(mode, port, args, env):
+    server = start_server(mode, port, env)
+    try:
+        await wait_until_up(port)
+        status, headers, _ = await http(port, 'POST', '/api/login',
+                                        body={'email': 'load@test.local', 'password': 'load-test'})
+        if status != 200:
+            raise RuntimeError(f'{mode}: login failed ({status})')
+        cookie = headers['set-cookie'].split(';', 1)[0]
+
+        streams = await open_sse(port, cookie, args.sse_clients)
+        await run_workload(port, cookie, args.path, args.concurrency, min(args.duration, 3))  # Warm up
+        latencies, errors, elapsed = await run_workload(port, cookie, args.path, args.concurrency, args.duration)
+        threads = thread_count(server.pid)
+        for _, writer in streams:
+            writer.close()
+
+        return {
+            'mode': mode,
+            'requests': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'errors': errors,
+            'threads': threads
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=sorted(SERVERS), action='append', help='Default: both')
+    parser.add_argument('--path', action='append', help='URL to request (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent request loops')
+    parser.add_argument('--sse-clients', type=int, default=200, help='Idle event streams held open')
+    parser.add_argument('--duration', type=int, default=20, help='Seconds per mode')
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--events', type=int, default=100000, help='Maintenance logs + failure reports')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+    args.path = args.path or DEFAULT_PATHS
+
+    workdir = tempfile.mkdtemp(prefix='cmms-load-')
+    database = os.path.join(workdir, 'load.db')
+    build_database(database, args.assets, args.events)
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + database, OUTBOX_WORKER_ENABLED='false',
+               SCHEDULER_ENABLED='false', PYTHONPATH=ROOT)
+
+    results = [asyncio.run(measure(mode, args.port, args, env)) for mode in (args.mode or ['wsgi', 'asgi'])]
+
+    print(f"Concurrency {args.concurrency}, {args.sse_clients} idle SSE clients, {args.duration}s per mode")
+    print(f"{'mode':<6} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'threads':>8}")
+    for result in results:
+        print(f"{result['mode']:<6} {result['requests']:>9} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f} {result['errors']:>7} {str(result['threads']):>8}")
+
+
+if __name__ == '__main__':
+    main()
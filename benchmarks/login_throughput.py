@@ -0,0 +1,151 @@
+"""
+Login throughput: hashing in the request thread vs the hashing pool
+
+For each profile a fresh database is seeded with --users technicians, then
+--logins threads log in back to back while --readers threads poll a cheap
+API route, all through the Flask app for --duration seconds. Reports
+logins/s, login p99, 503s, and the readers' requests/s and p99, which show
+whether a login burst starves the rest of the API.
+
+    inline  PASSWORD_HASH_WORKERS=0 (hashing on the request thread)
+    pool    PASSWORD_HASH_WORKERS=--workers
+
+Each profile runs in its own process so the hashing pool never carries over.
+
+Usage:
+    python benchmarks/login_throughput.py --logins 16 --readers 4 --duration 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+READ_PATH = '/api/equipment?limit=20'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float('nan')
+
+
+def build_database(path, users):
+    """Seed technicians with the configured hash, and some equipment"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from app import create_app
+    from models import db, Technician, Equipment
+
+    app = create_app()
+    with app.app_context():
+        for i in range(users):
+            user = Technician(full_name=f'Tech {i}', email=f'tech{i}@load.local', role='admin' if i == 0 else 'technician')
+            user.set_password(f'password-{i}')
+            db.session.add(user)
+        db.session.add_all(
+            Equipment(name=f'Asset {i}', type='Pump', serial_number=f'LOGIN-{i}', location='Plant 1', status='Active')
+            for i in range(50)
+        )
+        db.session.commit()
+    return app
+
+
+def run_profile(args):
+    """Seed and load one profile; runs inside the child process"""
+    app = build_database(args.database, args.users)
+    latencies = {'login': [], 'read': []}
+    failures = {'login': 0, 'read': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def login_worker(offset):
+        client = app.test_client()
+        index = offset
+        while time.monotonic() < deadline:
+            user = index % args.users
+            index += 1
+            started = time.perf_counter()
+            response = client.post('/api/login', json={'email': f'tech{user}@load.local', 'password': f'password-{user}'})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies['login'].append(elapsed)
+                else:
+                    failures['login'] += 1
+                    failures['busy'] += response.status_code == 503
+
+    def read_worker():
+        client = app.test_client()
+        client.post('/api/login', json={'email': 'tech0@load.local', 'password': 'password-0'})
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = client.get(READ_PATH)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies['read'].append(elapsed)
+                else:
+                    failures['read'] += 1
+
+    threads = [threading.Thread(target=login_worker, args=(i,)) for i in range(args.logins)]
+    threads += [threading.Thread(target=read_worker) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'logins_per_s': len(latencies['login']) / args.duration,
+        'login_p99_ms': percentile(latencies['login'], 0.99) * 1000,
+        'busy': failures['busy'],
+        'reads_per_s': len(latencies['read']) / args.duration,
+        'read_p99_ms': percentile(latencies['read'], 0.99) * 1000,
+        'errors': failures['login'] - failures['busy'] + failures['read']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profile', choices=['inline', 'pool'], action='append', help='Default: both')
+    parser.add_argument('--logins', type=int, default=16, help='Concurrent login threads')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent threads polling ' + READ_PATH)
+    parser.add_argument('--duration', type=int, default=15, help='Seconds per profile')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Hashing processes for the pool profile')
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD (default: the app default)')
+    parser.add_argument('--database', help=argparse.SUPPRESS)  # Set for the child process
+    args = parser.parse_args()
+
+    if args.database:
+        return run_profile(args)
+
+    workdir = tempfile.mkdtemp(prefix='cmms-login-')
+    rows = []
+    for name in args.profile or ['inline', 'pool']:
+        env = dict(os.environ, OUTBOX_WORKER_ENABLED='false', SCHEDULER_ENABLED='false', PYTHONPATH=ROOT,
+                   RATE_LIMIT_ENABLED='false',  # Measure hashing, not the login limits
+                   PASSWORD_HASH_WORKERS='0' if name == 'inline' else str(args.workers))
+        if args.method:
+            env['PASSWORD_HASH_METHOD'] = args.method
+        command = [sys.executable, '-m', 'benchmarks.login_throughput',
+                   '--logins', str(args.logins), '--readers', str(args.readers),
+                   '--duration', str(args.duration), '--users', str(args.users),
+                   '--database', os.path.join(workdir, f'{name}.db')]
+        output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        rows.append((name, json.loads(output.stdout.strip().splitlines()[-1])))
+
+    print(f"{args.logins} login threads, {args.readers} reader threads, {args.duration}s per profile, "
+          f"{args.workers} hashing processes in the pool profile")
+    print(f"{'profile':<8} {'logins/s':>9} {'login p99':>10} {'503s':>5} {'reads/s':>8} {'read p99':>9} {'errors':>7}")
+    for name, result in rows:
+        print(f"{name:<8} {result['logins_per_s']:>9.1f} {result['login_p99_ms']:>10.1f} {result['busy']:>5} "
+              f"{result['reads_per_s']:>8.1f} {result['read_p99_ms']:>9.1f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: reliability report over a large synthetic fleet
+
+Builds a throwaway SQLite database with N equipment items and M events
+(failure reports and maintenance logs spread over two years), rebuilds the
+rollups, then times reliability_report() for each grouping and, for
+comparison, a naive per-asset loop on a sample of assets extrapolated to the
+whole fleet.
+
+Usage:
+    python benchmarks/reliability.py --assets 10000 --events 5000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK = 100000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--assets', type=int, default=10000, help='Equipment items')
+    parser.add_argument('--events', type=int, default=5000000, help='Failure reports + maintenance logs')
+    parser.add_argument('--sample', type=int, default=200, help='Assets timed with the naive loop')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='cmms-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['OUTBOX_WORKER_ENABLED'] = 'false'
+
+    import numpy as np
+    from sqlalchemy import insert
+    from app import create_app
+    from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+    from reliability import reliability_report
+    from rollups import rebuild_rollups
+
+    rng = np.random.default_rng(args.seed)
+    app = create_app()
+    with app.app_context():
+        db.session.execute(insert(Technician), [{
+            'full_name': 'Bench Technician', 'email': 'bench@bench.local', 'role': 'technician',
+            'is_active': True, 'password_hash': 'x'
+        }])
+        types = ['Pump', 'Turbine', 'Compressor', 'Generator', 'Cooling System']
+        installed = date.today() - timedelta(days=900)
+        db.session.execute(insert(Equipment), [
+            {'name': f'Asset {i}', 'type': types[i % len(types)], 'serial_number': f'BENCH-{i}',
+             'location': f'Plant {i % 25}', 'status': 'Active',
+             'installation_date': installed + timedelta(days=int(rng.integers(0, 600)))}
+            for i in range(args.assets)
+        ])
+        db.session.commit()
+
+        started = time.perf_counter()
+        origin = datetime.utcnow() - timedelta(days=730)
+        failures = args.events // 3
+        for offset in range(0, args.events, CHUNK):
+            size = min(CHUNK, args.events - offset)
+            equipment_ids = rng.integers(1, args.assets + 1, size).tolist()
+            minutes = rng.integers(0, 730 * 24 * 60, size).tolist()
+            downtime = np.round(rng.exponential(3.0, size), 2).tolist()
+            corrective = (rng.random(size) < 0.4).tolist()
+            rows = range(offset, offset + size)
+            failure_rows = [i - offset for i in rows if i < failures]
+            log_rows = [i - offset for i in rows if i >= failures]
+            if failure_rows:
+                db.session.execute(insert(FailureReport), [
+                    {'equipment_id': equipment_ids[i], 'reported_by': 1, 'failure_description': 'Bench failure',
+                     'severity': 'Medium', 'reported_date': origin + timedelta(minutes=minutes[i]),
+                     'resolved': True}
+                    for i in failure_rows
+                ])
+            if log_rows:
+                db.session.execute(insert(MaintenanceLog), [
+                    {'equipment_id': equipment_ids[i], 'technician_id': 1,
+                     'maintenance_type': 'Corrective' if corrective[i] else 'Preventive',
+                     'description': 'Bench maintenance', 'downtime_hours': downtime[i],
+                     'maintenance_date': origin + timedelta(minutes=minutes[i])}
+                    for i in log_rows
+                ])
+            db.session.commit()
+        load_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rebuild_rollups()
+        db.session.commit()
+        rollup_time = time.perf_counter() - started
+
+        timings = {}
+        for group_by in ('equipment', 'type', 'location'):
+            started = time.perf_counter()
+            report = reliability_report(group_by=group_by)
+            timings[group_by] = (time.perf_counter() - started, len(report['items']))
+
+        # Naive baseline: a few queries and Python arithmetic per asset
+        end = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        start = end - timedelta(days=366)
+        started = time.perf_counter()
+        for equipment in Equipment.query.limit(args.sample):
+            logs = MaintenanceLog.query.filter(
+                MaintenanceLog.equipment_id == equipment.id,
+                MaintenanceLog.maintenance_date >= start,
+                MaintenanceLog.maintenance_date < end
+            ).all()
+            failure_count = FailureReport.query.filter(
+                FailureReport.equipment_id == equipment.id,
+                FailureReport.reported_date >= start,
+                FailureReport.reported_date < end
+            ).count()
+            downtime = sum(log.downtime_hours or 0 for log in logs)
+            repairs = [log for log in logs if log.maintenance_type == 'Corrective']
+            uptime = (end - start).total_seconds() / 3600 - downtime
+            _ = uptime / failure_count if failure_count else None
+            _ = sum(log.downtime_hours for log in repairs) / len(repairs) if repairs else None
+        naive = (time.perf_counter() - started) / args.sample * args.assets
+
+    print(f"Assets:              {args.assets}")
+    print(f"Events:              {args.events}")
+    print(f"Data load:           {load_time:.1f}s")
+    print(f"Rollup rebuild:      {rollup_time:.1f}s")
+    for group_by, (elapsed, items) in timings.items():
+        print(f"Report by {group_by + ':':<10} {elapsed:.3f}s ({items} groups)")
+    print(f"Naive per-asset:     {naive:.1f}s (extrapolated from {args.sample} assets)")
+
+
+if __name__ == '__main__':
+    main()
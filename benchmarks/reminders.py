@@ -0,0 +1,78 @@
+"""
+Benchmark: maintenance reminder run with many due items
+
+Builds a throwaway SQLite database with N equipment items that are all due
+for maintenance in 7 days, then times check_and_send_maintenance_reminders()
+and reports the SQL statements issued and the emails queued.
+
+Usage:
+    python benchmarks/reminders.py --items 10000 --technicians 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000, help='Due maintenance items')
+    parser.add_argument('--technicians', type=int, default=50, help='Active technicians')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='cmms-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['OUTBOX_WORKER_ENABLED'] = 'false'
+
+    from sqlalchemy import event, insert
+    from app import create_app
+    from models import db, Technician, Equipment, MaintenanceLog, OutboxMessage
+    from email_service import check_and_send_maintenance_reminders
+
+    app = create_app()
+    with app.app_context():
+        password_hash = Technician(full_name='x', email='x', role='technician')
+        password_hash.set_password('bench')
+        db.session.execute(insert(Technician), [
+            {'full_name': f'Technician {i}', 'email': f'tech{i}@bench.local', 'role': 'technician',
+             'is_active': True, 'password_hash': password_hash.password_hash}
+            for i in range(args.technicians)
+        ])
+        db.session.execute(insert(Equipment), [
+            {'name': f'Asset {i}', 'type': 'Pump', 'serial_number': f'BENCH-{i}',
+             'location': f'Plant {i % 10}', 'status': 'Active'}
+            for i in range(args.items)
+        ])
+        due = datetime.utcnow().date() + timedelta(days=7)
+        db.session.execute(insert(MaintenanceLog), [
+            {'equipment_id': i + 1, 'technician_id': i % args.technicians + 1,
+             'maintenance_type': 'Preventive', 'description': 'Routine service',
+             'maintenance_date': datetime.utcnow() - timedelta(days=83),
+             'downtime_hours': 1.0, 'next_maintenance_date': due}
+            for i in range(args.items)
+        ])
+        db.session.commit()
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *rest: statements.append(statement))
+
+        started = time.perf_counter()
+        check_and_send_maintenance_reminders()
+        elapsed = time.perf_counter() - started
+
+        queued = OutboxMessage.query.count()
+
+    print(f"Due items:        {args.items}")
+    print(f"Technicians:      {args.technicians}")
+    print(f"Run time:         {elapsed:.3f}s")
+    print(f"SQL statements:   {len(statements)}")
+    print(f"Emails queued:    {queued}")
+
+
+if __name__ == '__main__':
+    main()
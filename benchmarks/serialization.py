@@ -0,0 +1,129 @@
+"""
+Benchmark: list serialization, ORM objects vs column projections
+
+Builds a throwaway SQLite database with --rows maintenance logs, then
+serializes all of them the way GET /api/maintenance does, each path timed
+best of --repeat with its peak Python memory measured in a separate run:
+
+    orm             MaintenanceLog objects with joined relations + to_dict() + jsonify,
+                    how the list was served before projections
+    projection      serializers.MAINTENANCE_LOG rows + the json module
+    orjson          the same rows encoded by orjson (if installed)
+    streamed        stream_array(), the chunked response of unpaged lists
+
+Every path must produce the same bytes as the orm path.
+
+Usage:
+    python benchmarks/serialization.py --rows 100000
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='Maintenance logs')
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='cmms-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['OUTBOX_WORKER_ENABLED'] = 'false'
+
+    import random
+    from sqlalchemy import insert, select
+    from sqlalchemy.orm import joinedload
+    from app import create_app
+    from models import db, Technician, Equipment, MaintenanceLog
+    import serializers
+    from serializers import MAINTENANCE_LOG, stream_array
+
+    rng = random.Random(42)
+    app = create_app()
+    with app.app_context():
+        db.session.execute(insert(Technician), [
+            {'full_name': f'Bench Technician {i}', 'email': f'bench{i}@bench.local', 'role': 'technician',
+             'is_active': True, 'password_hash': 'x'}
+            for i in range(20)
+        ])
+        db.session.execute(insert(Equipment), [
+            {'name': f'Asset {i}', 'type': 'Pump', 'serial_number': f'BENCH-{i}', 'location': f'Plant {i % 5}',
+             'status': 'Active'}
+            for i in range(args.assets)
+        ])
+        origin = datetime(2024, 1, 1)
+        db.session.execute(insert(MaintenanceLog), [
+            {'equipment_id': rng.randint(1, args.assets), 'technician_id': rng.randint(1, 20),
+             'maintenance_type': rng.choice(['Preventive', 'Corrective']),
+             'description': f'Inspected and serviced unit, replaced worn part {i % 97}',
+             'maintenance_date': origin + timedelta(minutes=rng.randint(0, 1051200)),
+             'downtime_hours': round(rng.random() * 8, 2),
+             'next_maintenance_date': (origin + timedelta(days=rng.randint(0, 900))).date() if i % 3 else None}
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+    ordering = [MaintenanceLog.maintenance_date.desc(), MaintenanceLog.id.desc()]
+
+    def orm():
+        logs = db.session.scalars(
+            select(MaintenanceLog)
+            .options(joinedload(MaintenanceLog.equipment), joinedload(MaintenanceLog.technician))
+            .order_by(*ordering)
+        ).all()
+        return [app.json.response([log.to_dict() for log in logs]).get_data()]
+
+    def projection(encoder):
+        def run():
+            serializers.orjson = encoder
+            rows = db.session.execute(MAINTENANCE_LOG.select().order_by(*ordering))
+            return [serializers.json_response(MAINTENANCE_LOG.dicts(rows)).get_data()]
+        return run
+
+    def streamed():
+        response = stream_array(MAINTENANCE_LOG, MAINTENANCE_LOG.select().order_by(*ordering))
+        return response.response
+
+    orjson = serializers.orjson
+    paths = [('orm', orm), ('projection', projection(None))]
+    if orjson is not None:
+        paths.append(('orjson', projection(orjson)))
+    paths.append(('streamed', streamed))
+
+    results = []
+    with app.test_request_context():
+        for name, run in paths:
+            times = []
+            for _ in range(args.repeat):
+                db.session.remove()  # Every run starts with an empty identity map
+                started = time.perf_counter()
+                body = b''.join(run())
+                times.append(time.perf_counter() - started)
+            db.session.remove()
+            tracemalloc.start()
+            for _ in run():
+                pass  # Chunks are dropped as they come, as a server sends them
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            serializers.orjson = orjson
+            results.append((name, min(times), peak, len(body), hashlib.sha256(body).hexdigest()))
+
+    print(f"{args.rows} maintenance logs, best of {args.repeat}" + ('' if orjson else ' (orjson not installed)'))
+    print(f"{'path':<12} {'seconds':>8} {'rows/s':>10} {'speedup':>8} {'peak MiB':>9} {'bytes':>10}  same as orm")
+    baseline, digest = results[0][1], results[0][4]
+    for name, seconds, peak, size, body_digest in results:
+        print(f"{name:<12} {seconds:>8.3f} {args.rows / seconds:>10.0f} {baseline / seconds:>7.1f}x "
+              f"{peak / 2 ** 20:>9.1f} {size:>10}  {'yes' if body_digest == digest else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+SQLite concurrency benchmark: default settings vs the tuning profile
+
+For each profile a fresh database is seeded, then --writers threads post
+maintenance logs while --readers threads request read views, all through
+the Flask app for --duration seconds. Reports writes/s, reads/s, p99
+latencies and "database is locked" failures per profile.
+
+    baseline  SQLITE_TUNING=false, READ_POOL_ENABLED=false (rollback journal)
+    tuned     WAL profile, no read pool
+    read-pool WAL profile plus the read-only pool for @read_only views
+
+Each profile runs in its own process so engines and config never mix.
+
+Usage:
+    python benchmarks/sqlite_concurrency.py --writers 4 --readers 16 --duration 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROFILES = {
+    'baseline': {'SQLITE_TUNING': 'false', 'READ_POOL_ENABLED': 'false'},
+    'tuned': {'SQLITE_TUNING': 'true', 'READ_POOL_ENABLED': 'false'},
+    'read-pool': {'SQLITE_TUNING': 'true', 'READ_POOL_ENABLED': 'true'}
+}
+READ_PATHS = [
+    '/api/equipment?limit=50',
+    '/api/maintenance?limit=50',
+    '/api/reports/dashboard',
+    '/api/search?q=bearing&limit=20'
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float('nan')
+
+
+def run_profile(args):
+    """Seed and load one profile; runs inside the child process"""
+    from benchmarks.load_test import build_database
+
+    os.environ['REPORT_CACHE_TTL'] = '0'  # Measure the database, not the report cache
+    build_database(args.database, args.assets, args.events)  # Sets DATABASE_URL before config loads
+
+    from app import create_app
+    app = create_app()
+
+    results = {'write': [], 'read': []}
+    failures = {'write': 0, 'read': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def worker(kind, offset):
+        client = app.test_client()
+        client.post('/api/login', json={'email': 'load@test.local', 'password': 'load-test'})
+        index = offset
+        while time.monotonic() < deadline:
+            index += 1
+            started = time.perf_counter()
+            try:
+                if kind == 'write':
+                    response = client.post('/api/maintenance', json={
+                        'equipment_id': index % args.assets + 1,
+                        'maintenance_type': 'Preventive',
+                        'description': f'bearing check {index}',
+                        'downtime_hours': 0.5
+                    })
+                    ok = response.status_code == 201
+                else:
+                    response = client.get(READ_PATHS[index % len(READ_PATHS)])
+                    ok = response.status_code == 200
+                locked = not ok and b'locked' in response.data
+            except Exception as e:
+                ok, locked = False, 'locked' in str(e)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    results[kind].append(elapsed)
+                else:
+                    failures[kind] += 1
+                    failures['locked'] += locked
+
+    threads = [threading.Thread(target=worker, args=('write', i * 1000)) for i in range(args.writers)]
+    threads += [threading.Thread(target=worker, args=('read', i)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'writes_per_s': len(results['write']) / args.duration,
+        'reads_per_s': len(results['read']) / args.duration,
+        'write_p99_ms': percentile(results['write'], 0.99) * 1000,
+        'read_p99_ms': percentile(results['read'], 0.99) * 1000,
+        'write_errors': failures['write'],
+        'read_errors': failures['read'],
+        'locked': failures['locked']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append', help='Default: all')
+    parser.add_argument('--writers', type=int, default=4, help='Concurrent writer threads')
+    parser.add_argument('--readers', type=int, default=16, help='Concurrent reader threads')
+    parser.add_argument('--duration', type=int, default=15, help='Seconds per profile')
+    parser.add_argument('--assets', type=int, default=200)
+    parser.add_argument('--events', type=int, default=20000, help='Maintenance logs + failure reports')
+    parser.add_argument('--database', help=argparse.SUPPRESS)  # Set for the child process
+    args = parser.parse_args()
+
+    if args.database:
+        return run_profile(args)
+
+    workdir = tempfile.mkdtemp(prefix='cmms-sqlite-')
+    rows = []
+    for name in args.profile or list(PROFILES):
+        env = dict(os.environ, OUTBOX_WORKER_ENABLED='false', SCHEDULER_ENABLED='false',
+                   RATE_LIMIT_ENABLED='false', PYTHONPATH=ROOT, **PROFILES[name])
+        command = [sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+                   '--writers', str(args.writers), '--readers', str(args.readers),
+                   '--duration', str(args.duration), '--assets', str(args.assets),
+                   '--events', str(args.events), '--database', os.path.join(workdir, f'{name}.db')]
+        output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        rows.append((name, json.loads(output.stdout.strip().splitlines()[-1])))
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.duration}s per profile")
+    print(f"{'profile':<10} {'writes/s':>9} {'reads/s':>9} {'w p99 ms':>9} {'r p99 ms':>9} "
+          f"{'w err':>6} {'r err':>6} {'locked':>7}")
+    for name, result in rows:
+        print(f"{name:<10} {result['writes_per_s']:>9.1f} {result['reads_per_s']:>9.1f} "
+              f"{result['write_p99_ms']:>9.1f} {result['read_p99_ms']:>9.1f} "
+              f"{result['write_errors']:>6} {result['read_errors']:>6} {result['locked']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+Bulk import of equipment, maintenance logs and failure reports
+Records are parsed incrementally from CSV or NDJSON, validated in batches,
+resolved against equipment serial numbers and technician emails with one
+lookup per batch, and inserted with executemany, one transaction per batch.
+Invalid rows are reported with their record number and skipped; they never
+abort the rest of the load. A batch the database rejects is split in halves
+until the rejected rows are isolated, so the rest of it is still inserted.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select
+from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+import rollups
+from cache import report_cache
+from conditional import bump
+
+IMPORT_KINDS = ('equipment', 'maintenance', 'failures')
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+EQUIPMENT_STATUSES = ('Active', 'Under Maintenance', 'Out of Service')
+MAINTENANCE_TYPES = ('Preventive', 'Corrective')
+SEVERITIES = ('Low', 'Medium', 'High')
+
+
+class RowError(ValueError):
+    """A single record failed validation"""
+
+
+def iter_records(stream, fmt):
+    """
+    Yield (record_number, record) pairs from a binary stream
+
+    Malformed NDJSON lines are yielded as (record_number, RowError).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, row
+    elif fmt == 'ndjson':
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError('expected a JSON object')
+            except ValueError as e:
+                record = RowError(f'Invalid JSON: {e}')
+            yield number, record
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+def _text(record, field, required=False):
+    value = record.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ''):
+        if required:
+            raise RowError(f'{field} is required')
+        return None
+    return str(value)
+
+
+def _choice(record, field, choices, default=None):
+    value = _text(record, field) or default
+    if value not in choices:
+        raise RowError(f'{field} must be one of {", ".join(choices)}')
+    return value
+
+
+def _datetime(record, field, default=None):
+    value = _text(record, field)
+    if value is None:
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f'Invalid {field} format')
+
+
+def _date(record, field):
+    value = _datetime(record, field)
+    return value.date() if value else None
+
+
+def _float(record, field, default=0.0):
+    value = _text(record, field)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise RowError(f'{field} must be a number')
+
+
+def _bool(record, field):
+    value = record.get(field)
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('true', '1', 'yes')
+
+
+class BulkImporter:
+    """Runs one import: validate, resolve and insert records batch by batch"""
+
+    def __init__(self, kind, default_technician_id=None, batch_size=DEFAULT_BATCH_SIZE):
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f'Unknown import kind: {kind}')
+        self.kind = kind
+        self.default_technician_id = default_technician_id
+        self.batch_size = batch_size
+        self.processed = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+        self._technicians = {}
+
+    def _error(self, number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'error': message})
+
+    def run(self, records):
+        """Import an iterable of (record_number, record) pairs"""
+        batch = []
+        for number, record in records:
+            batch.append((number, record))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'kind': self.kind,
+            'processed': self.processed,
+            'inserted': self.inserted,
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
+
+    def _import_batch(self, batch):
+        self.processed += len(batch)
+        valid = []
+        for number, record in batch:
+            if isinstance(record, RowError):
+                self._error(number, str(record))
+                continue
+            try:
+                valid.append((number, self._validate(record)))
+            except RowError as e:
+                self._error(number, str(e))
+
+        rows = self._resolve(valid)
+        if rows:
+            self._insert(rows)
+
+    def _insert(self, rows):
+        """
+        Insert (record_number, row) pairs in one transaction
+        If the insert fails, the pairs are split in halves and retried, so
+        only the rows the database rejects are reported, by record number.
+        """
+        table = {
+            'equipment': Equipment,
+            'maintenance': MaintenanceLog,
+            'failures': FailureReport
+        }[self.kind].__table__
+
+        values = [row for _, row in rows]
+        try:
+            if self.kind == 'maintenance':
+                # The schedule rollup records which log set it, so keep the new ids
+                ids = db.session.scalars(
+                    table.insert().returning(table.c.id, sort_by_parameter_order=True), values
+                ).all()
+                for row, row_id in zip(values, ids):
+                    row['id'] = row_id
+            else:
+                db.session.execute(table.insert(), values)
+            self._update_rollups(values)
+            bump([self.kind])  # Import kinds are stamped table names
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for row in values:
+                row.pop('id', None)  # Rolled back with the insert
+            if len(rows) == 1:
+                self._error(rows[0][0], f'Insert failed: {getattr(e, "orig", None) or e}')
+            else:
+                middle = len(rows) // 2
+                self._insert(rows[:middle])
+                self._insert(rows[middle:])
+            return
+
+        self.inserted += len(rows)
+        self._invalidate(values)
+
+    # Validation: one record -> column values plus lookup keys
+    def _validate(self, record):
+        if self.kind == 'equipment':
+            return {
+                'name': _text(record, 'name', required=True),
+                'type': _text(record, 'type', required=True),
+                'manufacturer': _text(record, 'manufacturer'),
+                'model': _text(record, 'model'),
+                'serial_number': _text(record, 'serial_number'),
+                'location': _text(record, 'location'),
+                'installation_date': _date(record, 'installation_date'),
+                'status': _choice(record, 'status', EQUIPMENT_STATUSES, default='Active')
+            }
+
+        values = {
+            'equipment_serial': _text(record, 'equipment_serial'),
+            'equipment_id': _text(record, 'equipment_id')
+        }
+        if not values['equipment_serial'] and not values['equipment_id']:
+            raise RowError('equipment_serial or equipment_id is required')
+
+        if self.kind == 'maintenance':
+            values.update({
+                'technician_email': _text(record, 'technician_email'),
+                'maintenance_type': _choice(record, 'maintenance_type', MAINTENANCE_TYPES),
+                'description': _text(record, 'description', required=True),
+                'maintenance_date': _datetime(record, 'maintenance_date', default=datetime.utcnow()),
+                'downtime_hours': _float(record, 'downtime_hours'),
+                'next_maintenance_date': _date(record, 'next_maintenance_date')
+            })
+        else:
+            values.update({
+                'technician_email': _text(record, 'reporter_email'),
+                'failure_description': _text(record, 'failure_description', required=True),
+                'severity': _choice(record, 'severity', SEVERITIES),
+                'reported_date': _datetime(record, 'reported_date', default=datetime.utcnow()),
+                'resolved': _bool(record, 'resolved')
+            })
+        return values
+
+    # Resolution: one query per batch for serial numbers and emails -> (record_number, row) pairs
+    def _resolve(self, valid):
+        if self.kind == 'equipment':
+            return self._resolve_equipment(valid)
+
+        serials = {values['equipment_serial'] for _, values in valid if values['equipment_serial']}
+        ids = set()
+        for number, values in valid:
+            if values['equipment_id'] and not values['equipment_serial']:
+                try:
+                    ids.add(int(values['equipment_id']))
+                except ValueError:
+                    pass
+
+        by_serial = dict(db.session.execute(
+            select(Equipment.serial_number, Equipment.id).where(Equipment.serial_number.in_(serials))
+        ).all()) if serials else {}
+        known_ids = set(db.session.scalars(
+            select(Equipment.id).where(Equipment.id.in_(ids))
+        )) if ids else set()
+
+        emails = {values['technician_email'] for _, values in valid
+                  if values['technician_email'] and values['technician_email'] not in self._technicians}
+        if emails:
+            self._technicians.update(db.session.execute(
+                select(Technician.email, Technician.id).where(Technician.email.in_(emails))
+            ).all())
+
+        rows = []
+        for number, values in valid:
+            if values['equipment_serial']:
+                equipment_id = by_serial.get(values['equipment_serial'])
+            else:
+                try:
+                    equipment_id = int(values['equipment_id'])
+                except ValueError:
+                    equipment_id = None
+                if equipment_id not in known_ids:
+                    equipment_id = None
+            if equipment_id is None:
+                self._error(number, 'Equipment not found')
+                continue
+
+            email = values['technician_email']
+            technician_id = self._technicians.get(email) if email else self.default_technician_id
+            if technician_id is None:
+                self._error(number, f'Technician not found: {email}' if email else 'Technician is required')
+                continue
+
+            row = {key: value for key, value in values.items()
+                   if key not in ('equipment_serial', 'technician_email')}
+            row['equipment_id'] = equipment_id
+            row['technician_id' if self.kind == 'maintenance' else 'reported_by'] = technician_id
+            rows.append((number, row))
+        return rows
+
+    def _resolve_equipment(self, valid):
+        serials = [values['serial_number'] for _, values in valid if values['serial_number']]
+        existing = set(db.session.scalars(
+            select(Equipment.serial_number).where(Equipment.serial_number.in_(serials))
+        )) if serials else set()
+
+        rows = []
+        for number, values in valid:
+            serial = values['serial_number']
+            if serial and serial in existing:
+                self._error(number, f'Duplicate serial_number: {serial}')
+                continue
+            if serial:
+                existing.add(serial)
+            rows.append((number, values))
+        return rows
+
+    def _update_rollups(self, rows):
+        if self.kind == 'equipment':
+            counts = defaultdict(int)
+            for row in rows:
+                counts[row['status']] += 1
+            for status, count in counts.items():
+                rollups.record_status_change(None, status, count)
+        elif self.kind == 'maintenance':
+            rollups.record_maintenance_batch(rows)
+        else:
+            rollups.record_failure_batch(rows)
+
+    def _invalidate(self, rows):
+        if self.kind == 'equipment':
+            report_cache.invalidate('equipment')
+            return
+        tag = 'maintenance' if self.kind == 'maintenance' else 'failures'
+        equipment_tags = {f'equipment:{row["equipment_id"]}' for row in rows}
+        report_cache.invalidate(tag, *equipment_tags)
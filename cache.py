@@ -0,0 +1,259 @@
+"""
+Response cache for report endpoints
+Entries are keyed by endpoint + query params + the current version of every
+data tag the response depends on (e.g. 'maintenance', 'equipment:5'). Commits
+that touch Equipment, MaintenanceLog, FailureReport or Technician rows bump the
+matching tags, so stale entries are never served again and simply age out of
+the LRU. With REPORT_CACHE_PATH set, tag versions and entries also live in a
+SQLite file shared by all worker processes. A response read from a lagging
+replica (see replica.py) is served but not stored, since it may predate the
+invalidation its key reflects.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+
+
+class SharedStore:
+    """Tag versions and cache entries in a SQLite file shared between workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS tag_versions (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, etag TEXT, body BLOB, expires_at REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS invalidations (id INTEGER PRIMARY KEY, at REAL NOT NULL)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def versions(self, tags):
+        placeholders = ','.join('?' * len(tags))
+        rows = self._connection().execute(
+            f'SELECT tag, version FROM tag_versions WHERE tag IN ({placeholders})', list(tags)
+        ).fetchall()
+        return dict(rows)
+
+    def bump(self, tags):
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT INTO tag_versions (tag, version) VALUES (?, 1) '
+                'ON CONFLICT(tag) DO UPDATE SET version = version + 1',
+                [(tag,) for tag in tags]
+            )
+            conn.execute('INSERT OR REPLACE INTO invalidations VALUES (1, ?)', (time.time(),))
+
+    def invalidated_at(self):
+        row = self._connection().execute('SELECT at FROM invalidations WHERE id = 1').fetchone()
+        return row[0] if row else 0.0
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT etag, body, expires_at FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row and row[2] > time.time():
+            return row[0], row[1], row[2]
+        return None
+
+    def set(self, key, etag, body, expires_at):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM entries WHERE expires_at < ?', (time.time(),))
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', (key, etag, body, expires_at))
+
+
+class ResponseCache:
+    """In-process LRU of serialized responses with an optional shared store"""
+
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._invalidated_at = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries, ttl, shared_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = SharedStore(shared_path) if shared_path else None
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def versions(self, tags):
+        """Current version of each data tag (0 if never bumped)"""
+        if self.shared:
+            versions = self.shared.versions(tags)
+            return {tag: versions.get(tag, 0) for tag in tags}
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def key(self, endpoint, params, tags):
+        """Cache key for an endpoint, its params and the current tag versions"""
+        versions = self.versions(tags)
+        stamp = ','.join(f'{tag}={versions.get(tag, 0)}' for tag in sorted(tags))
+        query = '&'.join(f'{name}={value}' for name, value in sorted(params))
+        return f'{endpoint}?{query}|{stamp}'
+
+    def invalidate(self, *tags):
+        """Bump data tags so every entry depending on them is skipped"""
+        if not tags:
+            return
+        if self.shared:
+            self.shared.bump(tags)
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+            self._invalidated_at = time.time()
+
+    def stale_read(self, read_at):
+        """Whether data as of read_at (epoch seconds) may predate the last invalidation"""
+        invalidated_at = self._invalidated_at
+        if self.shared:
+            invalidated_at = max(invalidated_at, self.shared.invalidated_at())
+        return read_at < invalidated_at
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry:
+                del self._entries[key]
+                self.evictions += 1
+
+        entry = self.shared.get(key) if self.shared else None
+        with self._lock:
+            if entry:
+                self.hits += 1
+                self._store(key, entry)
+            else:
+                self.misses += 1
+        return entry
+
+    def set(self, key, etag, body):
+        entry = (etag, body, time.time() + self.ttl)
+        with self._lock:
+            self._store(key, entry)
+        if self.shared:
+            self.shared.set(key, *entry)
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'shared': self.shared is not None
+            }
+
+
+report_cache = ResponseCache()
+
+
+def init_cache(app):
+    """Configure the report cache from app config"""
+    report_cache.configure(
+        max_entries=app.config['REPORT_CACHE_SIZE'],
+        ttl=app.config['REPORT_CACHE_TTL'],
+        shared_path=app.config.get('REPORT_CACHE_PATH')
+    )
+
+
+def cached_report(tags):
+    """
+    Cache a JSON report view and answer If-None-Match with 304
+
+    Args:
+        tags: callable taking the view kwargs and returning the data tags
+              the response depends on
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = report_cache.key(request.path, request.args.items(multi=True), tags(**kwargs))
+            entry = report_cache.get(key)
+
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                entry = (hashlib.sha1(body).hexdigest(), body, None)
+                read_at = db.session.info.get('replica_beat')
+                if read_at is None or not report_cache.stale_read(read_at):
+                    report_cache.set(key, entry[0], body)
+
+            etag, body = entry[0], entry[1]
+            if request.if_none_match.contains_weak(etag):  # Weakened if compressed
+                response = make_response('', 304)
+            else:
+                response = make_response(body, 200)
+                response.mimetype = 'application/json'
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _tags_for(instance):
+    """Data tags affected by a change to a model instance"""
+    if isinstance(instance, Equipment):
+        return ('equipment', f'equipment:{instance.id}')
+    if isinstance(instance, MaintenanceLog):
+        return ('maintenance', f'equipment:{instance.equipment_id}')
+    if isinstance(instance, FailureReport):
+        return ('failures', f'equipment:{instance.equipment_id}')
+    if isinstance(instance, Technician):
+        return ('users', f'user:{instance.id}')
+    return ()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        tags.update(_tags_for(instance))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        report_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop('cache_tags', None)
@@ -0,0 +1,147 @@
+"""
+Response compression
+Text responses (JSON, HTML, CSS, JS, CSV) of at least COMPRESSION_MIN_SIZE
+bytes are compressed with the best coding the client accepts: brotli when
+the brotli package is installed, otherwise gzip. Streamed responses
+(unpaged lists, exports) are compressed chunk by chunk as they are sent, so
+they stay streamed; the live update stream is left alone, since each event
+must reach the browser as soon as it is written. Static files are
+compressed once per version and kept in memory.
+
+A compressed body is a different representation, so a strong ETag on it is
+made weak; If-None-Match is compared weakly (see cache.py and
+conditional.py), so revalidation still returns 304.
+"""
+import gzip
+import os
+import threading
+import zlib
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/x-ndjson',
+    'text/html', 'text/css', 'text/javascript', 'text/csv', 'text/plain', 'image/svg+xml'
+)
+MAX_STATIC_ENTRIES = 64
+
+
+class StaticCache:
+    """Compressed static files keyed by path, modification time and coding"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, coding, compress):
+        key = (path, os.path.getmtime(path), coding)
+        with self._lock:
+            body = self._entries.get(key)
+        if body is None:
+            with open(path, 'rb') as f:
+                body = compress(f.read())
+            with self._lock:
+                if len(self._entries) >= MAX_STATIC_ENTRIES:
+                    self._entries.clear()
+                self._entries[key] = body
+        return body
+
+
+static_cache = StaticCache()
+
+
+def negotiate(accept_encodings):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    gzip_quality = accept_encodings.quality('gzip')
+    if brotli is not None and accept_encodings.quality('br') >= max(gzip_quality, 0.001):
+        return 'br'
+    return 'gzip' if gzip_quality > 0 else None
+
+
+def compressor(coding, config):
+    """Compress function for whole bodies"""
+    if coding == 'br':
+        return lambda data: brotli.compress(data, quality=config['BROTLI_QUALITY'])
+    return lambda data: gzip.compress(data, compresslevel=config['COMPRESSION_LEVEL'], mtime=0)
+
+
+def compress_stream(chunks, coding, config):
+    """Compress an iterable of chunks, yielding output as it is produced"""
+    if coding == 'br':
+        stream = brotli.Compressor(quality=config['BROTLI_QUALITY'])
+        compress, finish = stream.process, stream.finish
+    else:
+        stream = zlib.compressobj(config['COMPRESSION_LEVEL'], zlib.DEFLATED, 31)  # 31: gzip container
+        compress, finish = stream.compress, stream.flush
+    try:
+        for chunk in chunks:
+            data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def encode_body(body, content_type, accept_encoding, config):
+    """(coding, compressed body) for a whole body outside Flask (asgi.py), or None to send it as is"""
+    if not config['COMPRESSION_ENABLED'] or len(body) < config['COMPRESSION_MIN_SIZE']:
+        return None
+    if content_type.split(';')[0].strip() not in COMPRESSIBLE_TYPES:
+        return None
+    coding = negotiate(parse_accept_header(accept_encoding))
+    return (coding, compressor(coding, config)(body)) if coding else None
+
+
+def compressible(response):
+    return (
+        response.status_code == 200
+        and response.mimetype in COMPRESSIBLE_TYPES
+        and 'Content-Encoding' not in response.headers
+    )
+
+
+def init_compression(app):
+    """Compress responses after every request if COMPRESSION_ENABLED"""
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+
+    @app.after_request
+    def compress_response(response):
+        if not compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        coding = negotiate(request.accept_encodings)
+        if coding is None:
+            return response
+
+        if response.direct_passthrough:
+            if request.endpoint != 'static' or (response.content_length or 0) < min_size:
+                return response
+            path = os.path.join(app.static_folder, request.view_args['filename'])
+            body = static_cache.get(path, coding, compressor(coding, app.config))
+            response.close()  # The file send_file opened
+            response.direct_passthrough = False
+            response.set_data(body)
+        elif response.is_streamed:
+            response.response = compress_stream(response.response, coding, app.config)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            response.set_data(compressor(coding, app.config)(body))
+
+        response.headers['Content-Encoding'] = coding
+        response.headers.pop('Accept-Ranges', None)  # Ranges would refer to the compressed bytes
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
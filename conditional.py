@@ -0,0 +1,175 @@
+"""
+Conditional GET for list endpoints
+Every transaction that writes equipment, maintenance logs, failure reports
+or technicians also bumps that table's row in table_versions, so the stamp
+commits (or rolls back) with the data and is the same for every worker and
+on a replica. A list's ETag is a hash of its URL and the stamps of the
+tables it reads, and Last-Modified is the newest of their change times. A
+repeat fetch with If-None-Match (or If-Modified-Since) then costs one
+primary-key lookup and a 304 instead of the query and serialization.
+
+Core statements skip the ORM flush hooks, so bulk paths (imports, rollup
+rebuilds, the last_login writer) call bump() before they commit.
+
+A stamp row is a single row per table that every writer of the table
+updates, and its row lock is held until the writer commits. Stamps are
+therefore written once per transaction, in before_commit, after the final
+flush: concurrent writers (several workers on PostgreSQL) queue on the row
+only for the commit itself, not for the whole request. Deriving ETags from
+the data instead (max(updated_at), counts) would avoid the row altogether,
+but the tables have no updated_at column and a delete lowers neither.
+
+last_login has its own 'logins' stamp, read only by the users list: a login
+is not a change to the user, so it must not expire the users stamp that the
+user cache (see user_cache.py) and the name-showing lists depend on.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event, select, update, inspect
+from sqlalchemy.orm import Session, scoped_session
+from models import db, Technician, Equipment, MaintenanceLog, FailureReport, TableVersion
+
+STAMPED_TABLES = {
+    Equipment: 'equipment',
+    MaintenanceLog: 'maintenance',
+    FailureReport: 'failures',
+    Technician: 'users'
+}
+LOGINS = 'logins'
+STAMPS = [*STAMPED_TABLES.values(), LOGINS]
+LOGIN_COLUMNS = {'last_login'}
+
+_commit_listeners = []
+
+
+def bump(names, executor=None):
+    """
+    Stamp tables as changed in the executor's current transaction
+    On a session the stamps are written once, just before it commits.
+    """
+    executor = executor or db.session
+    if isinstance(executor, (Session, scoped_session)):
+        executor.info.setdefault('stamped', set()).update(names)
+    else:
+        _write_stamps(names, executor)
+
+
+def _write_stamps(names, executor):
+    executor.execute(
+        update(TableVersion.__table__)
+        .where(TableVersion.__table__.c.name.in_(sorted(names)))
+        .values(version=TableVersion.__table__.c.version + 1, changed_at=time.time())
+    )
+
+
+def on_stamp_commit(func):
+    """Register func(names), called in this process after a transaction that stamped tables commits"""
+    _commit_listeners.append(func)
+    return func
+
+
+def create_stamps(executor):
+    """Insert the stamp rows that do not exist yet"""
+    existing = set(executor.execute(select(TableVersion.name)).scalars())
+    missing = [name for name in STAMPS if name not in existing]
+    if missing:
+        now = time.time()
+        executor.execute(TableVersion.__table__.insert(), [
+            {'name': name, 'version': 0, 'changed_at': now} for name in missing
+        ])
+
+
+def stamps(names):
+    """{name: (version, changed_at)} as the current session sees them"""
+    rows = db.session.execute(
+        select(TableVersion.name, TableVersion.version, TableVersion.changed_at)
+        .where(TableVersion.name.in_(names))
+    )
+    return {name: (version, changed_at) for name, version, changed_at in rows}
+
+
+def conditional_list(*names, daily=False):
+    """
+    Answer If-None-Match / If-Modified-Since on a list view with 304
+
+    Args:
+        names: the stamped tables the response is read from
+        daily: the response also depends on today's date (e.g. days until due)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = stamps(names)
+            if len(current) < len(names):
+                return view(*args, **kwargs)  # Stamps not created yet (see migrations.py)
+
+            validator = request.full_path + '|' + ';'.join(
+                f'{name}={current[name][0]}@{current[name][1]!r}' for name in sorted(names)
+            )
+            changed_at = max(changed_at for _, changed_at in current.values())
+            if daily:
+                # Dates in views (filters, days until due) are UTC
+                midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+                validator += '|' + midnight.date().isoformat()
+                changed_at = max(changed_at, midnight.timestamp())
+            etag = hashlib.sha1(validator.encode()).hexdigest()
+            last_modified = datetime.fromtimestamp(int(changed_at), timezone.utc)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _changed_columns(instance):
+    return {attr.key for attr in inspect(instance).attrs if attr.history.has_changes()}
+
+
+@event.listens_for(Session, 'after_flush')
+def _stamp_flushed(session, flush_context):
+    names = set()
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        name = STAMPED_TABLES.get(type(instance))
+        if name == 'users' and instance in session.dirty and _changed_columns(instance) <= LOGIN_COLUMNS:
+            name = LOGINS
+        if name:
+            names.add(name)
+    if names:
+        session.info.setdefault('stamped', set()).update(names)
+
+
+@event.listens_for(Session, 'before_commit')
+def _stamp_committing(session):
+    session.flush()  # The last changes register their tables first
+    names = session.info.get('stamped')
+    if names:
+        _write_stamps(names, session.connection())
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_committed(session):
+    names = session.info.pop('stamped', None)
+    if names:
+        for listener in _commit_listeners:
+            listener(names)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('stamped', None)
@@ -7,9 +7,62 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///maintenance.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool (file databases and server databases)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 0)  # Seconds; 0 keeps connections indefinitely
+    
+    # SQLite tuning profile, applied to every connection (ignored for other databases)
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'true').lower() in ['true', 'on', '1']
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL',  # Readers never block the writer
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL',  # Durable at checkpoints, safe with WAL
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000),  # Wait for the write lock
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024),  # Bytes
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE') or -16000)  # Negative: KiB per connection
+    }
+    
+    # Read-only pool for read-only views (SQLite files with the tuning profile)
+    READ_POOL_ENABLED = os.environ.get('READ_POOL_ENABLED', 'true').lower() in ['true', 'on', '1']
+    READ_POOL_SIZE = int(os.environ.get('READ_POOL_SIZE') or 10)
+    
+    # Replica for report queries (see replica.py); unset, reports read the primary
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS') or 30)  # Staleness bound, then reports use the primary
+    REPLICA_HEARTBEAT_SECONDS = float(os.environ.get('REPLICA_HEARTBEAT_SECONDS') or 1)  # How often the primary stamps the heartbeat
+    REPLICA_CHECK_SECONDS = float(os.environ.get('REPLICA_CHECK_SECONDS') or 1)  # How often each process reads the replica's stamp
+    REPLICA_HEARTBEAT_ENABLED = os.environ.get('REPLICA_HEARTBEAT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    
+    # Authenticated user cache and batched last_login writes (see user_cache.py)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 1024)  # Users per process
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 300)  # Seconds; catches changes made outside the app
+    USER_STAMP_CHECK_SECONDS = float(os.environ.get('USER_STAMP_CHECK_SECONDS') or 1)  # How stale another worker's user changes may be
+    LAST_LOGIN_FLUSH_SECONDS = float(os.environ.get('LAST_LOGIN_FLUSH_SECONDS') or 5)
+    
     # Security
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     
+    # Password hashing (see passwords.py); existing hashes are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'  # Or e.g. 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)  # Hashing processes; 0 hashes in the request thread
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 32)  # Hashes running or queued per process
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)  # Seconds to wait for a slot, then 503
+    
+    # Rate limiting and admission control (see ratelimit.py)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATE_LIMIT_STORAGE_PATH = os.environ.get('RATE_LIMIT_STORAGE_PATH')  # Optional SQLite file shared by all workers
+    RATE_LIMITS = {  # 'count/second|minute|hour|day' per key kind
+        'login': {
+            'ip': os.environ.get('LOGIN_RATE_LIMIT_IP') or '30/minute',
+            'account': os.environ.get('LOGIN_RATE_LIMIT_ACCOUNT') or '10/minute'
+        },
+        'signup': {'ip': os.environ.get('SIGNUP_RATE_LIMIT_IP') or '10/hour'},
+        'write': {'user': os.environ.get('WRITE_RATE_LIMIT_USER') or '600/minute'}
+    }
+    MAX_CONCURRENT_REQUESTS = int(os.environ.get('MAX_CONCURRENT_REQUESTS') or 64)  # API requests in progress per process; 0: no cap
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR') or 0)  # Proxies in front that append X-Forwarded-For; 0: use the socket address
+    
     # Session
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
@@ -23,5 +76,53 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')  # Your email password or app password
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'noreply@cmms.local'
     
+    # Report response cache
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL') or 60)  # Seconds
+    REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE') or 256)  # Entries per process
+    REPORT_CACHE_PATH = os.environ.get('REPORT_CACHE_PATH')  # Optional SQLite file shared by all workers
+    
+    # Live updates (Server-Sent Events)
+    EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE') or 1000)  # Recent events kept for reconnecting clients
+    EVENTS_KEEPALIVE_SECONDS = int(os.environ.get('EVENTS_KEEPALIVE_SECONDS') or 15)  # Comment line on idle streams
+    EVENTS_STREAM_SECONDS = int(os.environ.get('EVENTS_STREAM_SECONDS') or 300)  # Then the browser reconnects
+    EVENTS_RELAY_ENABLED = os.environ.get('EVENTS_RELAY_ENABLED', 'true').lower() in ['true', 'on', '1']
+    EVENTS_POLL_SECONDS = float(os.environ.get('EVENTS_POLL_SECONDS') or 1)  # How soon another worker's events reach this one's streams
+    EVENTS_GAP_SECONDS = float(os.environ.get('EVENTS_GAP_SECONDS') or 5)  # Wait for a missing event id, then skip it
+    EVENTS_RETAIN_SECONDS = int(os.environ.get('EVENTS_RETAIN_SECONDS') or 3600)  # Then relayed events are deleted
+    
+    # ASGI mode (asgi.py)
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS') or 32)  # Threads running the Flask (WSGI) routes
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')  # Default: DATABASE_URL through its async driver
+    
+    # Request instrumentation (see instrumentation.py)
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() in ['true', 'on', '1']
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 100)  # Statements at least this slow are logged
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token for Prometheus scrapers; admins need none
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ['true', 'on', '1']  # Allows ?profile=1 for admins
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS') or 1)  # Stack sampling interval
+    
+    # Response compression (see compression.py) and static asset caching (see assets.py)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 1024)  # Bytes; smaller bodies are sent as is
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or 6)  # gzip, 1-9
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY') or 5)  # 0-11, used when the brotli package is installed
+    STATIC_ASSET_MAX_AGE = int(os.environ.get('STATIC_ASSET_MAX_AGE') or 31536000)  # Seconds, for content-hashed URLs
+    
     # Email feature toggle
     MAIL_ENABLED = os.environ.get('MAIL_ENABLED', 'false').lower() in ['true', 'on', '1']
+    
+    # Email outbox worker (sends queued alerts in the background)
+    OUTBOX_WORKER_ENABLED = os.environ.get('OUTBOX_WORKER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    OUTBOX_POLL_INTERVAL = int(os.environ.get('OUTBOX_POLL_INTERVAL') or 5)  # Seconds between polls when idle
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE') or 50)  # Messages per SMTP connection
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS') or 5)  # Then the message is marked dead
+    OUTBOX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_SECONDS') or 30)  # Doubles after each failure
+    
+    # Job scheduler (maintenance reminders and daily summary, times in UTC)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', os.environ.get('MAIL_ENABLED', 'false')).lower() in ['true', 'on', '1']
+    SCHEDULER_JOBS = {
+        'maintenance_reminders': os.environ.get('REMINDER_SCHEDULE') or 'daily 06:00',  # 'every 30m', 'every 2h' or 'daily HH:MM'
+        'daily_summary': os.environ.get('SUMMARY_SCHEDULE') or 'daily 07:00'
+    }
+    SCHEDULER_TICK_SECONDS = int(os.environ.get('SCHEDULER_TICK_SECONDS') or 30)
+    SCHEDULER_MAX_CATCHUP_DAYS = int(os.environ.get('SCHEDULER_MAX_CATCHUP_DAYS') or 30)  # Longest outage replayed by reminders
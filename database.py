@@ -0,0 +1,141 @@
+"""
+Database engines and session routing
+init_database() builds the engine configuration from app config before
+binding db to the app:
+  - a connection pool sized by DB_POOL_* for every backend
+  - for SQLite files, a tuning profile applied to each new connection
+    (WAL journaling, synchronous=NORMAL, busy_timeout, mmap_size, cache_size),
+    so writers and readers no longer serialize on the database lock and
+    short lock waits queue instead of failing with "database is locked"
+  - with READ_POOL_ENABLED, a 'read' bind opening the same file read-only
+    (mode=ro, query_only) in its own pool
+  - with REPLICA_DATABASE_URL, a 'replica' bind for report queries; whether a
+    request may use it is decided in replica.py
+
+Views decorated with @read_only run their queries on the 'read' bind when it
+exists; WAL lets them read the last committed state while writers commit on
+the primary pool. Writes attempted on a read-only session fail loudly.
+Requests that replica.replica_read cleared for the replica go there first.
+"""
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+READ_BIND = 'read'
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """Session that sends replica reads to the replica and read-only views to the read pool"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            for flag, key in (('replica', REPLICA_BIND), ('read_only', READ_BIND)):
+                engine = self._db.engines.get(key) if self.info.get(flag) else None
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def _is_sqlite_file(url):
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def sqlite_profile_enabled(config, url):
+    """Whether connections to url get the SQLite tuning profile"""
+    return config['SQLITE_TUNING'] and _is_sqlite_file(url)
+
+
+def engine_options(config, url):
+    """Pool options for the configured database"""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if url.get_backend_name() != 'sqlite' or _is_sqlite_file(url):
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        if config['DB_POOL_RECYCLE']:
+            options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    return options
+
+
+def read_only_url(url):
+    """The same SQLite file opened read-only through a URI filename"""
+    database = url.database
+    if not url.query.get('uri'):
+        database = f'file:{database}'
+    return url.set(database=database, query={**url.query, 'mode': 'ro', 'uri': 'true'})
+
+
+def sqlite_pragmas(config, read_only=False):
+    """PRAGMA statements of the SQLite tuning profile"""
+    settings = dict(config['SQLITE_PRAGMAS'])
+    if read_only:
+        # The journal mode is a property of the file, set by the primary
+        settings.pop('journal_mode', None)
+        settings['query_only'] = 1
+    return [f'PRAGMA {name}={value}' for name, value in settings.items() if value is not None]
+
+
+def apply_sqlite_profile(engine, config, read_only=False):
+    """Run the tuning PRAGMAs on every new connection of a SQLite engine"""
+    statements = sqlite_pragmas(config, read_only)
+
+    @event.listens_for(engine, 'connect')
+    def _configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def init_database(app):
+    """Configure pools, the SQLite profile, the read pool and the replica, then bind db to the app"""
+    config = app.config
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    tuned = sqlite_profile_enabled(config, url)
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config, url)
+    if tuned and config['READ_POOL_ENABLED']:
+        binds.setdefault(READ_BIND, {
+            'url': read_only_url(url).render_as_string(hide_password=False),
+            **engine_options(config, url),
+            'pool_size': config['READ_POOL_SIZE']
+        })
+
+    replica_url = config.get('REPLICA_DATABASE_URL')
+    if replica_url:
+        replica_url = make_url(replica_url)
+        if sqlite_profile_enabled(config, replica_url):
+            replica_url = read_only_url(replica_url)
+        binds.setdefault(REPLICA_BIND, {
+            'url': replica_url.render_as_string(hide_password=False),
+            **engine_options(config, replica_url)
+        })
+    config['SQLALCHEMY_BINDS'] = binds
+
+    db.init_app(app)
+
+    with app.app_context():
+        if tuned:
+            apply_sqlite_profile(db.engines[None], config)
+        for key in (READ_BIND, REPLICA_BIND):
+            engine = db.engines.get(key)
+            if engine is not None and sqlite_profile_enabled(config, engine.url):
+                apply_sqlite_profile(engine, config, read_only=True)
+
+
+def read_only(view):
+    """Run a view's queries on the read pool, when one is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        db.session.info['read_only'] = True
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,172 @@
+"""
+Time-bucketed downtime report
+Bucketing runs in the database with a dialect-specific expression for the
+bucket start date, over a maintenance_date range that is served by the
+(maintenance_date, equipment_id, downtime_hours) covering index, so the cost
+depends on the rows in the window rather than on the whole history. Buckets
+without maintenance are filled with zeros here.
+"""
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, func, cast, literal_column, Date
+from models import db, Equipment, MaintenanceLog
+
+BUCKETS = ('day', 'week', 'month')
+GROUP_BY = ('equipment', 'type', 'location')
+DEFAULT_SERIES_LIMIT = 20
+MAX_SERIES_LIMIT = 100
+MAX_BUCKETS = 1000
+UNSPECIFIED = 'Unspecified'  # Group of equipment with no type or location
+
+
+def bucket_start(column, bucket, dialect):
+    """
+    SQL expression for the first day of the bucket containing column
+    Weeks start on Monday (ISO 8601) on every backend.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of {", ".join(BUCKETS)}')
+
+    if dialect == 'sqlite':
+        if bucket == 'day':
+            return func.date(column)
+        if bucket == 'week':
+            # Forward to Sunday (or stay on it), then back to that week's Monday
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m-01', column)
+
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(bucket, column), Date)
+
+    if dialect in ('mysql', 'mariadb'):
+        if bucket == 'day':
+            return func.date(column)
+        if bucket == 'week':
+            return func.date_sub(func.date(column), literal_column(f'INTERVAL WEEKDAY({column}) DAY'))
+        return cast(func.date_format(column, '%Y-%m-01'), Date)
+
+    raise ValueError(f'Downtime buckets are not supported on {dialect}')
+
+
+def bucket_floor(value, bucket):
+    """Python counterpart of bucket_start for a date"""
+    if bucket == 'week':
+        return value - timedelta(days=value.weekday())
+    if bucket == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def bucket_range(start, end, bucket):
+    """Every bucket start date from the bucket containing start through end"""
+    current = bucket_floor(start, bucket)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        if bucket == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=7 if bucket == 'week' else 1)
+    return buckets
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def downtime_report(start=None, end=None, bucket='month', group_by=None, limit=DEFAULT_SERIES_LIMIT,
+                    executor=None):
+    """
+    Maintenance downtime per bucket, optionally split by equipment, type or location
+
+    Args:
+        start: First day of the range (default: 365 days before end)
+        end: Last day of the range, inclusive (default: today in UTC)
+        bucket: 'day', 'week' or 'month'
+        group_by: None, 'equipment', 'type' or 'location'
+        limit: Grouped reports return the series with the most downtime, up to limit
+        executor: Session to query with (default: db.session)
+
+    Returns:
+        dict with the range, bucket starts and one series per group
+    """
+    if group_by and group_by not in GROUP_BY:
+        raise ValueError(f'group_by must be one of {", ".join(GROUP_BY)}')
+
+    end = end or datetime.utcnow().date()  # Stored times are UTC
+    start = start or end - timedelta(days=365)
+    if start > end:
+        raise ValueError('from must not be after to')
+
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of {", ".join(BUCKETS)}')
+
+    executor = executor or db.session
+    dialect = executor.get_bind().dialect.name
+    bucket_column = bucket_start(MaintenanceLog.maintenance_date, bucket, dialect).label('bucket')
+    group_column = {
+        None: None,
+        'equipment': MaintenanceLog.equipment_id,
+        # NULL and '' are one group, so merge them in the GROUP BY
+        'type': func.coalesce(func.nullif(Equipment.type, ''), UNSPECIFIED),
+        'location': func.coalesce(func.nullif(Equipment.location, ''), UNSPECIFIED)
+    }[group_by]
+
+    columns = [bucket_column] + ([group_column.label('group_key')] if group_by else [])
+    query = select(
+        *columns,
+        func.coalesce(func.sum(MaintenanceLog.downtime_hours), 0.0).label('downtime'),
+        func.count().label('maintenance_count')
+    ).where(
+        MaintenanceLog.maintenance_date >= datetime.combine(start, time.min),
+        MaintenanceLog.maintenance_date < datetime.combine(end + timedelta(days=1), time.min)
+    ).group_by(*columns)
+    if group_by in ('type', 'location'):
+        query = query.join(Equipment, MaintenanceLog.equipment_id == Equipment.id)
+
+    buckets = bucket_range(start, end, bucket)
+    if len(buckets) > MAX_BUCKETS:
+        raise ValueError(f'Range too long for {bucket} buckets (max {MAX_BUCKETS})')
+    position = {value: index for index, value in enumerate(buckets)}
+    series = {}
+    for row in executor.execute(query):
+        key = row.group_key if group_by else None
+        if key not in series:
+            series[key] = {'downtime': [0.0] * len(buckets), 'maintenance_count': [0] * len(buckets)}
+        index = position[_as_date(row.bucket)]
+        series[key]['downtime'][index] = round(float(row.downtime), 2)
+        series[key]['maintenance_count'][index] = row.maintenance_count
+
+    if not group_by and None not in series:
+        series[None] = {'downtime': [0.0] * len(buckets), 'maintenance_count': [0] * len(buckets)}
+
+    ranked = sorted(series.items(), key=lambda item: sum(item[1]['downtime']), reverse=True)
+    if group_by:
+        ranked = ranked[:limit]
+
+    names = {}
+    if group_by == 'equipment' and ranked:
+        names = dict(executor.execute(
+            select(Equipment.id, Equipment.name).where(Equipment.id.in_([key for key, _ in ranked]))
+        ).all())
+
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'bucket': bucket,
+        'group_by': group_by,
+        'buckets': [value.isoformat() for value in buckets],
+        'series': [
+            {
+                'key': key,
+                'name': names.get(key, key) if group_by else 'All equipment',
+                'total_downtime': round(sum(values['downtime']), 2),
+                'downtime': values['downtime'],
+                'maintenance_count': values['maintenance_count']
+            }
+            for key, values in ranked
+        ]
+    }
@@ -2,7 +2,7 @@
 Email Service for CMMS System
 Handles email notifications for critical failures and maintenance reminders
 """
-from flask_mail import Mail, Message
+from flask_mail import Mail
 from flask import current_app
 from datetime import datetime, timedelta
 
@@ -12,9 +12,28 @@ def init_mail(app):
     """Initialize Flask-Mail with app"""
     mail.init_app(app)
 
+def enqueue_email(subject, recipients, body):
+    """
+    Queue an email in the outbox as part of the current transaction
+    The message is only sent (by the outbox worker) if the transaction commits.
+    
+    Args:
+        subject: Message subject
+        recipients: List of email addresses
+        body: Plain text body
+    """
+    from models import db, OutboxMessage
+    message = OutboxMessage(
+        subject=subject,
+        recipients=','.join(recipients),
+        body=body
+    )
+    db.session.add(message)
+    return message
+
 def send_critical_failure_alert(failure_report, equipment):
     """
-    Send email alert for critical (high severity) failures
+    Queue email alert for critical (high severity) failures
     
     Args:
         failure_report: FailureReport object
@@ -30,6 +49,9 @@ def send_critical_failure_alert(failure_report, equipment):
             print("No admin emails found for critical failure alert")
             return
         
+        reporter = Technician.query.get(failure_report.reported_by)
+        reported_date = failure_report.reported_date or datetime.utcnow()
+        
         subject = f"🚨 CRITICAL FAILURE: {equipment.name}"
         
         body = f"""
@@ -43,8 +65,8 @@ Serial Number: {equipment.serial_number}
 Failure Details:
 - Severity: HIGH
 - Description: {failure_report.failure_description}
-- Reported By: {failure_report.reporter.full_name}
-- Reported Date: {failure_report.reported_date.strftime('%Y-%m-%d %H:%M')}
+- Reported By: {reporter.full_name if reporter else 'Unknown'}
+- Reported Date: {reported_date.strftime('%Y-%m-%d %H:%M')}
 
 Current Status: {equipment.status}
 
@@ -57,86 +79,107 @@ Equipment Maintenance Log System
 Industrial CMMS
 """
         
-        msg = Message(
-            subject=subject,
-            recipients=admin_emails,
-            body=body
-        )
-        
-        mail.send(msg)
-        print(f"Critical failure alert sent to {len(admin_emails)} admins")
+        enqueue_email(subject, admin_emails, body)
+        print(f"Critical failure alert queued for {len(admin_emails)} admins")
         
     except Exception as e:
-        print(f"Error sending critical failure alert: {str(e)}")
+        print(f"Error queueing critical failure alert: {str(e)}")
+
+
+def _due_maintenance_items(start_date, end_date):
+    """
+    Due maintenance in [start_date, end_date] with equipment and technician
+    details, fetched in one joined query over each equipment's current
+    schedule (so dates superseded by a later log are not reported)
+    """
+    from models import db, MaintenanceLog, Equipment, Technician, EquipmentSchedule
+    
+    return db.session.query(
+        Equipment.name.label('equipment_name'),
+        Equipment.type.label('equipment_type'),
+        Equipment.location,
+        MaintenanceLog.maintenance_type,
+        MaintenanceLog.maintenance_date,
+        EquipmentSchedule.next_maintenance_date,
+        MaintenanceLog.description,
+        Technician.full_name.label('technician_name')
+    ).select_from(
+        EquipmentSchedule
+    ).join(
+        MaintenanceLog, EquipmentSchedule.maintenance_log_id == MaintenanceLog.id
+    ).join(
+        Equipment, EquipmentSchedule.equipment_id == Equipment.id
+    ).join(
+        Technician, MaintenanceLog.technician_id == Technician.id
+    ).filter(
+        EquipmentSchedule.next_maintenance_date.between(start_date, end_date)
+    ).order_by(
+        EquipmentSchedule.next_maintenance_date, Equipment.name
+    ).all()
 
 
-def send_maintenance_reminder(maintenance_log, equipment):
+def send_maintenance_digest(due_items, today):
     """
-    Send email reminder for upcoming maintenance
+    Queue one reminder digest covering every due item for all active technicians
     
     Args:
-        maintenance_log: MaintenanceLog object
-        equipment: Equipment object
+        due_items: Rows from _due_maintenance_items
+        today: Reference date for "days until due"
     """
     try:
-        # Get all active technicians
         from models import Technician
-        technicians = Technician.query.filter_by(is_active=True).all()
-        tech_emails = [tech.email for tech in technicians]
+        technicians = Technician.query.filter_by(is_active=True).with_entities(Technician.email).all()
+        tech_emails = [email for (email,) in technicians]
         
         if not tech_emails:
             print("No technician emails found for maintenance reminder")
             return
         
-        days_until = (maintenance_log.next_maintenance_date - datetime.utcnow().date()).days
+        if not due_items:
+            return
+        
+        subject = f"📅 Maintenance Reminder: {len(due_items)} item(s) due soon"
         
-        subject = f"📅 Maintenance Reminder: {equipment.name} - Due in {days_until} days"
+        sections = []
+        for item in due_items:
+            days_until = (item.next_maintenance_date - today).days
+            sections.append(f"""
+• {item.equipment_name} ({item.equipment_type})
+  Location: {item.location}
+  Type: {item.maintenance_type}
+  Scheduled Date: {item.next_maintenance_date.strftime('%Y-%m-%d')} ({days_until} days)
+  Last Maintenance: {item.maintenance_date.strftime('%Y-%m-%d')} by {item.technician_name}
+  Last Work: {item.description}
+""")
         
         body = f"""
 SCHEDULED MAINTENANCE REMINDER
-
-Equipment: {equipment.name}
-Type: {equipment.type}
-Location: {equipment.location}
-
-Maintenance Details:
-- Type: {maintenance_log.maintenance_type}
-- Scheduled Date: {maintenance_log.next_maintenance_date.strftime('%Y-%m-%d')}
-- Days Until Due: {days_until}
-- Last Maintenance: {maintenance_log.maintenance_date.strftime('%Y-%m-%d')}
-- Performed By: {maintenance_log.technician.full_name}
-
-Description of Last Maintenance:
-{maintenance_log.description}
-
-Please schedule and complete this maintenance activity before the due date.
+{"=" * 50}
+{''.join(sections)}
+Please schedule and complete these maintenance activities before their due dates.
 
 ---
 Equipment Maintenance Log System
 Industrial CMMS
 """
         
-        msg = Message(
-            subject=subject,
-            recipients=tech_emails,
-            body=body
-        )
-        
-        mail.send(msg)
-        print(f"Maintenance reminder sent to {len(tech_emails)} technicians")
+        enqueue_email(subject, tech_emails, body)
+        print(f"Maintenance digest ({len(due_items)} items) queued for {len(tech_emails)} technicians")
         
     except Exception as e:
-        print(f"Error sending maintenance reminder: {str(e)}")
+        print(f"Error queueing maintenance digest: {str(e)}")
 
 
-def send_daily_summary():
+def send_daily_summary(today=None):
     """
-    Send daily summary email to admins
+    Queue daily summary email to admins
     Includes active failures and upcoming maintenance
+    
+    Args:
+        today: The UTC date the summary is for (default: today in UTC)
     """
     try:
-        from models import Technician, FailureReport, MaintenanceLog, Equipment
-        from datetime import date
+        from models import db, Technician, FailureReport, Equipment
         
         # Get admin emails
         admins = Technician.query.filter_by(role='admin', is_active=True).all()
@@ -146,46 +189,44 @@ def send_daily_summary():
             print("No admin emails found for daily summary")
             return
         
-        # Get active failures
-        active_failures = FailureReport.query.filter_by(resolved=False).all()
+        # Get active failures with their equipment in one query
+        active_failures = db.session.query(
+            Equipment.name.label('equipment_name'),
+            Equipment.type.label('equipment_type'),
+            FailureReport.severity,
+            FailureReport.failure_description,
+            FailureReport.reported_date
+        ).join(
+            Equipment, FailureReport.equipment_id == Equipment.id
+        ).filter(
+            FailureReport.resolved == False
+        ).order_by(FailureReport.reported_date.desc()).all()
         
         # Get upcoming maintenance (next 7 days)
-        today = date.today()
-        upcoming_date = today + timedelta(days=7)
-        upcoming_maintenance = MaintenanceLog.query.filter(
-            MaintenanceLog.next_maintenance_date.between(today, upcoming_date)
-        ).all()
+        today = today or datetime.utcnow().date()
+        upcoming_maintenance = _due_maintenance_items(today, today + timedelta(days=7))
         
         subject = f"📊 Daily CMMS Summary - {today.strftime('%Y-%m-%d')}"
         
         # Build failure summary
-        failure_summary = ""
         if active_failures:
-            failure_summary = "\nACTIVE FAILURES:\n" + "-" * 50 + "\n"
-            for failure in active_failures:
-                equipment = Equipment.query.get(failure.equipment_id)
-                failure_summary += f"""
-• {equipment.name} ({equipment.type})
+            failure_summary = "\nACTIVE FAILURES:\n" + "-" * 50 + "\n" + ''.join(f"""
+• {failure.equipment_name} ({failure.equipment_type})
   Severity: {failure.severity}
   Description: {failure.failure_description}
   Reported: {failure.reported_date.strftime('%Y-%m-%d')}
-"""
+""" for failure in active_failures)
         else:
             failure_summary = "\n✅ No active failures\n"
         
         # Build maintenance summary
-        maintenance_summary = ""
         if upcoming_maintenance:
-            maintenance_summary = "\nUPCOMING MAINTENANCE (Next 7 Days):\n" + "-" * 50 + "\n"
-            for maint in upcoming_maintenance:
-                equipment = Equipment.query.get(maint.equipment_id)
-                days_until = (maint.next_maintenance_date - today).days
-                maintenance_summary += f"""
-• {equipment.name} ({equipment.type})
+            maintenance_summary = "\nUPCOMING MAINTENANCE (Next 7 Days):\n" + "-" * 50 + "\n" + ''.join(f"""
+• {maint.equipment_name} ({maint.equipment_type})
   Type: {maint.maintenance_type}
-  Due Date: {maint.next_maintenance_date.strftime('%Y-%m-%d')} ({days_until} days)
-  Location: {equipment.location}
-"""
+  Due Date: {maint.next_maintenance_date.strftime('%Y-%m-%d')} ({(maint.next_maintenance_date - today).days} days)
+  Location: {maint.location}
+""" for maint in upcoming_maintenance)
         else:
             maintenance_summary = "\n✅ No upcoming maintenance scheduled\n"
         
@@ -207,40 +248,40 @@ Equipment Maintenance Log System
 Industrial CMMS
 """
         
-        msg = Message(
-            subject=subject,
-            recipients=admin_emails,
-            body=body
-        )
-        
-        mail.send(msg)
-        print(f"Daily summary sent to {len(admin_emails)} admins")
+        enqueue_email(subject, admin_emails, body)
+        db.session.commit()
+        print(f"Daily summary queued for {len(admin_emails)} admins")
         
     except Exception as e:
-        print(f"Error sending daily summary: {str(e)}")
+        print(f"Error queueing daily summary: {str(e)}")
+        raise
 
 
-def check_and_send_maintenance_reminders():
+def check_and_send_maintenance_reminders(start_date=None, end_date=None, today=None):
     """
-    Check for upcoming maintenance and send reminders
-    Should be called daily via scheduler
+    Check for upcoming maintenance and queue one reminder digest
+    Called daily by the scheduler (see scheduler.py)
+    
+    Args:
+        start_date: First due date to remind about (default: 7 days from today)
+        end_date: Last due date to remind about (default: start_date); the
+                  scheduler passes a wider range to catch up on missed days
+        today: The UTC date the scheduler runs for (default: today in UTC)
     """
     try:
-        from models import MaintenanceLog, Equipment
-        from datetime import date, timedelta
+        from models import db
         
-        # Get maintenance due in 7 days
-        target_date = date.today() + timedelta(days=7)
+        # Get maintenance due in 7 days (or in the catch-up range)
+        today = today or datetime.utcnow().date()
+        start_date = start_date or today + timedelta(days=7)
+        end_date = end_date or start_date
         
-        upcoming_maintenance = MaintenanceLog.query.filter(
-            MaintenanceLog.next_maintenance_date == target_date
-        ).all()
+        upcoming_maintenance = _due_maintenance_items(start_date, end_date)
+        send_maintenance_digest(upcoming_maintenance, today)
+        db.session.commit()
         
-        for maint in upcoming_maintenance:
-            equipment = Equipment.query.get(maint.equipment_id)
-            send_maintenance_reminder(maint, equipment)
-            
-        print(f"Checked maintenance reminders: {len(upcoming_maintenance)} reminders sent")
+        print(f"Checked maintenance reminders: {len(upcoming_maintenance)} items due")
         
     except Exception as e:
         print(f"Error checking maintenance reminders: {str(e)}")
+        raise
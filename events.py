@@ -0,0 +1,345 @@
+"""
+Live updates over Server-Sent Events
+Write routes queue events on the database session (queue_event) and they are
+written to the live_events table in the same transaction as the change, so
+an event exists exactly when its change committed. Every process tails the
+table by id (EventRelay) into its own hub, so streams see the writes of all
+worker processes, not just their own: within EVENTS_POLL_SECONDS, or at once
+for writes made in the same process, which wake the relay after commit.
+
+The hub keeps recent events in one ring buffer shared by every stream: each
+event is serialized once, open streams block on a single Condition until a
+newer id exists, and there are no per-client queues, so an idle connection
+costs one waiting thread and no database connection. Under ASGI (asgi.py)
+streams wait on one future per event loop instead, so idle connections cost
+no thread at all. Event ids are the table's ids, the same in every process:
+reconnecting clients send Last-Event-ID to whichever worker they reach and
+get what they missed from the buffer, or a 'reset' event when it has rolled
+past them.
+
+Ids are taken at insert but only become visible at commit, so with
+concurrent writers (PostgreSQL, MySQL) a lower id can show up after a higher
+one. The relay waits up to EVENTS_GAP_SECONDS for a missing id before moving
+past it (its transaction may have rolled back).
+"""
+import asyncio
+import json
+import threading
+import time
+import weakref
+from collections import deque
+from sqlalchemy import event, select, insert, delete, func
+from sqlalchemy.orm import Session
+from models import db, LiveEvent
+
+EVENT_TYPES = (
+    'equipment.status',
+    'maintenance.created',
+    'failure.created',
+    'failure.resolved',
+    'failure.reopened'
+)
+RELAY_BATCH = 500  # Events read per poll
+PRUNE_INTERVAL = 60  # Seconds between deletes of events older than EVENTS_RETAIN_SECONDS
+
+
+class EventHub:
+    """Ring buffer of relayed events with a blocking read for streams"""
+
+    def __init__(self, buffer_size=1000):
+        self.subscribers = 0
+        self._events = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._floor = 0  # Every event after this id is buffered
+        self._condition = threading.Condition()
+        # Event loop -> future resolved by the next publish (ASGI streams)
+        self._loop_futures = weakref.WeakKeyDictionary()
+
+    def configure(self, buffer_size):
+        with self._condition:
+            events = list(self._events)
+            if len(events) > buffer_size:
+                self._floor = events[-buffer_size - 1][0]
+            self._events = deque(events, maxlen=buffer_size)
+
+    def start_at(self, event_id):
+        """Empty the buffer and continue after event_id; clients behind it get a reset"""
+        with self._condition:
+            self._events.clear()
+            self._last_id = self._floor = event_id
+
+    def publish(self, event_id, event_type, payload):
+        """Append a relayed event (payload is JSON text) and wake every waiting stream"""
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self._floor = self._events[0][0]
+            self._last_id = event_id
+            self._events.append((event_id, event_type, payload))
+            self._condition.notify_all()
+            waiting = list(self._loop_futures.items())
+            self._loop_futures.clear()
+
+        for loop, future in waiting:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # Loop already closed
+        return event_id
+
+    @property
+    def last_id(self):
+        with self._condition:
+            return self._last_id
+
+    def format_id(self, event_id):
+        return str(event_id)
+
+    def parse_id(self, value):
+        """Last-Event-ID header -> event id, or None if there is none"""
+        value = (value or '').strip()
+        return int(value) if value.isdigit() else None
+
+    def wait(self, after_id, timeout):
+        """
+        Events published after after_id, waiting up to timeout seconds for one
+
+        Returns:
+            list of (id, type, payload), empty on timeout, or None when events
+            after after_id are no longer buffered
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id != after_id, timeout)
+            return self._collect(after_id)
+
+    async def wait_async(self, after_id, timeout):
+        """Coroutine version of wait that blocks no thread while waiting"""
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            if self._last_id != after_id:
+                return self._collect(after_id)
+            future = self._loop_futures.get(loop)
+            if future is None:
+                future = self._loop_futures[loop] = loop.create_future()
+
+        try:
+            # Shielded: the future is shared by every stream on this loop
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._condition:
+            return self._collect(after_id)
+
+    def _collect(self, after_id):
+        """Events after after_id (caller holds the lock)"""
+        if after_id < self._floor or after_id > self._last_id:
+            return None
+        # Newest events sit at the right end of the deque; ids may skip
+        events = []
+        for buffered in reversed(self._events):
+            if buffered[0] <= after_id:
+                break
+            events.append(buffered)
+        return events[::-1]
+
+    def _message(self, after_id, events):
+        """(new after_id, event-stream text) for the result of a wait"""
+        if events is None:
+            after_id = self.last_id
+            return after_id, f'id: {self.format_id(after_id)}\nevent: reset\ndata: {{}}\n\n'
+        if events:
+            return events[-1][0], ''.join(
+                f'id: {self.format_id(event_id)}\nevent: {event_type}\ndata: {payload}\n\n'
+                for event_id, event_type, payload in events
+            )
+        return after_id, ': keepalive\n\n'
+
+    def stream(self, after_id, keepalive, duration):
+        """
+        Yield the text/event-stream body for one client
+
+        Args:
+            after_id: Last event id the client has seen (None: start from now)
+            keepalive: Seconds between comment lines on an idle stream, which
+                       also detect closed connections
+            duration: Seconds before the stream ends; the browser reconnects
+                      with Last-Event-ID and picks up where it left off
+        """
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield 'retry: 3000\n\n'
+            if after_id is None:
+                after_id = self.last_id
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                events = self.wait(after_id, min(keepalive, max(deadline - time.monotonic(), 0)))
+                after_id, message = self._message(after_id, events)
+                yield message
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    async def stream_async(self, after_id, keepalive, duration):
+        """Async generator version of stream for ASGI servers"""
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield 'retry: 3000\n\n'
+            if after_id is None:
+                after_id = self.last_id
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                events = await self.wait_async(after_id, min(keepalive, max(deadline - time.monotonic(), 0)))
+                after_id, message = self._message(after_id, events)
+                yield message
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+event_hub = EventHub()
+
+
+class EventRelay:
+    """
+    Feeds a hub with the events every process commits, tailing live_events by id
+    start() polls on a background thread; poll() reads once in the current app context.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.poll_interval = 1
+        self.gap_seconds = 5
+        self.retain_seconds = 3600
+        self._gap_since = None
+        self._pruned_at = None
+        self._wake = threading.Event()
+        self._thread = None
+
+    def configure(self, poll_interval, gap_seconds, retain_seconds):
+        self.poll_interval = poll_interval
+        self.gap_seconds = gap_seconds
+        self.retain_seconds = retain_seconds
+
+    def start(self, app):
+        """Continue after the newest stored event and tail from a background thread"""
+        if self._thread is not None:
+            return
+        with app.app_context():
+            self.hub.start_at(db.session.scalar(select(func.max(LiveEvent.id))) or 0)
+        self._thread = threading.Thread(target=self._run, args=(app,), name='event-relay', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Poll now instead of at the next interval"""
+        self._wake.set()
+
+    def poll(self):
+        """
+        Publish the events committed since the last poll, in id order
+
+        Returns:
+            number of events published
+        """
+        rows = db.session.execute(
+            select(LiveEvent.id, LiveEvent.event_type, LiveEvent.payload)
+            .where(LiveEvent.id > self.hub.last_id)
+            .order_by(LiveEvent.id)
+            .limit(RELAY_BATCH)
+        ).all()
+        published = 0
+        for event_id, event_type, payload in rows:
+            if event_id != self.hub.last_id + 1 and not self._gap_expired():
+                break  # The missing id may still be committing
+            self._gap_since = None
+            self.hub.publish(event_id, event_type, payload)
+            published += 1
+        return published
+
+    def prune(self):
+        """Delete events older than retain_seconds; relays only read the newest"""
+        db.session.execute(delete(LiveEvent).where(LiveEvent.created_at < time.time() - self.retain_seconds))
+        db.session.commit()
+
+    def _gap_expired(self):
+        now = time.monotonic()
+        if self._gap_since is None:
+            self._gap_since = now
+        return now - self._gap_since >= self.gap_seconds
+
+    def _run(self, app):
+        while True:
+            self._wake.clear()
+            try:
+                with app.app_context():
+                    published = self.poll()
+                    if self._pruned_at is None or time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+                        self._pruned_at = time.monotonic()
+                        self.prune()
+                    db.session.remove()
+            except Exception as e:
+                print(f"Event relay error: {str(e)}")
+                published = 0
+            if published < RELAY_BATCH:
+                self._wake.wait(self.poll_interval)
+
+
+event_relay = EventRelay(event_hub)
+
+
+def init_events(app):
+    """Size the event buffer and start the relay if enabled (once the schema exists)"""
+    event_hub.configure(app.config['EVENTS_BUFFER_SIZE'])
+    event_relay.configure(
+        poll_interval=app.config['EVENTS_POLL_SECONDS'],
+        gap_seconds=app.config['EVENTS_GAP_SECONDS'],
+        retain_seconds=app.config['EVENTS_RETAIN_SECONDS']
+    )
+    if app.config['EVENTS_RELAY_ENABLED']:
+        event_relay.start(app)
+
+
+def queue_event(event_type, data):
+    """Store an event with the current transaction; streams get it once it commits"""
+    db.session.info.setdefault('pending_events', []).append((event_type, data))
+
+
+def queue_status_change(equipment, previous_status, status):
+    """Queue an equipment.status event if the status actually changes"""
+    if previous_status != status:
+        queue_event('equipment.status', {
+            'equipment_id': equipment.id,
+            'equipment_name': equipment.name,
+            'previous_status': previous_status,
+            'status': status
+        })
+
+
+@event.listens_for(Session, 'before_commit')
+def _store_events(session):
+    pending = session.info.pop('pending_events', None)
+    if pending:
+        now = time.time()
+        session.execute(insert(LiveEvent.__table__), [
+            {'event_type': event_type, 'payload': json.dumps(data, default=str), 'created_at': now}
+            for event_type, data in pending
+        ])
+        session.info['events_stored'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_relay(session):
+    # The relay polls a moment later anyway; this makes local writes show at once
+    if session.info.pop('events_stored', False):
+        event_relay.wake()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop('pending_events', None)
+    session.info.pop('events_stored', None)
@@ -0,0 +1,108 @@
+"""
+Streaming exports of maintenance history and failure reports
+Rows are selected as plain column tuples (no ORM objects), fetched from the
+database in chunks with yield_per and written out as CSV or NDJSON while the
+response is being sent, so memory use does not grow with the export size.
+Column names match the bulk importer, so an export can be re-imported.
+"""
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+
+EXPORT_KINDS = ('maintenance', 'failures')
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+CHUNK_ROWS = 1000
+
+
+def build_export_query(kind, equipment_id=None, resolved=None, date_from=None, date_to=None):
+    """
+    Select statement for an export, oldest rows first
+
+    Args:
+        kind: 'maintenance' or 'failures'
+        equipment_id: Only rows for this equipment
+        resolved: Only resolved/unresolved failure reports (failures only)
+        date_from: First day to include (date)
+        date_to: Last day to include (date, inclusive)
+    """
+    technician = aliased(Technician)
+
+    if kind == 'maintenance':
+        model, date_column = MaintenanceLog, MaintenanceLog.maintenance_date
+        query = select(
+            MaintenanceLog.id,
+            MaintenanceLog.equipment_id,
+            Equipment.serial_number.label('equipment_serial'),
+            Equipment.name.label('equipment_name'),
+            technician.email.label('technician_email'),
+            technician.full_name.label('technician_name'),
+            MaintenanceLog.maintenance_type,
+            MaintenanceLog.description,
+            MaintenanceLog.maintenance_date,
+            MaintenanceLog.downtime_hours,
+            MaintenanceLog.next_maintenance_date
+        ).join(technician, MaintenanceLog.technician_id == technician.id)
+    else:
+        model, date_column = FailureReport, FailureReport.reported_date
+        query = select(
+            FailureReport.id,
+            FailureReport.equipment_id,
+            Equipment.serial_number.label('equipment_serial'),
+            Equipment.name.label('equipment_name'),
+            technician.email.label('reporter_email'),
+            technician.full_name.label('reporter_name'),
+            FailureReport.failure_description,
+            FailureReport.severity,
+            FailureReport.reported_date,
+            FailureReport.resolved
+        ).join(technician, FailureReport.reported_by == technician.id)
+        if resolved is not None:
+            query = query.where(FailureReport.resolved == resolved)
+
+    query = query.join(Equipment, model.equipment_id == Equipment.id)
+
+    if equipment_id:
+        query = query.where(model.equipment_id == equipment_id)
+    if date_from:
+        query = query.where(date_column >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.where(date_column < datetime.combine(date_to + timedelta(days=1), time.min))
+
+    return query.order_by(date_column, model.id)
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def stream_export(query, fmt):
+    """Yield the export as text chunks of up to CHUNK_ROWS rows"""
+    keys = list(query.selected_columns.keys())
+    writer = csv.writer(_Line())
+    if fmt == 'csv':
+        yield writer.writerow(keys)
+
+    result = db.session.execute(query.execution_options(yield_per=CHUNK_ROWS))
+    try:
+        for rows in result.partitions():
+            if fmt == 'csv':
+                yield ''.join(writer.writerow([_plain(value) for value in row]) for row in rows)
+            else:
+                yield ''.join(json.dumps(dict(zip(keys, map(_plain, row)))) + '\n' for row in rows)
+    finally:
+        result.close()
@@ -0,0 +1,61 @@
+"""
+Bulk import CLI for migrating historical data from another CMMS
+
+Usage:
+    python import_data.py equipment assets.csv
+    python import_data.py maintenance history.ndjson --technician-email admin@maintenance.com
+    python import_data.py failures failures.csv --batch-size 10000
+
+Maintenance and failure rows reference equipment by equipment_serial (or
+equipment_id) and technicians by technician_email / reporter_email. Rows
+without an email are attributed to --technician-email.
+"""
+import argparse
+import json
+import time
+from app import create_app
+from models import Technician
+from bulk_import import BulkImporter, iter_records, IMPORT_KINDS, DEFAULT_BATCH_SIZE
+
+
+def import_file(kind, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE, technician_email=None):
+    """Import one CSV/NDJSON file and print a summary"""
+    app = create_app()
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    
+    with app.app_context():
+        default_technician_id = None
+        if technician_email:
+            technician = Technician.query.filter_by(email=technician_email).first()
+            if not technician:
+                raise SystemExit(f"Technician not found: {technician_email}")
+            default_technician_id = technician.id
+        
+        started = time.perf_counter()
+        importer = BulkImporter(kind, default_technician_id=default_technician_id, batch_size=batch_size)
+        with open(path, 'rb') as stream:
+            summary = importer.run(iter_records(stream, fmt))
+        elapsed = time.perf_counter() - started
+    
+    print(f"Imported {summary['inserted']} of {summary['processed']} {kind} rows in {elapsed:.1f}s")
+    if summary['error_count']:
+        print(f"{summary['error_count']} rows rejected, first errors:")
+        for error in summary['errors'][:20]:
+            print(f"  row {error['row']}: {error['error']}")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import CMMS data from CSV or NDJSON')
+    parser.add_argument('kind', choices=IMPORT_KINDS)
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='Default: from file extension')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--technician-email', help='Technician for rows without an email')
+    parser.add_argument('--errors-json', help='Write all reported errors to this file')
+    args = parser.parse_args()
+    
+    summary = import_file(args.kind, args.path, args.format, args.batch_size, args.technician_email)
+    if args.errors_json:
+        with open(args.errors_json, 'w') as f:
+            json.dump(summary['errors'], f, indent=2)
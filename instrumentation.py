@@ -0,0 +1,275 @@
+"""
+Request instrumentation: SQL counts, slow queries, Server-Timing and metrics
+Off unless INSTRUMENTATION_ENABLED; then not even the hooks and SQLAlchemy
+listeners are registered, so a disabled app pays nothing. Enabled, every
+request gets:
+
+  - its SQL statements counted and timed via engine events, reported in a
+    Server-Timing header (db, app and total) that browser dev tools show
+  - statements slower than SLOW_QUERY_MS logged with the statement text
+    (never the parameters) to the 'instrumentation' logger
+  - its latency, DB time and query count added to per-route histograms,
+    served in Prometheus text format by /api/admin/metrics
+
+Metrics are per process; with several workers, scrape each one or sum them.
+The per-request state lives in context variables, so the native async views
+of asgi.py are counted the same way (see begin_request/end_request).
+
+With PROFILING_ENABLED as well, an admin can add ?profile=1 to any request
+to get, instead of the response, a sampled profile of it: the request
+thread's stack every PROFILE_INTERVAL_MS, in the collapsed format that
+flamegraph.pl and speedscope read.
+"""
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from flask import request, g, Response
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('instrumentation')
+
+# Seconds; Prometheus' usual latency buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+MAX_LOGGED_STATEMENT = 2000  # Characters
+
+_stats = ContextVar('request_stats', default=None)
+_endpoint = ContextVar('request_endpoint', default=None)
+_slow_query_seconds = 0.1
+
+
+class RequestStats:
+    """SQL statements of one request so far"""
+    __slots__ = ('started', 'queries', 'db_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+class Histogram:
+    """Prometheus histogram keyed by label values"""
+
+    def __init__(self, name, description, labels, buckets):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, key, value):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for key, (counts, total, count) in sorted(self._series.items()):
+            labels = ','.join(f'{label}="{escape(value)}"' for label, value in zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Per-route request histograms of this process"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = Counter()
+            self._duration = Histogram('cmms_request_duration_seconds', 'Time to build the response',
+                                       ('route', 'method'), DURATION_BUCKETS)
+            self._db = Histogram('cmms_request_db_seconds', 'Time spent in SQL statements per request',
+                                 ('route', 'method'), DURATION_BUCKETS)
+            self._queries = Histogram('cmms_request_queries', 'SQL statements per request',
+                                      ('route', 'method'), QUERY_BUCKETS)
+
+    def observe(self, route, method, status, seconds, db_seconds, queries):
+        key = (route, method)
+        with self._lock:
+            self._requests[(route, method, str(status))] += 1
+            self._duration.observe(key, seconds)
+            self._db.observe(key, db_seconds)
+            self._queries.observe(key, queries)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = ['# HELP cmms_requests_total Requests by route, method and status',
+                     '# TYPE cmms_requests_total counter']
+            lines += [
+                f'cmms_requests_total{{route="{escape(route)}",method="{method}",status="{status}"}} {count}'
+                for (route, method, status), count in sorted(self._requests.items())
+            ]
+            for histogram in (self._duration, self._db, self._queries):
+                lines += histogram.render()
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+# SQLAlchemy engine events (registered by init_instrumentation)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    stats = _stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if elapsed >= _slow_query_seconds:
+        logger.warning('slow_query ms=%.1f endpoint=%s statement="%s"', elapsed * 1000,
+                       _endpoint.get(), ' '.join(statement.split())[:MAX_LOGGED_STATEMENT])
+
+
+def _handle_error(context):
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()  # The statement failed, so after_cursor_execute never runs
+
+
+class SamplingProfiler(threading.Thread):
+    """Samples one thread's stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse(frame)] += 1
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def report(self):
+        """Collapsed stacks, root first, most sampled first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+def collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def begin_request(endpoint):
+    """Start counting the SQL statements of the request in this context"""
+    _stats.set(RequestStats())
+    _endpoint.set(endpoint)
+
+
+def end_request(route, method, status):
+    """Record the request in the metrics; returns its Server-Timing header, or None"""
+    stats = _stats.get()
+    if stats is None:
+        return None
+    total = time.perf_counter() - stats.started
+    metrics.observe(route, method, status, total, stats.db_seconds, stats.queries)
+    return (
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+        f'app;dur={(total - stats.db_seconds) * 1000:.1f}, total;dur={total * 1000:.1f}'
+    )
+
+
+def clear_request():
+    _stats.set(None)
+    _endpoint.set(None)
+
+
+def profile_requested(app):
+    return (app.config['PROFILING_ENABLED'] and request.args.get('profile') == '1'
+            and current_user.is_authenticated and current_user.role == 'admin')
+
+
+def scrape_authorized(app):
+    """Whether the request carries METRICS_TOKEN as a bearer token"""
+    token = app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def init_instrumentation(app):
+    """Register the SQL listeners and request hooks if INSTRUMENTATION_ENABLED"""
+    global _slow_query_seconds
+    metrics.enabled = app.config['INSTRUMENTATION_ENABLED']
+    if not metrics.enabled:
+        return
+
+    _slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def start_request():
+        begin_request(request.endpoint)
+        if 'profile' in request.args and profile_requested(app):
+            g.profiler = SamplingProfiler(threading.get_ident(), app.config['PROFILE_INTERVAL_MS'] / 1000)
+            g.profiler.start()
+
+    @app.after_request
+    def finish_request(response):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        server_timing = end_request(route, request.method, response.status_code)
+        if server_timing is None:
+            return response
+        response.headers['Server-Timing'] = server_timing
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            response = Response(profiler.report(), mimetype='text/plain', headers={
+                'X-Profile-Samples': str(sum(profiler.samples.values())),
+                'X-Profile-Status': str(response.status_code),
+                'Server-Timing': response.headers['Server-Timing']
+            })
+        return response
+
+    @app.teardown_request
+    def teardown(exc=None):
+        clear_request()
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()  # after_request did not run
@@ -0,0 +1,105 @@
+"""
+In-place schema migrations for existing databases
+db.create_all() only creates missing tables, so anything that changes a table
+that already exists (indexes, backfills) is a numbered step here. Steps run in
+order at startup, each in its own transaction, and must be idempotent.
+"""
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from models import db, Equipment, MaintenanceLog, FailureReport
+
+MIGRATIONS = []
+
+
+class SchemaMigration(db.Model):
+    """Applied migration steps"""
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+def migration(version, description):
+    """Register a migration step"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+@migration(1, 'Add indexes for hot filter and sort columns')
+def add_hot_path_indexes(connection):
+    for table in (Equipment.__table__, MaintenanceLog.__table__, FailureReport.__table__):
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+@migration(2, 'Build dashboard KPI rollup tables')
+def build_rollups(connection):
+    from rollups import rebuild_rollups
+    rebuild_rollups(connection)
+
+
+@migration(3, 'Build full-text search index')
+def build_search_index(connection):
+    from search import rebuild_search_index
+    rebuild_search_index(connection)
+
+
+@migration(4, 'Build per-equipment monthly reliability rollups')
+def build_equipment_monthly_rollups(connection):
+    from rollups import rebuild_rollups
+    rebuild_rollups(connection)
+
+
+@migration(5, 'Replace maintenance date index with a covering index for downtime reports')
+def cover_maintenance_date_index(connection):
+    existing = {index['name'] for index in inspect(connection).get_indexes('maintenance_logs')}
+    if 'ix_maintenance_logs_maintenance_date' in existing:
+        connection.exec_driver_sql('DROP INDEX ix_maintenance_logs_maintenance_date')
+    for index in MaintenanceLog.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+@migration(6, 'Build current maintenance schedule per equipment')
+def build_equipment_schedule(connection):
+    from rollups import rebuild_rollups
+    rebuild_rollups(connection)
+
+
+@migration(7, 'Create table version stamps for conditional list requests')
+def create_table_stamps(connection):
+    from conditional import create_stamps
+    create_stamps(connection)
+
+
+@migration(8, 'Create the last login stamp for the users list')
+def create_login_stamp(connection):
+    from conditional import create_stamps
+    create_stamps(connection)
+
+
+def upgrade_schema():
+    """Apply pending migrations in version order"""
+    applied = {row.version for row in SchemaMigration.query.all()}
+    db.session.remove()
+
+    for version, description, func in sorted(MIGRATIONS, key=lambda step: step[0]):
+        if version in applied:
+            continue
+
+        try:
+            with db.engine.begin() as connection:
+                func(connection)
+                connection.execute(SchemaMigration.__table__.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker recorded this step first
+            continue
+
+        print(f"Applied migration {version}: {description}")
@@ -1,9 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-
-db = SQLAlchemy()
+from database import db
+from passwords import password_hasher
 
 class Technician(UserMixin, db.Model):
     """Technician/User model with authentication"""
@@ -23,17 +21,16 @@ class Technician(UserMixin, db.Model):
     failure_reports = db.relationship('FailureReport', backref='reporter', lazy=True)
     
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password (on the hashing pool, see passwords.py)"""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password (on the hashing pool, see passwords.py)"""
+        return password_hasher.verify(self.password_hash, password)
     
-    def update_last_login(self):
-        """Update last login timestamp"""
-        self.last_login = datetime.utcnow()
-        db.session.commit()
+    def password_needs_rehash(self):
+        """Whether the stored hash predates the configured hash parameters"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -54,13 +51,13 @@ class Equipment(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    type = db.Column(db.String(50), nullable=False)  # Compressor, Turbine, Generator, etc.
+    type = db.Column(db.String(50), nullable=False, index=True)  # Compressor, Turbine, Generator, etc.
     manufacturer = db.Column(db.String(100))
     model = db.Column(db.String(100))
     serial_number = db.Column(db.String(100), unique=True)
     location = db.Column(db.String(200))
     installation_date = db.Column(db.Date)
-    status = db.Column(db.String(30), nullable=False, default='Active')  # Active, Under Maintenance, Out of Service
+    status = db.Column(db.String(30), nullable=False, default='Active', index=True)  # Active, Under Maintenance, Out of Service
     
     # Relationships
     maintenance_logs = db.relationship('MaintenanceLog', backref='equipment', lazy=True, cascade='all, delete-orphan')
@@ -84,6 +81,13 @@ class Equipment(db.Model):
 class MaintenanceLog(db.Model):
     """Maintenance activity log"""
     __tablename__ = 'maintenance_logs'
+    __table_args__ = (
+        # Equipment history and per-equipment downtime, newest first
+        db.Index('ix_maintenance_logs_equipment_date', 'equipment_id', 'maintenance_date'),
+        # Global history list (keyset on maintenance_date, id); also covers the
+        # date-range scans of the downtime report
+        db.Index('ix_maintenance_logs_date_downtime', 'maintenance_date', 'equipment_id', 'downtime_hours'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id'), nullable=False)
@@ -92,7 +96,7 @@ class MaintenanceLog(db.Model):
     description = db.Column(db.Text, nullable=False)
     maintenance_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     downtime_hours = db.Column(db.Float, default=0.0)
-    next_maintenance_date = db.Column(db.Date)
+    next_maintenance_date = db.Column(db.Date, index=True)
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -113,6 +117,14 @@ class MaintenanceLog(db.Model):
 class FailureReport(db.Model):
     """Equipment failure reports"""
     __tablename__ = 'failure_reports'
+    __table_args__ = (
+        # Equipment failure history, newest first
+        db.Index('ix_failure_reports_equipment_date', 'equipment_id', 'reported_date'),
+        # Global failure list (keyset on reported_date, id)
+        db.Index('ix_failure_reports_reported_date', 'reported_date'),
+        # Open/resolved counts and the active failures list
+        db.Index('ix_failure_reports_resolved_date', 'resolved', 'reported_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id'), nullable=False)
@@ -135,3 +147,136 @@ class FailureReport(db.Model):
             'reported_date': self.reported_date.isoformat(),
             'resolved': self.resolved
         }
+
+
+class EquipmentStats(db.Model):
+    """Per-equipment KPI rollup, maintained by the write routes"""
+    __tablename__ = 'equipment_stats'
+    
+    equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id'), primary_key=True)
+    total_downtime = db.Column(db.Float, nullable=False, default=0.0)
+    maintenance_count = db.Column(db.Integer, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+    open_failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class MonthlyStats(db.Model):
+    """Per-month KPI rollup, maintained by the write routes"""
+    __tablename__ = 'monthly_stats'
+    
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    total_downtime = db.Column(db.Float, nullable=False, default=0.0)
+    maintenance_count = db.Column(db.Integer, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EquipmentMonthlyStats(db.Model):
+    """Per-equipment, per-month reliability rollup, maintained by the write routes"""
+    __tablename__ = 'equipment_monthly_stats'
+    
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM, first so windows are PK range scans
+    equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id'), primary_key=True)
+    total_downtime = db.Column(db.Float, nullable=False, default=0.0)
+    maintenance_count = db.Column(db.Integer, nullable=False, default=0)
+    repair_downtime = db.Column(db.Float, nullable=False, default=0.0)  # Corrective maintenance only
+    repair_count = db.Column(db.Integer, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EquipmentSchedule(db.Model):
+    """
+    Current maintenance schedule per equipment, maintained by the write routes
+    Holds the next_maintenance_date of the equipment's latest maintenance log
+    that set one; earlier logs' dates are superseded.
+    """
+    __tablename__ = 'equipment_schedule'
+    
+    equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id'), primary_key=True)
+    maintenance_log_id = db.Column(db.Integer, db.ForeignKey('maintenance_logs.id'), nullable=False)
+    last_maintenance_date = db.Column(db.DateTime, nullable=False)  # Of the log that set the schedule
+    next_maintenance_date = db.Column(db.Date, nullable=False, index=True)
+    
+    equipment = db.relationship('Equipment')
+    maintenance_log = db.relationship('MaintenanceLog')
+
+
+class EquipmentStatusCount(db.Model):
+    """Number of equipment items in each status, maintained by the write routes"""
+    __tablename__ = 'equipment_status_counts'
+    
+    status = db.Column(db.String(30), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class OutboxMessage(db.Model):
+    """Outgoing email, queued in the same transaction as the change that triggered it"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # Worker poll: due messages in order
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.Text, nullable=False)  # Comma-separated addresses
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, sending, sent, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'subject': self.subject,
+            'recipients': self.recipients.split(','),
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+
+class JobRun(db.Model):
+    """Persisted state of a scheduled job: last run, watermark and run lock"""
+    __tablename__ = 'job_runs'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_run_at = db.Column(db.DateTime)
+    watermark = db.Column(db.Date)  # Last business date fully processed
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+
+class ReplicationHeartbeat(db.Model):
+    """Single row stamped by the primary; its copy on a replica shows how far behind it is"""
+    __tablename__ = 'replication_heartbeat'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.Float, nullable=False)  # Epoch seconds, compared with time.time()
+
+
+class TableVersion(db.Model):
+    """Change stamp of a listed table, bumped in every transaction that writes to it (see conditional.py)"""
+    __tablename__ = 'table_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.Float, nullable=False)  # Epoch seconds of the last bump
+
+
+class LiveEvent(db.Model):
+    """Live update event, written with the change it describes and relayed to every process's streams (see events.py)"""
+    __tablename__ = 'live_events'
+    __table_args__ = {'sqlite_autoincrement': True}  # Ids are never reused, even after pruning
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(40), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.Float, nullable=False)  # Epoch seconds, for pruning
@@ -0,0 +1,156 @@
+"""
+Email outbox worker
+Request handlers only insert OutboxMessage rows (see email_service.enqueue_email)
+inside their own transaction. This worker claims due messages in batches, sends
+each batch over a single SMTP connection and reschedules failures with
+exponential backoff until they are sent or marked dead.
+"""
+import threading
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message
+from sqlalchemy import update, or_, and_
+from models import db, OutboxMessage
+from email_service import mail
+
+# A claimed message is re-offered if its worker has not reported back by then
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=1)
+
+
+def init_outbox(app):
+    """Register outbox commands and start the in-process worker if enabled"""
+    app.cli.add_command(drain_outbox_command)
+    app.cli.add_command(run_outbox_command)
+
+    if app.config['MAIL_ENABLED'] and app.config['OUTBOX_WORKER_ENABLED']:
+        OutboxWorker(app).start()
+
+
+def claim_batch(limit):
+    """Atomically claim up to limit due messages for this worker"""
+    now = datetime.utcnow()
+    due = or_(
+        OutboxMessage.status == 'pending',
+        OutboxMessage.status == 'sending'  # Lease expired, previous worker died
+    )
+    candidates = db.session.query(OutboxMessage.id).filter(
+        due, OutboxMessage.next_attempt_at <= now
+    ).order_by(OutboxMessage.next_attempt_at).limit(limit).all()
+
+    claimed = []
+    for (message_id,) in candidates:
+        result = db.session.execute(
+            update(OutboxMessage)
+            .where(and_(OutboxMessage.id == message_id, due, OutboxMessage.next_attempt_at <= now))
+            .values(status='sending', next_attempt_at=now + CLAIM_LEASE)
+        )
+        if result.rowcount:
+            claimed.append(message_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return OutboxMessage.query.filter(OutboxMessage.id.in_(claimed)).order_by(OutboxMessage.id).all()
+
+
+def _record_failure(message, error):
+    """Schedule a retry with exponential backoff, or dead-letter the message"""
+    config = current_app.config
+    message.attempts += 1
+    message.last_error = str(error)
+
+    if message.attempts >= config['OUTBOX_MAX_ATTEMPTS']:
+        message.status = 'dead'
+        print(f"Outbox message {message.id} dead after {message.attempts} attempts: {error}")
+        return
+
+    delay = timedelta(seconds=config['OUTBOX_BACKOFF_SECONDS'] * 2 ** (message.attempts - 1))
+    message.status = 'pending'
+    message.next_attempt_at = datetime.utcnow() + min(delay, MAX_BACKOFF)
+
+
+def drain_outbox(batch_size=None):
+    """
+    Send one batch of due messages over a single SMTP connection
+
+    Returns:
+        number of messages claimed
+    """
+    batch = claim_batch(batch_size or current_app.config['OUTBOX_BATCH_SIZE'])
+    if not batch:
+        return 0
+
+    try:
+        with mail.connect() as connection:
+            for message in batch:
+                try:
+                    connection.send(Message(
+                        subject=message.subject,
+                        recipients=message.recipients.split(','),
+                        body=message.body
+                    ))
+                except Exception as e:
+                    _record_failure(message, e)
+                else:
+                    message.status = 'sent'
+                    message.sent_at = datetime.utcnow()
+                    message.attempts += 1
+    except Exception as e:
+        # Connecting or closing the session failed, retry whatever was not sent
+        for message in batch:
+            if message.status == 'sending':
+                _record_failure(message, e)
+
+    db.session.commit()
+    sent = sum(1 for message in batch if message.status == 'sent')
+    print(f"Outbox: sent {sent} of {len(batch)} messages")
+    return len(batch)
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox while the app is running"""
+
+    def __init__(self, app):
+        super().__init__(name='outbox-worker', daemon=True)
+        self.app = app
+        self.stop_event = threading.Event()
+
+    def run(self):
+        poll_interval = self.app.config['OUTBOX_POLL_INTERVAL']
+        while not self.stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    claimed = drain_outbox()
+                    db.session.remove()
+            except Exception as e:
+                print(f"Outbox worker error: {str(e)}")
+                claimed = 0
+            if not claimed:
+                self.stop_event.wait(poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+@click.command('drain-outbox')
+@with_appcontext
+def drain_outbox_command():
+    """Send all currently due outbox messages and exit"""
+    total = 0
+    while True:
+        claimed = drain_outbox()
+        if not claimed:
+            break
+        total += claimed
+    print(f"Outbox drained: {total} messages processed")
+
+
+@click.command('run-outbox')
+@with_appcontext
+def run_outbox_command():
+    """Run the outbox worker in the foreground (for a dedicated process)"""
+    worker = OutboxWorker(current_app._get_current_object())
+    worker.run()
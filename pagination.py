@@ -0,0 +1,99 @@
+"""
+Keyset (cursor) pagination for list endpoints
+Pages are addressed by the sort key of the last row served, so every page
+is an index range scan no matter how deep the client has scrolled.
+"""
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_, Select
+from database import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def wants_page(args):
+    """True when the client asked for a paged response (limit or cursor given)"""
+    return 'limit' in args or 'cursor' in args
+
+
+def page_limit(args):
+    """Read and clamp the requested page size"""
+    limit = args.get('limit', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    """Encode sort key values into an opaque URL-safe cursor"""
+    raw = json.dumps([
+        value.isoformat() if isinstance(value, (date, datetime)) else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor back into typed sort key values
+
+    Raises:
+        ValueError: if the cursor is malformed or does not match the key
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        if value is not None and python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and python_type is date:
+            value = date.fromisoformat(value)
+        decoded.append(value)
+    return decoded
+
+
+def _after(columns, values, descending):
+    """Build the row-value predicate (c1, c2, ...) > / < (v1, v2, ...)"""
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(column == value, _after(columns[1:], values[1:], descending)))
+
+
+def paginate(query, columns, limit, cursor=None, descending=True):
+    """
+    Fetch one page of a query ordered by a unique sort key
+
+    Args:
+        query: base query with filters applied (ORM query or select())
+        columns: sort key columns, the last one must be unique (usually id)
+        limit: page size
+        cursor: cursor returned with the previous page, if any
+        descending: sort direction for all key columns
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    query = query.order_by(*ordering).limit(limit + 1)
+    rows = db.session.execute(query).all() if isinstance(query, Select) else query.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    return rows, next_cursor
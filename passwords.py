@@ -0,0 +1,91 @@
+"""
+Password hashing off the request thread
+Hashing is deliberately slow, so a burst of logins at shift change or a
+signup flood would otherwise pin every worker's CPU. PasswordHasher runs
+Werkzeug's hash and verify in a small process pool (PASSWORD_HASH_WORKERS;
+0 runs them inline) and admits at most PASSWORD_HASH_MAX_PENDING jobs at a
+time. A request that cannot get a slot within PASSWORD_HASH_TIMEOUT seconds
+gets PasswordHasherBusy (503 from the API) instead of queueing forever, so
+the rest of the API keeps its threads and CPU.
+
+PASSWORD_HASH_METHOD sets the algorithm and work factor in Werkzeug's
+format ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'). Hashes made with other
+parameters still verify, and needs_rehash() tells the login route to
+upgrade them.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing slot stayed taken for the whole timeout"""
+
+
+class PasswordHasher:
+    """Werkzeug password hashing on a bounded process pool"""
+
+    def __init__(self, method='scrypt', workers=0, max_pending=32, timeout=10):
+        self.configure(method, workers, max_pending, timeout)
+
+    def configure(self, method, workers, max_pending, timeout):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._prefix = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers only import this module, never a copy of the app's threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy('Password hashing is saturated, retry shortly')
+        try:
+            return self._pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether pwhash was made with other parameters than PASSWORD_HASH_METHOD"""
+        if self._prefix is None:
+            # Werkzeug fills in defaults ('scrypt' -> 'scrypt:32768:8:1'); learn them once
+            self._prefix = generate_password_hash('', self.method, salt_length=1).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
+def init_passwords(app):
+    """Configure the hash parameters and the hashing pool"""
+    password_hasher.shutdown()
+    password_hasher.configure(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
@@ -0,0 +1,291 @@
+"""
+Rate limiting and admission control for the API
+Token buckets limit how often one client may hit the expensive or mutating
+endpoints. Config.RATE_LIMITS maps a rule ('login', 'signup', 'write') to
+limits per key kind:
+
+    ip       the client address (request.remote_addr, see below)
+    account  the email being logged into, so one account cannot be
+             hammered from many addresses
+    user     the authenticated user, falling back to the client address
+
+A limit like '10/minute' is a bucket of 10 tokens refilled at 10 per minute,
+so short bursts pass and sustained traffic is held to the rate. A request
+without a token gets 429 with Retry-After. Buckets live in process memory,
+or with RATE_LIMIT_STORAGE_PATH in a SQLite file shared by all workers.
+
+Separately, at most MAX_CONCURRENT_REQUESTS API requests run at once per
+process (the event stream excepted); the rest get 503 with Retry-After
+straight away instead of queueing behind a saturated server.
+
+Behind a reverse proxy every request comes from the proxy's address, so all
+clients would share one 'ip' bucket. PROXY_FIX_X_FOR is the number of
+proxies that append to X-Forwarded-For: the client address is then the one
+the outermost trusted proxy saw (werkzeug's ProxyFix for the WSGI app,
+forwarded_client() for the ASGI scope). Addresses further left are the
+client's own claim and are ignored.
+"""
+import math
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import request, jsonify, g
+from flask_login import current_user
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# Long-lived streams are bounded by their own buffers, not the request cap
+ADMISSION_EXEMPT = {'api.event_stream'}
+# Auth endpoints have their own rules; logging out is never limited
+WRITE_LIMIT_EXEMPT = {'api.login', 'api.signup', 'api.logout'}
+
+# Dropping full buckets loses nothing, so prune idle ones every so often
+PRUNE_EVERY = 1000
+
+
+def parse_limit(spec):
+    """'10/minute' -> (rate in tokens per second, burst)"""
+    try:
+        count, period = spec.strip().split('/')
+        count = int(count)
+        seconds = PERIODS[period.strip().rstrip('s')]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {spec!r} (expected e.g. '10/minute')")
+    if count < 1:
+        raise ValueError(f"Invalid rate limit: {spec!r} (count must be positive)")
+    return count / seconds, count
+
+
+def refill(tokens, updated_at, rate, burst, now):
+    """Tokens in a bucket at now"""
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+
+def take_token(state, rate, burst, now):
+    """
+    Apply one request to a bucket
+
+    Returns:
+        (new state, seconds to wait or 0 if the request may proceed)
+    """
+    tokens = burst if state is None else refill(state[0], state[1], rate, burst, now)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class MemoryBackend:
+    """Buckets in a dict, for a single worker process"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._takes = 0
+
+    def take(self, buckets, now):
+        """Take a token from each (key, rate, burst) bucket if all have one; returns the longest wait"""
+        with self._lock:
+            results = [take_token(self._buckets.get(key), rate, burst, now) for key, rate, burst in buckets]
+            wait = max((bucket_wait for _, bucket_wait in results), default=0)
+            if not wait:
+                for (key, rate, burst), (state, _) in zip(buckets, results):
+                    self._buckets[key] = (state[0], state[1], state[1] + (burst - state[0]) / rate)
+            self._takes += 1
+            if self._takes % PRUNE_EVERY == 0:
+                self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file shared by all worker processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets, now):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')  # Read-modify-write without another worker in between
+        try:
+            results = []
+            for key, rate, burst in buckets:
+                row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+                results.append(take_token(row, rate, burst, now))
+            wait = max((bucket_wait for _, bucket_wait in results), default=0)
+            if not wait:
+                conn.executemany('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)', [
+                    (key, state[0], state[1], state[1] + (burst - state[0]) / rate)
+                    for (key, rate, burst), (state, _) in zip(buckets, results)
+                ])
+            if random.random() < 1 / PRUNE_EVERY:
+                conn.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimiter:
+    """Named rules of token-bucket limits on top of a backend"""
+
+    def __init__(self, backend=None, clock=time.time):
+        self.backend = backend or MemoryBackend()
+        self.clock = clock
+        self.rules = {}
+        self.enabled = True
+
+    def configure(self, rules, backend=None, enabled=True):
+        self.rules = {
+            name: {kind: parse_limit(spec) for kind, spec in limits.items() if spec}
+            for name, limits in rules.items()
+        }
+        self.backend = backend or MemoryBackend()
+        self.enabled = enabled
+
+    def hit(self, rule, keys):
+        """
+        Take a token from every bucket of a rule, or from none if any is empty
+        A client refused by one bucket does not drain the others while it retries.
+
+        Args:
+            rule: rule name from RATE_LIMITS
+            keys: {key kind: value}; kinds without a limit or value are skipped
+
+        Returns:
+            seconds to wait, or 0 if the request may proceed
+        """
+        if not self.enabled:
+            return 0
+        buckets = [
+            (f'{rule}:{kind}:{keys[kind]}', rate, burst)
+            for kind, (rate, burst) in self.rules.get(rule, {}).items()
+            if keys.get(kind) is not None
+        ]
+        return self.backend.take(buckets, self.clock()) if buckets else 0
+
+
+limiter = RateLimiter()
+
+
+def request_keys():
+    """Key values of the current request for every key kind"""
+    data = request.get_json(silent=True) if request.is_json else None
+    email = data.get('email') if isinstance(data, dict) else None
+    user = current_user.id if current_user.is_authenticated else None
+    return {
+        'ip': request.remote_addr,
+        'account': email.strip().lower() if isinstance(email, str) and email.strip() else None,
+        'user': user if user is not None else f'ip:{request.remote_addr}'
+    }
+
+
+def too_many_requests(wait):
+    return jsonify({'error': 'Too many requests, retry later'}), 429, {'Retry-After': str(math.ceil(wait))}
+
+
+def rate_limited(rule):
+    """Apply a RATE_LIMITS rule to a view"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            wait = limiter.hit(rule, request_keys())
+            if wait:
+                return too_many_requests(wait)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class AdmissionControl:
+    """Cap on API requests in progress; beyond it requests are refused, not queued"""
+
+    def __init__(self, limit=0):
+        self.configure(limit)
+
+    def configure(self, limit):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+
+    def admit(self):
+        return self._slots is None or self._slots.acquire(blocking=False)
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+
+admission = AdmissionControl()
+
+
+def admit_request():
+    """before_request: the concurrency cap, then the 'write' rule for mutating requests"""
+    if request.endpoint in ADMISSION_EXEMPT:
+        return None
+    if not admission.admit():
+        return jsonify({'error': 'Server busy, retry shortly'}), 503, {'Retry-After': '1'}
+    g.admitted = True
+
+    if request.method in WRITE_METHODS and request.endpoint not in WRITE_LIMIT_EXEMPT:
+        wait = limiter.hit('write', request_keys())
+        if wait:
+            return too_many_requests(wait)
+    return None
+
+
+def release_request(exc=None):
+    """teardown_request: give back the concurrency slot"""
+    if g.pop('admitted', False):
+        admission.release()
+
+
+def forwarded_client(scope, trusted):
+    """ASGI scope client as ProxyFix(x_for=trusted) would set REMOTE_ADDR"""
+    values = [
+        address.strip()
+        for name, value in scope.get('headers', [])
+        if name.lower() == b'x-forwarded-for'
+        for address in value.decode('latin-1').split(',')
+    ]
+    if not trusted or len(values) < trusted:
+        return scope.get('client')
+    return (values[-trusted], 0)
+
+
+def trust_proxies(app):
+    """Take the client address from X-Forwarded-For when PROXY_FIX_X_FOR proxies are in front"""
+    trusted = app.config['PROXY_FIX_X_FOR']
+    if trusted:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted)
+
+
+def init_rate_limits(app):
+    """Configure the limiter rules and storage, the trusted proxies and the concurrency cap"""
+    trust_proxies(app)
+    path = app.config.get('RATE_LIMIT_STORAGE_PATH')
+    limiter.configure(
+        app.config['RATE_LIMITS'],
+        backend=SQLiteBackend(path) if path else MemoryBackend(),
+        enabled=app.config['RATE_LIMIT_ENABLED']
+    )
+    admission.configure(app.config['MAX_CONCURRENT_REQUESTS'])
@@ -0,0 +1,187 @@
+"""
+Reliability analytics: MTBF, MTTR, availability and failure-rate trends
+Every asset is computed at once. The per-equipment monthly rollup (see
+rollups.py) is read for the whole window in one query, and all per-asset and
+per-group figures are derived from those columns with NumPy array operations
+(bincount over asset and group indices), never with per-asset queries or
+Python loops. Windows are whole calendar months.
+
+Definitions, per asset over the window:
+    observed hours  window length, starting at installation_date if later
+                    and ending now if the window reaches the current month
+    downtime hours  maintenance downtime_hours (all maintenance types)
+    uptime hours    observed - downtime
+    repairs         corrective maintenance logs; repair hours are their downtime
+    MTBF            uptime / failures
+    MTTR            repair hours / repairs
+    availability    uptime / observed
+    failure rate    failures per 1000 uptime hours
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from models import db, Equipment, EquipmentMonthlyStats
+
+GROUP_BY = ('equipment', 'type', 'location')
+
+
+def _month_start(value):
+    return value.replace(day=1)
+
+
+def _next_month(value):
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    """Element-wise numerator / denominator, NaN where the denominator is 0"""
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator * scale, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _metrics(observed, downtime, repair_hours, repairs, failures):
+    uptime = np.clip(observed - downtime, 0.0, None)
+    return {
+        'observed_hours': observed,
+        'uptime_hours': uptime,
+        'downtime_hours': downtime,
+        'failures': failures,
+        'repairs': repairs,
+        'mtbf_hours': _ratio(uptime, failures),
+        'mttr_hours': _ratio(repair_hours, repairs),
+        'availability': _ratio(uptime, observed),
+        'failure_rate': _ratio(failures, uptime, scale=1000.0)
+    }
+
+
+def _plain(values, digits=4):
+    """Array -> list of JSON numbers, NaN -> None"""
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+def reliability_report(start=None, end=None, group_by='equipment', now=None):
+    """
+    Reliability figures per equipment, type or location
+
+    Args:
+        start: Any day in the first month of the window (default: 11 months before end)
+        end: Any day in the last month of the window (default: today)
+        group_by: 'equipment', 'type' or 'location'
+        now: Current time, for the partial current month (default: utcnow)
+
+    Returns:
+        dict with the window, per-group items and fleet totals
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f'group_by must be one of {", ".join(GROUP_BY)}')
+
+    now = now or datetime.utcnow()
+    end = _month_start(end or now.date())
+    start = _month_start(start) if start else (np.datetime64(end, 'M') - 11).astype('datetime64[D]').item()
+    if start > end:
+        raise ValueError('from must not be after to')
+
+    months = np.arange(np.datetime64(start, 'M'), np.datetime64(end, 'M') + 1)
+    month_count = len(months)
+    window_start = np.datetime64(start, 's')
+    window_end = min(np.datetime64(_next_month(end), 's'), np.datetime64(now, 's'))
+
+    # Assets: one row each, ordered by id so rollup rows map with searchsorted
+    assets = db.session.execute(
+        select(Equipment.id, Equipment.name, Equipment.type, Equipment.location, Equipment.installation_date)
+        .order_by(Equipment.id)
+    ).all()
+    asset_count = len(assets)
+    ids = np.array([row[0] for row in assets], dtype=np.int64)
+    installed = np.array([row[4] for row in assets], dtype='datetime64[s]')
+
+    # Rollup rows for the window: (equipment_id, month, downtime, repair hours, repairs, failures)
+    rows = db.session.execute(
+        select(
+            EquipmentMonthlyStats.equipment_id,
+            EquipmentMonthlyStats.month,
+            EquipmentMonthlyStats.total_downtime,
+            EquipmentMonthlyStats.repair_downtime,
+            EquipmentMonthlyStats.repair_count,
+            EquipmentMonthlyStats.failure_count
+        ).where(
+            EquipmentMonthlyStats.month >= start.strftime('%Y-%m'),
+            EquipmentMonthlyStats.month <= end.strftime('%Y-%m')
+        )
+    ).all()
+    columns = list(zip(*rows)) or [()] * 6
+    asset_index = np.searchsorted(ids, np.array(columns[0], dtype=np.int64))
+    month_index = (np.array(columns[1], dtype='datetime64[M]') - months[0]).astype(np.int64)
+    row_downtime, row_repair_hours, row_repairs, row_failures = (
+        np.array(column, dtype=float) for column in columns[2:]
+    )
+
+    def per_asset(weights):
+        return np.bincount(asset_index, weights=weights, minlength=asset_count)
+
+    asset_start = np.where(np.isnat(installed) | (installed < window_start), window_start, installed)
+    observed = np.clip((window_end - asset_start).astype(np.int64), 0, None) / 3600.0
+    downtime = per_asset(row_downtime)
+    repair_hours = per_asset(row_repair_hours)
+    repairs = per_asset(row_repairs)
+    failures = per_asset(row_failures)
+
+    # Groups: each asset is its own group, or assets share a type/location code
+    if group_by == 'equipment':
+        group_of_asset = np.arange(asset_count)
+        keys = ids.tolist()
+        names = [row[1] for row in assets]
+    else:
+        column = 2 if group_by == 'type' else 3
+        labels = np.array([row[column] or 'Unspecified' for row in assets], dtype=object)
+        keys, group_of_asset = np.unique(labels, return_inverse=True)
+        keys = names = keys.tolist()
+    group_count = len(keys)
+
+    def per_group(values):
+        return np.bincount(group_of_asset, weights=values, minlength=group_count)
+
+    grouped = _metrics(
+        per_group(observed), per_group(downtime), per_group(repair_hours),
+        per_group(repairs), per_group(failures)
+    )
+    asset_counts = np.bincount(group_of_asset, minlength=group_count)
+
+    # Monthly failure counts per group as one flat bincount over (group, month)
+    trend = np.bincount(
+        group_of_asset[asset_index] * month_count + month_index,
+        weights=row_failures,
+        minlength=group_count * month_count
+    ).reshape(group_count, month_count).astype(int)
+
+    totals = _metrics(*(values.sum(keepdims=True)
+                        for values in (observed, downtime, repair_hours, repairs, failures)))
+
+    figures = {name: _plain(values) for name, values in grouped.items()}
+    trend_lists = trend.tolist()
+    items = [
+        dict(
+            {name: values[position] for name, values in figures.items()},
+            key=key,
+            name=names[position],
+            assets=int(asset_counts[position]),
+            failure_trend=trend_lists[position]
+        )
+        for position, key in enumerate(keys)
+    ]
+
+    return {
+        'window': {
+            'from': start.isoformat(),
+            'to': (_next_month(end) - timedelta(days=1)).isoformat(),
+            'months': [str(month) for month in months]
+        },
+        'group_by': group_by,
+        'items': items,
+        'totals': dict(
+            {name: _plain(values)[0] for name, values in totals.items()},
+            assets=asset_count,
+            failure_trend=trend.sum(axis=0).tolist()
+        )
+    }
@@ -0,0 +1,194 @@
+"""
+Report reads from a replica database
+With REPLICA_DATABASE_URL set, views marked @replica_read (the report
+endpoints) run their queries on the 'replica' bind while writes and every
+other view stay on the primary. Replication itself is the database's job
+(e.g. PostgreSQL streaming replication); this module decides, once per
+request, whether the replica is fresh enough to answer it:
+
+  - staleness bound: the primary stamps the one-row replication_heartbeat
+    table every REPLICA_HEARTBEAT_SECONDS. A replica whose copy of the stamp
+    is more than REPLICA_MAX_LAG_SECONDS old is skipped.
+  - read-your-writes: every successful write request stores its time in the
+    user's session. Until the replica's stamp is newer than that, the user's
+    reports read the primary, so a technician sees the work they just logged.
+
+Locally, point REPLICA_DATABASE_URL at a second SQLite file and run
+`flask sync-replica` to copy the primary into it.
+"""
+import sqlite3
+import threading
+import time
+from functools import wraps
+import click
+from flask import request, session
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from database import REPLICA_BIND
+from models import db, ReplicationHeartbeat
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class ReplicaMonitor:
+    """Per-process view of the replica's heartbeat, re-read at most every check interval"""
+
+    def __init__(self):
+        self.engine = None
+        self.max_lag = 30
+        self.check_interval = 1
+        self._beat = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def configure(self, engine, max_lag, check_interval):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._beat = None
+        self._checked_at = None
+
+    def replica_beat(self):
+        """Primary's heartbeat as last seen on the replica, or None if unreadable"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._beat
+
+        try:
+            with self.engine.connect() as connection:
+                beat = connection.execute(
+                    select(ReplicationHeartbeat.beat_at).where(ReplicationHeartbeat.id == 1)
+                ).scalar()
+        except SQLAlchemyError:
+            beat = None  # Replica down or not yet seeded
+
+        with self._lock:
+            self._beat, self._checked_at = beat, now
+        return beat
+
+    def fresh_beat(self, last_write=None):
+        """
+        The replica's heartbeat if it may serve a read, else None
+
+        Args:
+            last_write: epoch seconds of the caller's last write, if any
+        """
+        if self.engine is None:
+            return None
+        beat = self.replica_beat()
+        if beat is None or time.time() - beat > self.max_lag:
+            return None
+        if last_write is not None and beat < last_write:
+            return None
+        return beat
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def beat(executor=None):
+    """Stamp the heartbeat row on the primary"""
+    executor = executor or db.session
+    now = time.time()
+    result = executor.execute(
+        update(ReplicationHeartbeat).where(ReplicationHeartbeat.id == 1).values(beat_at=now)
+    )
+    if not result.rowcount:
+        executor.add(ReplicationHeartbeat(id=1, beat_at=now))
+    try:
+        executor.commit()
+    except IntegrityError:
+        executor.rollback()  # Another worker created the row first
+    return now
+
+
+class HeartbeatWriter(threading.Thread):
+    """Background thread that stamps the heartbeat while the app is running"""
+
+    def __init__(self, app):
+        super().__init__(name='replica-heartbeat', daemon=True)
+        self.app = app
+        self.stop_event = threading.Event()
+
+    def run(self):
+        interval = self.app.config['REPLICA_HEARTBEAT_SECONDS']
+        while not self.stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    beat()
+                    db.session.remove()
+            except Exception as e:
+                print(f"Replica heartbeat error: {str(e)}")
+            self.stop_event.wait(interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def last_write():
+    """Epoch seconds of the current user's last write, from their session"""
+    return session.get('last_write')
+
+
+def replica_read(view):
+    """Run a report view on the replica when it is fresh enough for this user"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replica_beat = replica_monitor.fresh_beat(last_write())
+        if replica_beat is not None:
+            db.session.info['replica'] = True
+            db.session.info['replica_beat'] = replica_beat
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _record_write(response):
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        session['last_write'] = time.time()
+    return response
+
+
+def init_replica(app):
+    """Watch the replica, record writes for read-your-writes and start the heartbeat"""
+    app.cli.add_command(sync_replica_command)
+
+    with app.app_context():
+        engine = db.engines.get(REPLICA_BIND)
+    if engine is None:
+        return
+
+    replica_monitor.configure(
+        engine,
+        max_lag=app.config['REPLICA_MAX_LAG_SECONDS'],
+        check_interval=app.config['REPLICA_CHECK_SECONDS']
+    )
+    app.after_request(_record_write)
+
+    if app.config['REPLICA_HEARTBEAT_ENABLED']:
+        HeartbeatWriter(app).start()
+
+
+@click.command('sync-replica')
+@with_appcontext
+def sync_replica_command():
+    """Copy a SQLite primary into the SQLite replica file (local testing)"""
+    primary = db.engines[None]
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is None or primary.url.get_backend_name() != 'sqlite' or replica.url.get_backend_name() != 'sqlite':
+        raise SystemExit('sync-replica needs a SQLite DATABASE_URL and REPLICA_DATABASE_URL')
+
+    beat()  # So the copy carries a current heartbeat
+    replica.dispose()
+    path = replica.url.database
+    if path.startswith('file:'):
+        path = path[len('file:'):]
+    source = primary.raw_connection()
+    target = sqlite3.connect(path)
+    try:
+        source.driver_connection.backup(target)
+    finally:
+        target.close()
+        source.close()
+    print(f"Replica {path} synced from {primary.url.database}")
@@ -0,0 +1,482 @@
+"""
+Materialized KPI rollups and the current maintenance schedule
+The write routes call the record_* helpers inside their own transaction, so the
+rollup tables commit or roll back together with the fact rows they summarize.
+rebuild_rollups() recomputes everything from the raw tables and
+check_rollups() reports any drift between the two.
+
+Many writers update the same few rows (the current month, the status
+counts), and each holds its row locks until it commits. The helpers only sum
+deltas in the session; they are written with one upsert per row just before
+the transaction commits, in key order, so concurrent writers queue for the
+commit alone and always lock shared rows in the same order.
+"""
+from collections import defaultdict
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, select, insert, update, delete, func, case, or_, and_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import (db, Equipment, MaintenanceLog, FailureReport, EquipmentStats, MonthlyStats,
+                    EquipmentMonthlyStats, EquipmentSchedule, EquipmentStatusCount)
+
+EQUIPMENT_FIELDS = ('total_downtime', 'maintenance_count', 'failure_count', 'open_failure_count')
+MONTHLY_FIELDS = ('total_downtime', 'maintenance_count', 'failure_count')
+EQUIPMENT_MONTHLY_FIELDS = ('total_downtime', 'maintenance_count', 'repair_downtime',
+                            'repair_count', 'failure_count')
+SCHEDULE_FIELDS = ('maintenance_log_id', 'last_maintenance_date', 'next_maintenance_date')
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+ON_CONFLICT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+# session.info key of the deltas waiting for the commit
+PENDING = 'rollup_deltas'
+
+
+def init_rollups(app):
+    """Register rollup maintenance commands with the Flask CLI"""
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(check_rollups_command)
+
+
+def month_key(value):
+    """Rollup bucket for a date/datetime"""
+    return value.strftime('%Y-%m')
+
+
+def _dialect(session):
+    return session.get_bind().dialect.name
+
+
+def _bump(model, key, **deltas):
+    """Add deltas to one rollup row (key: primary key column values) when the transaction commits"""
+    pending = db.session.info.setdefault(PENDING, {})
+    row = (model.__tablename__, tuple(key.values()))
+    if row not in pending:
+        pending[row] = (model, key, {})
+    totals = pending[row][2]
+    for column, delta in deltas.items():
+        if delta:
+            totals[column] = totals.get(column, 0) + delta
+
+
+def _upsert(session, model, key, deltas):
+    """
+    Add deltas to one rollup row, creating it when missing
+    A single upsert statement, so concurrent first writes to a row cannot both insert it
+    """
+    table = model.__table__
+    dialect = _dialect(session)
+    if dialect in ON_CONFLICT_INSERTS:
+        statement = ON_CONFLICT_INSERTS[dialect](table).values({**key, **deltas})
+        session.execute(statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={column: table.c[column] + statement.excluded[column] for column in deltas}
+        ))
+        return
+    if dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(table).values({**key, **deltas})
+        session.execute(statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in deltas}
+        ))
+        return
+
+    result = session.execute(
+        update(table)
+        .where(*[table.c[column] == value for column, value in key.items()])
+        .values({column: table.c[column] + delta for column, delta in deltas.items()})
+    )
+    if result.rowcount == 0:
+        session.execute(insert(table).values({**key, **deltas}))
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_deltas(session):
+    pending = session.info.pop(PENDING, None)
+    for row in sorted(pending or ()):
+        model, key, deltas = pending[row]
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if deltas:
+            _upsert(session, model, key, deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_deltas(session):
+    session.info.pop(PENDING, None)
+
+
+def _bump_equipment(equipment_id, **deltas):
+    _bump(EquipmentStats, {'equipment_id': equipment_id}, **deltas)
+
+
+def _bump_month(month, **deltas):
+    _bump(MonthlyStats, {'month': month}, **deltas)
+
+
+def _bump_equipment_month(equipment_id, month, **deltas):
+    _bump(EquipmentMonthlyStats, {'month': month, 'equipment_id': equipment_id}, **deltas)
+
+
+def _maintenance_deltas(maintenance_type, downtime):
+    repair = maintenance_type == 'Corrective'
+    return {
+        'total_downtime': downtime,
+        'maintenance_count': 1,
+        'repair_downtime': downtime if repair else 0.0,
+        'repair_count': 1 if repair else 0
+    }
+
+
+def _bump_status(status, delta):
+    if status:
+        _bump(EquipmentStatusCount, {'status': status}, count=delta)
+
+
+def _schedule(equipment_id, log_id, maintenance_date, next_maintenance_date):
+    """Make a log the equipment's schedule unless a later log already set it"""
+    if next_maintenance_date is None:
+        return
+
+    table = EquipmentSchedule.__table__
+    values = {
+        'maintenance_log_id': log_id,
+        'last_maintenance_date': maintenance_date,
+        'next_maintenance_date': next_maintenance_date
+    }
+    dialect = _dialect(db.session)
+    if dialect in ON_CONFLICT_INSERTS:
+        statement = ON_CONFLICT_INSERTS[dialect](table).values(equipment_id=equipment_id, **values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['equipment_id'],
+            set_={column: statement.excluded[column] for column in SCHEDULE_FIELDS},
+            where=or_(
+                table.c.last_maintenance_date < statement.excluded.last_maintenance_date,
+                and_(table.c.last_maintenance_date == statement.excluded.last_maintenance_date,
+                     table.c.maintenance_log_id < statement.excluded.maintenance_log_id)
+            )
+        ))
+        return
+
+    result = db.session.execute(
+        update(table)
+        .where(table.c.equipment_id == equipment_id)
+        .where(or_(
+            table.c.last_maintenance_date < maintenance_date,
+            and_(table.c.last_maintenance_date == maintenance_date, table.c.maintenance_log_id < log_id)
+        ))
+        .values(values)
+    )
+    if result.rowcount == 0:
+        exists = db.session.execute(
+            select(table.c.equipment_id).where(table.c.equipment_id == equipment_id)
+        ).first()
+        if not exists:
+            db.session.execute(insert(table).values(equipment_id=equipment_id, **values))
+
+
+def record_maintenance(log):
+    """Account for a new maintenance log (flushed, so it has an id)"""
+    downtime = log.downtime_hours or 0.0
+    _bump_equipment(log.equipment_id, total_downtime=downtime, maintenance_count=1)
+    _bump_month(month_key(log.maintenance_date), total_downtime=downtime, maintenance_count=1)
+    _bump_equipment_month(log.equipment_id, month_key(log.maintenance_date),
+                          **_maintenance_deltas(log.maintenance_type, downtime))
+    _schedule(log.equipment_id, log.id, log.maintenance_date, log.next_maintenance_date)
+
+
+def record_failure(report):
+    """Account for a new failure report"""
+    _bump_equipment(report.equipment_id, failure_count=1,
+                    open_failure_count=0 if report.resolved else 1)
+    _bump_month(month_key(report.reported_date), failure_count=1)
+    _bump_equipment_month(report.equipment_id, month_key(report.reported_date), failure_count=1)
+
+
+def record_resolution_change(report, was_resolved):
+    """Account for a failure report being resolved or reopened"""
+    if bool(report.resolved) != bool(was_resolved):
+        _bump_equipment(report.equipment_id, open_failure_count=1 if was_resolved else -1)
+
+
+def record_status_change(old_status, new_status, count=1):
+    """Account for equipment items entering, leaving or changing status"""
+    if old_status != new_status:
+        _bump_status(old_status, -count)
+        _bump_status(new_status, count)
+
+
+def record_maintenance_batch(rows):
+    """Account for bulk-inserted maintenance log rows (dicts of column values, including id)"""
+    equipment = defaultdict(lambda: dict.fromkeys(('total_downtime', 'maintenance_count'), 0))
+    monthly = defaultdict(lambda: dict.fromkeys(('total_downtime', 'maintenance_count'), 0))
+    equipment_monthly = defaultdict(lambda: dict.fromkeys(EQUIPMENT_MONTHLY_FIELDS, 0))
+    schedules = {}
+    for row in rows:
+        if row.get('next_maintenance_date'):
+            latest = schedules.get(row['equipment_id'])
+            if latest is None or (row['maintenance_date'], row['id']) > (latest['maintenance_date'], latest['id']):
+                schedules[row['equipment_id']] = row
+        downtime = row.get('downtime_hours') or 0.0
+        month = month_key(row['maintenance_date'])
+        for bucket in (equipment[row['equipment_id']], monthly[month]):
+            bucket['total_downtime'] += downtime
+            bucket['maintenance_count'] += 1
+        bucket = equipment_monthly[row['equipment_id'], month]
+        for field, delta in _maintenance_deltas(row['maintenance_type'], downtime).items():
+            bucket[field] += delta
+
+    for equipment_id, deltas in equipment.items():
+        _bump_equipment(equipment_id, **deltas)
+    for month, deltas in monthly.items():
+        _bump_month(month, **deltas)
+    for (equipment_id, month), deltas in equipment_monthly.items():
+        _bump_equipment_month(equipment_id, month, **deltas)
+    for equipment_id, row in schedules.items():
+        _schedule(equipment_id, row['id'], row['maintenance_date'], row['next_maintenance_date'])
+
+
+def record_failure_batch(rows):
+    """Account for bulk-inserted failure report rows (dicts of column values)"""
+    equipment = defaultdict(lambda: dict.fromkeys(('failure_count', 'open_failure_count'), 0))
+    monthly = defaultdict(int)
+    equipment_monthly = defaultdict(int)
+    for row in rows:
+        bucket = equipment[row['equipment_id']]
+        bucket['failure_count'] += 1
+        if not row.get('resolved'):
+            bucket['open_failure_count'] += 1
+        month = month_key(row['reported_date'])
+        monthly[month] += 1
+        equipment_monthly[row['equipment_id'], month] += 1
+
+    for equipment_id, deltas in equipment.items():
+        _bump_equipment(equipment_id, **deltas)
+    for month, count in monthly.items():
+        _bump_month(month, failure_count=count)
+    for (equipment_id, month), count in equipment_monthly.items():
+        _bump_equipment_month(equipment_id, month, failure_count=count)
+
+
+def remove_equipment(equipment):
+    """Subtract an equipment item and its history before it is deleted"""
+    monthly = defaultdict(lambda: dict.fromkeys(MONTHLY_FIELDS, 0))
+
+    logs = db.session.execute(
+        select(MaintenanceLog.maintenance_date, MaintenanceLog.downtime_hours)
+        .where(MaintenanceLog.equipment_id == equipment.id)
+    )
+    for maintenance_date, downtime in logs:
+        bucket = monthly[month_key(maintenance_date)]
+        bucket['total_downtime'] -= downtime or 0.0
+        bucket['maintenance_count'] -= 1
+
+    reports = db.session.execute(
+        select(FailureReport.reported_date).where(FailureReport.equipment_id == equipment.id)
+    )
+    for (reported_date,) in reports:
+        monthly[month_key(reported_date)]['failure_count'] -= 1
+
+    for month, deltas in monthly.items():
+        _bump_month(month, **deltas)
+
+    # Its rows are deleted now, so deltas still waiting for the commit must not recreate them
+    pending = db.session.info.get(PENDING, {})
+    for row in [row for row, (_, key, _) in pending.items() if key.get('equipment_id') == equipment.id]:
+        del pending[row]
+
+    db.session.execute(delete(EquipmentStats).where(EquipmentStats.equipment_id == equipment.id))
+    db.session.execute(delete(EquipmentMonthlyStats).where(EquipmentMonthlyStats.equipment_id == equipment.id))
+    db.session.execute(delete(EquipmentSchedule).where(EquipmentSchedule.equipment_id == equipment.id))
+    record_status_change(equipment.status, None)
+
+
+def compute_rollups(executor=None):
+    """
+    Recompute all rollups from the raw tables
+
+    Returns:
+        (equipment_stats, monthly_stats, equipment_monthly_stats, schedules, status_counts)
+        keyed like the rollup tables
+    """
+    executor = executor or db.session
+    equipment_stats = defaultdict(lambda: dict.fromkeys(EQUIPMENT_FIELDS, 0))
+    monthly_stats = defaultdict(lambda: dict.fromkeys(MONTHLY_FIELDS, 0))
+    equipment_monthly_stats = defaultdict(lambda: dict.fromkeys(EQUIPMENT_MONTHLY_FIELDS, 0))
+
+    maintenance = executor.execute(
+        select(
+            MaintenanceLog.equipment_id,
+            func.coalesce(func.sum(MaintenanceLog.downtime_hours), 0.0),
+            func.count(MaintenanceLog.id)
+        ).group_by(MaintenanceLog.equipment_id)
+    )
+    for equipment_id, downtime, count in maintenance:
+        equipment_stats[equipment_id].update(total_downtime=float(downtime), maintenance_count=count)
+
+    failures = executor.execute(
+        select(
+            FailureReport.equipment_id,
+            func.count(FailureReport.id),
+            func.sum(case((FailureReport.resolved.is_(True), 0), else_=1))
+        ).group_by(FailureReport.equipment_id)
+    )
+    for equipment_id, count, open_count in failures:
+        equipment_stats[equipment_id].update(failure_count=count, open_failure_count=open_count)
+
+    # Month bucketing in Python keeps the rebuild portable across databases
+    logs = executor.execute(
+        select(MaintenanceLog.equipment_id, MaintenanceLog.maintenance_type,
+               MaintenanceLog.maintenance_date, MaintenanceLog.downtime_hours)
+        .execution_options(yield_per=10000)
+    )
+    for equipment_id, maintenance_type, maintenance_date, downtime in logs:
+        month = month_key(maintenance_date)
+        bucket = monthly_stats[month]
+        bucket['total_downtime'] += downtime or 0.0
+        bucket['maintenance_count'] += 1
+        bucket = equipment_monthly_stats[equipment_id, month]
+        for field, delta in _maintenance_deltas(maintenance_type, downtime or 0.0).items():
+            bucket[field] += delta
+
+    reports = executor.execute(
+        select(FailureReport.equipment_id, FailureReport.reported_date).execution_options(yield_per=10000)
+    )
+    for equipment_id, reported_date in reports:
+        month = month_key(reported_date)
+        monthly_stats[month]['failure_count'] += 1
+        equipment_monthly_stats[equipment_id, month]['failure_count'] += 1
+
+    # Latest scheduling log per equipment: the last row per equipment wins
+    schedules = {}
+    scheduling_logs = executor.execute(
+        select(MaintenanceLog.equipment_id, MaintenanceLog.id,
+               MaintenanceLog.maintenance_date, MaintenanceLog.next_maintenance_date)
+        .where(MaintenanceLog.next_maintenance_date.isnot(None))
+        .order_by(MaintenanceLog.equipment_id, MaintenanceLog.maintenance_date, MaintenanceLog.id)
+        .execution_options(yield_per=10000)
+    )
+    for equipment_id, log_id, maintenance_date, next_maintenance_date in scheduling_logs:
+        schedules[equipment_id] = {
+            'maintenance_log_id': log_id,
+            'last_maintenance_date': maintenance_date,
+            'next_maintenance_date': next_maintenance_date
+        }
+
+    status_counts = dict(executor.execute(
+        select(Equipment.status, func.count(Equipment.id)).group_by(Equipment.status)
+    ).all())
+
+    return dict(equipment_stats), dict(monthly_stats), dict(equipment_monthly_stats), schedules, status_counts
+
+
+def rebuild_rollups(executor=None):
+    """Replace the rollup tables with values computed from the raw tables"""
+    executor = executor or db.session
+    equipment_stats, monthly_stats, equipment_monthly_stats, schedules, status_counts = compute_rollups(executor)
+
+    executor.execute(delete(EquipmentStats))
+    executor.execute(delete(MonthlyStats))
+    executor.execute(delete(EquipmentMonthlyStats))
+    executor.execute(delete(EquipmentSchedule))
+    executor.execute(delete(EquipmentStatusCount))
+
+    if equipment_stats:
+        executor.execute(insert(EquipmentStats), [
+            {'equipment_id': equipment_id, **values}
+            for equipment_id, values in equipment_stats.items()
+        ])
+    if monthly_stats:
+        executor.execute(insert(MonthlyStats), [
+            {'month': month, **values} for month, values in monthly_stats.items()
+        ])
+    if equipment_monthly_stats:
+        executor.execute(insert(EquipmentMonthlyStats), [
+            {'equipment_id': equipment_id, 'month': month, **values}
+            for (equipment_id, month), values in equipment_monthly_stats.items()
+        ])
+    if schedules:
+        executor.execute(insert(EquipmentSchedule), [
+            {'equipment_id': equipment_id, **values} for equipment_id, values in schedules.items()
+        ])
+    if status_counts:
+        executor.execute(insert(EquipmentStatusCount), [
+            {'status': status, 'count': count} for status, count in status_counts.items()
+        ])
+
+    # Core statements bypass the ORM commit hooks that normally invalidate reports
+    # and stamp tables; the schedule list reads the rebuilt schedule
+    from cache import report_cache
+    from conditional import bump
+    report_cache.invalidate('equipment', 'maintenance', 'failures')
+    bump(['maintenance'], executor)
+
+
+def check_rollups():
+    """
+    Compare the rollup tables against the raw tables
+
+    Returns:
+        list of human-readable mismatch descriptions (empty when consistent)
+    """
+    (expected_equipment, expected_monthly, expected_equipment_monthly,
+     expected_schedules, expected_status) = compute_rollups()
+    problems = []
+
+    def compare(label, expected, stored, fields):
+        for key in sorted(set(expected) | set(stored), key=str):
+            want = expected.get(key, dict.fromkeys(fields, 0))
+            have = stored.get(key, dict.fromkeys(fields, 0))
+            for field in fields:
+                if abs((want[field] or 0) - (have[field] or 0)) > 1e-6:
+                    problems.append(f"{label} {key}: {field} is {have[field]}, expected {want[field]}")
+
+    compare('equipment', expected_equipment, {
+        row.equipment_id: {field: getattr(row, field) for field in EQUIPMENT_FIELDS}
+        for row in EquipmentStats.query.all()
+    }, EQUIPMENT_FIELDS)
+
+    compare('month', expected_monthly, {
+        row.month: {field: getattr(row, field) for field in MONTHLY_FIELDS}
+        for row in MonthlyStats.query.all()
+    }, MONTHLY_FIELDS)
+
+    compare('equipment month', expected_equipment_monthly, {
+        (row.equipment_id, row.month): {field: getattr(row, field) for field in EQUIPMENT_MONTHLY_FIELDS}
+        for row in EquipmentMonthlyStats.query.all()
+    }, EQUIPMENT_MONTHLY_FIELDS)
+
+    stored_schedules = {
+        row.equipment_id: {field: getattr(row, field) for field in SCHEDULE_FIELDS}
+        for row in EquipmentSchedule.query.all()
+    }
+    for equipment_id in sorted(set(expected_schedules) | set(stored_schedules)):
+        want = expected_schedules.get(equipment_id)
+        have = stored_schedules.get(equipment_id)
+        if want != have:
+            problems.append(f"schedule {equipment_id}: is {have}, expected {want}")
+
+    compare('status', {status: {'count': count} for status, count in expected_status.items()}, {
+        row.status: {'count': row.count} for row in EquipmentStatusCount.query.all()
+    }, ('count',))
+
+    return problems
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the dashboard rollup tables from the raw tables"""
+    rebuild_rollups()
+    db.session.commit()
+    print("Rollup tables rebuilt")
+
+
+@click.command('check-rollups')
+@with_appcontext
+def check_rollups_command():
+    """Verify the dashboard rollup tables against the raw tables"""
+    problems = check_rollups()
+    for problem in problems:
+        print(problem)
+    if problems:
+        raise SystemExit(f"{len(problems)} rollup mismatches found")
+    print("Rollup tables are consistent")
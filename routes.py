@@ -1,11 +1,40 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from functools import wraps
 from datetime import datetime, timedelta
 from sqlalchemy import func
-from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+from database import read_only
+from replica import replica_read
+from user_cache import last_login_writer
+from models import (db, Technician, Equipment, MaintenanceLog, FailureReport,
+                    EquipmentStats, MonthlyStats, EquipmentSchedule, EquipmentStatusCount)
+from pagination import wants_page, page_limit, paginate
+import rollups
+from cache import report_cache, cached_report
+from conditional import conditional_list
+from bulk_import import BulkImporter, iter_records, IMPORT_KINDS
+from exports import build_export_query, stream_export, EXPORT_KINDS, EXPORT_FORMATS
+from search import search, SEARCH_KINDS
+from reliability import reliability_report
+from downtime import downtime_report, DEFAULT_SERIES_LIMIT, MAX_SERIES_LIMIT
+from events import event_hub, queue_event, queue_status_change
+from passwords import PasswordHasherBusy
+from ratelimit import rate_limited, admit_request, release_request
+from instrumentation import metrics, scrape_authorized
+from serializers import (json_response, stream_array, TECHNICIAN, EQUIPMENT, MAINTENANCE_LOG,
+                         FAILURE_REPORT, EQUIPMENT_SCHEDULE)
+import io
 
 api = Blueprint('api', __name__)
+api.before_request(admit_request)  # Concurrency cap and per-user write limit
+api.teardown_request(release_request)
+
+
+@api.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    """Login/signup burst beyond the hashing pool: ask the client to retry"""
+    db.session.rollback()
+    return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
 
 # Role-based access control decorator
 def admin_required(f):
@@ -17,8 +46,32 @@ def admin_required(f):
     return decorated_function
 
 
+def list_response(projection, query, columns, descending=True):
+    """
+    Serialize a projection query (see serializers.py) ordered by its keyset columns
+    Returns one keyset page when the client sends limit/cursor,
+    otherwise the full list as before, streamed in chunks.
+    """
+    if not wants_page(request.args):
+        ordering = [column.desc() if descending else column.asc() for column in columns]
+        return stream_array(projection, query.order_by(*ordering))
+    
+    limit = page_limit(request.args)
+    try:
+        items, next_cursor = paginate(query, columns, limit, request.args.get('cursor'), descending)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'items': projection.dicts(items),
+        'limit': limit,
+        'next_cursor': next_cursor
+    })
+
+
 # Authentication endpoints
 @api.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     """User login"""
     data = request.get_json()
@@ -34,8 +87,13 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated. Contact administrator.'}), 403
         
+        # Upgrade hashes made with older parameters while the password is at hand
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        
         login_user(user)
-        user.update_last_login()
+        last_login_writer.record(user)
         return jsonify({
             'message': 'Login successful',
             'user': user.to_dict()
@@ -63,10 +121,11 @@ def get_current_user():
 @api.route('/users', methods=['GET'])
 @login_required
 @admin_required
+@read_only
+@conditional_list('users', 'logins')
 def get_users():
     """Get all users (admin only)"""
-    users = Technician.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+    return list_response(TECHNICIAN, TECHNICIAN.select(), [Technician.id], descending=False)
 
 
 @api.route('/users', methods=['POST'])
@@ -159,6 +218,7 @@ def toggle_user_active(user_id):
 
 # Public Signup endpoint
 @api.route('/signup', methods=['POST'])
+@rate_limited('signup')
 def signup():
     """Public user registration"""
     data = request.get_json()
@@ -202,39 +262,46 @@ def signup():
 # Equipment endpoints
 @api.route('/equipment', methods=['GET'])
 @login_required
+@read_only
+@conditional_list('equipment')
 def get_equipment():
     """Get all equipment with optional filters"""
     status = request.args.get('status')
     equipment_type = request.args.get('type')
     
-    query = Equipment.query
+    query = EQUIPMENT.select()
     
     if status:
-        query = query.filter_by(status=status)
+        query = query.where(Equipment.status == status)
     if equipment_type:
-        query = query.filter_by(type=equipment_type)
+        query = query.where(Equipment.type == equipment_type)
     
-    equipment_list = query.all()
-    return jsonify([eq.to_dict() for eq in equipment_list]), 200
+    return list_response(EQUIPMENT, query, [Equipment.id], descending=False)
 
 
 @api.route('/equipment/<int:equipment_id>', methods=['GET'])
 @login_required
+@read_only
+@conditional_list('equipment', 'maintenance', 'failures', 'users')
 def get_equipment_detail(equipment_id):
     """Get equipment details with maintenance history"""
     equipment = Equipment.query.get_or_404(equipment_id)
     
     # Get maintenance logs
-    maintenance_logs = MaintenanceLog.query.filter_by(equipment_id=equipment_id).order_by(MaintenanceLog.maintenance_date.desc()).all()
+    maintenance_logs = db.session.execute(
+        MAINTENANCE_LOG.select().where(MaintenanceLog.equipment_id == equipment_id).order_by(MaintenanceLog.maintenance_date.desc())
+    )
     
     # Get failure reports
-    failure_reports = FailureReport.query.filter_by(equipment_id=equipment_id).order_by(FailureReport.reported_date.desc()).all()
+    failure_reports = db.session.execute(
+        FAILURE_REPORT.select().where(FailureReport.equipment_id == equipment_id).order_by(FailureReport.reported_date.desc())
+    )
     
-    return jsonify({
+    return json_response({
         'equipment': equipment.to_dict(),
-        'maintenance_logs': [log.to_dict() for log in maintenance_logs],
-        'failure_reports': [report.to_dict() for report in failure_reports]
-    }), 200
+        'maintenance_logs': MAINTENANCE_LOG.dicts(maintenance_logs),
+        'failure_reports': FAILURE_REPORT.dicts(failure_reports)
+    })
 
 
 @api.route('/equipment', methods=['POST'])
@@ -270,6 +337,9 @@ def create_equipment():
     )
     
     db.session.add(equipment)
+    db.session.flush()  # Assign equipment.id for the event
+    rollups.record_status_change(None, equipment.status)
+    queue_status_change(equipment, None, equipment.status)
     db.session.commit()
     
     return jsonify(equipment.to_dict()), 201
@@ -282,6 +352,7 @@ def update_equipment(equipment_id):
     """Update equipment (admin only)"""
     equipment = Equipment.query.get_or_404(equipment_id)
     data = request.get_json()
+    previous_status = equipment.status
     
     # Update fields
     if 'name' in data:
@@ -304,6 +375,8 @@ def update_equipment(equipment_id):
         except ValueError:
             return jsonify({'error': 'Invalid installation_date format'}), 400
     
+    rollups.record_status_change(previous_status, equipment.status)
+    queue_status_change(equipment, previous_status, equipment.status)
     db.session.commit()
     return jsonify(equipment.to_dict()), 200
 
@@ -314,6 +387,8 @@ def update_equipment(equipment_id):
 def delete_equipment(equipment_id):
     """Delete equipment (admin only)"""
     equipment = Equipment.query.get_or_404(equipment_id)
+    rollups.remove_equipment(equipment)
+    queue_status_change(equipment, equipment.status, None)
     db.session.delete(equipment)
     db.session.commit()
     return jsonify({'message': 'Equipment deleted'}), 200
@@ -322,17 +397,18 @@ def delete_equipment(equipment_id):
 # Maintenance endpoints
 @api.route('/maintenance', methods=['GET'])
 @login_required
+@read_only
+@conditional_list('maintenance', 'equipment', 'users')
 def get_maintenance_logs():
     """Get all maintenance logs"""
     equipment_id = request.args.get('equipment_id', type=int)
     
-    query = MaintenanceLog.query
+    query = MAINTENANCE_LOG.select()
     
     if equipment_id:
-        query = query.filter_by(equipment_id=equipment_id)
+        query = query.where(MaintenanceLog.equipment_id == equipment_id)
     
-    logs = query.order_by(MaintenanceLog.maintenance_date.desc()).all()
-    return jsonify([log.to_dict() for log in logs]), 200
+    return list_response(MAINTENANCE_LOG, query, [MaintenanceLog.maintenance_date, MaintenanceLog.id])
 
 
 @api.route('/maintenance', methods=['POST'])
@@ -379,31 +455,67 @@ def create_maintenance_log():
     )
     
     # Business logic: Update equipment status to Active after maintenance
+    rollups.record_status_change(equipment.status, 'Active')
+    queue_status_change(equipment, equipment.status, 'Active')
     equipment.status = 'Active'
     
     db.session.add(log)
+    db.session.flush()  # Assign log.id for the schedule
+    rollups.record_maintenance(log)
+    queue_event('maintenance.created', log.to_dict())
     db.session.commit()
     
     return jsonify(log.to_dict()), 201
 
 
+# Maintenance schedule endpoint
+@api.route('/schedule', methods=['GET'])
+@login_required
+@read_only
+@conditional_list('maintenance', 'equipment', 'users', daily=True)
+def get_schedule():
+    """
+    Equipment due for maintenance, soonest first
+    Query params: window (days ahead, default 7), overdue (true to include
+    overdue items), plus limit/cursor for keyset pages
+    """
+    window = request.args.get('window', 7, type=int)
+    if window is None or window < 0:
+        return jsonify({'error': 'window must be a non-negative number of days'}), 400
+    
+    today = datetime.utcnow().date()
+    query = EQUIPMENT_SCHEDULE.select().where(
+        EquipmentSchedule.next_maintenance_date <= today + timedelta(days=window)
+    )
+    if request.args.get('overdue', 'false').lower() != 'true':
+        query = query.where(EquipmentSchedule.next_maintenance_date >= today)
+    
+    return list_response(
+        EQUIPMENT_SCHEDULE,
+        query,
+        [EquipmentSchedule.next_maintenance_date, EquipmentSchedule.equipment_id],
+        descending=False
+    )
+
+
 # Failure report endpoints
 @api.route('/failures', methods=['GET'])
 @login_required
+@read_only
+@conditional_list('failures', 'equipment', 'users')
 def get_failure_reports():
     """Get all failure reports"""
     equipment_id = request.args.get('equipment_id', type=int)
     resolved = request.args.get('resolved')
     
-    query = FailureReport.query
+    query = FAILURE_REPORT.select()
     
     if equipment_id:
-        query = query.filter_by(equipment_id=equipment_id)
+        query = query.where(FailureReport.equipment_id == equipment_id)
     if resolved is not None:
-        query = query.filter_by(resolved=resolved.lower() == 'true')
+        query = query.where(FailureReport.resolved == (resolved.lower() == 'true'))
     
-    reports = query.order_by(FailureReport.reported_date.desc()).all()
-    return jsonify([report.to_dict() for report in reports]), 200
+    return list_response(FAILURE_REPORT, query, [FailureReport.reported_date, FailureReport.id])
 
 
 @api.route('/failures', methods=['POST'])
@@ -434,9 +546,12 @@ def create_failure_report():
     
     # Business logic: If severity is High, set equipment status to Out of Service
     if data['severity'] == 'High':
+        rollups.record_status_change(equipment.status, 'Out of Service')
+        queue_status_change(equipment, equipment.status, 'Out of Service')
         equipment.status = 'Out of Service'
         
-        # Send critical failure email alert
+        # Queue critical failure email alert; it is committed with the
+        # report and sent by the outbox worker, never inline
         try:
             from flask import current_app
             if current_app.config.get('MAIL_ENABLED'):
@@ -446,6 +561,9 @@ def create_failure_report():
             print(f"Email alert error: {str(e)}")
     
     db.session.add(report)
+    db.session.flush()  # Assigns reported_date
+    rollups.record_failure(report)
+    queue_event('failure.created', report.to_dict())
     db.session.commit()
     
     return jsonify(report.to_dict()), 201
@@ -459,60 +577,251 @@ def update_failure_report(failure_id):
     data = request.get_json()
     
     if 'resolved' in data:
+        was_resolved = report.resolved
         report.resolved = data['resolved']
+        rollups.record_resolution_change(report, was_resolved)
+        if report.resolved != was_resolved:
+            queue_event('failure.resolved' if report.resolved else 'failure.reopened', report.to_dict())
     
     db.session.commit()
     return jsonify(report.to_dict()), 200
 
 
+# Live update stream
+@api.route('/events', methods=['GET'])
+@login_required
+def event_stream():
+    """
+    Server-Sent Events stream of equipment status, maintenance and failure changes
+    Browsers reconnect with Last-Event-ID and receive the events they missed,
+    or a 'reset' event when those are no longer buffered.
+    """
+    after_id = event_hub.parse_id(request.headers.get('Last-Event-ID'))
+    stream = event_hub.stream(
+        after_id,
+        keepalive=current_app.config['EVENTS_KEEPALIVE_SECONDS'],
+        duration=current_app.config['EVENTS_STREAM_SECONDS']
+    )
+    # No stream_with_context: the stream needs neither the request nor a
+    # database session, so both are released while the client stays connected
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Let nginx pass events through unbuffered
+    })
+
+
+# Search endpoint
+@api.route('/search', methods=['GET'])
+@login_required
+@read_only
+def search_records():
+    """
+    Ranked full-text search over equipment, maintenance and failure descriptions
+    Query params: q, kind (equipment/maintenance/failures), limit, offset
+    """
+    try:
+        query, kind, limit, offset = search_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    hits, has_more = search(query, kind=kind, limit=limit, offset=offset)
+    return jsonify(search_response(query, hits, has_more, limit, offset)), 200
+
+
+# Request parsing shared with the async views in asgi.py
+def search_args(args):
+    """(query, kind, limit, offset) from search query params; ValueError if invalid"""
+    query = args.get('q', '').strip()
+    if not query:
+        raise ValueError('q is required')
+    
+    kind = args.get('kind')
+    if kind and kind not in SEARCH_KINDS:
+        raise ValueError(f'kind must be one of {", ".join(SEARCH_KINDS)}')
+    
+    return query, kind, page_limit(args), max(args.get('offset', 0, type=int), 0)
+
+
+def search_response(query, hits, has_more, limit, offset):
+    return {
+        'query': query,
+        'items': hits,
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + limit if has_more else None
+    }
+
+
+def downtime_args(args):
+    """downtime_report arguments from query params; ValueError if invalid"""
+    try:
+        start = args.get('from')
+        start = datetime.fromisoformat(start).date() if start else None
+        end = args.get('to')
+        end = datetime.fromisoformat(end).date() if end else None
+    except ValueError:
+        raise ValueError('Invalid from/to date format')
+    
+    limit = args.get('limit', DEFAULT_SERIES_LIMIT, type=int)
+    return {
+        'start': start,
+        'end': end,
+        'bucket': args.get('bucket', 'month'),
+        'group_by': args.get('group_by') or None,
+        'limit': max(1, min(limit, MAX_SERIES_LIMIT))
+    }
+
+
+def downtime_tags(args):
+    """Cache tags of a downtime report: grouped reports also depend on equipment"""
+    return ['maintenance', 'equipment'] if args.get('group_by') else ['maintenance']
+
+
+def downtime_response(report):
+    # Ungrouped monthly reports keep the original response key
+    if report['bucket'] == 'month' and not report['group_by']:
+        series = report['series'][0]
+        report['downtime_by_month'] = [
+            {'month': month[:7], 'downtime': downtime}
+            for month, downtime in zip(report['buckets'], series['downtime'])
+        ]
+    return report
+
+
+# Bulk import endpoint
+@api.route('/import/<kind>', methods=['POST'])
+@login_required
+@admin_required
+def bulk_import(kind):
+    """
+    Stream a CSV or NDJSON upload into equipment, maintenance or failures (admin only)
+    Send the file as the raw request body (Content-Type text/csv or
+    application/x-ndjson) or as a multipart 'file' field.
+    """
+    if kind not in IMPORT_KINDS:
+        return jsonify({'error': f'Unknown import kind: {kind}'}), 404
+    
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'ndjson' if 'json' in (request.mimetype or '') else 'csv'
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    if 'file' in request.files:
+        stream = request.files['file'].stream
+    else:
+        stream = io.BufferedReader(request.stream)
+    
+    batch_size = request.args.get('batch_size', 5000, type=int)
+    importer = BulkImporter(kind, default_technician_id=current_user.id,
+                            batch_size=max(1, min(batch_size, 50000)))
+    summary = importer.run(iter_records(stream, fmt))
+    return jsonify(summary), 200
+
+
+# Export endpoints
+@api.route('/export/<kind>', methods=['GET'])
+@login_required
+@read_only
+def export_records(kind):
+    """
+    Stream maintenance history or failure reports as CSV or NDJSON
+    Accepts the list filters (equipment_id, resolved) plus from/to dates.
+    """
+    if kind not in EXPORT_KINDS:
+        return jsonify({'error': f'Unknown export kind: {kind}'}), 404
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    try:
+        date_from = request.args.get('from')
+        date_from = datetime.fromisoformat(date_from).date() if date_from else None
+        date_to = request.args.get('to')
+        date_to = datetime.fromisoformat(date_to).date() if date_to else None
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to date format'}), 400
+    
+    resolved = request.args.get('resolved')
+    query = build_export_query(
+        kind,
+        equipment_id=request.args.get('equipment_id', type=int),
+        resolved=resolved.lower() == 'true' if resolved is not None else None,
+        date_from=date_from,
+        date_to=date_to
+    )
+    
+    filename = f"{kind}-export-{datetime.utcnow().strftime('%Y%m%d')}.{fmt}"
+    return Response(
+        stream_with_context(stream_export(query, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
 # Reports endpoints
 @api.route('/reports/dashboard', methods=['GET'])
 @login_required
+@cached_report(lambda: ['equipment', 'maintenance', 'failures'])
+@read_only
+@replica_read
 def get_dashboard_data():
     """Get dashboard KPIs and analytics"""
     
-    # Total equipment by status
-    equipment_counts = db.session.query(
-        Equipment.status,
-        func.count(Equipment.id)
-    ).group_by(Equipment.status).all()
+    # KPIs come from the rollup tables (see rollups.py), which the write
+    # routes keep current, so nothing here scans the fact tables
     
-    equipment_by_status = {status: count for status, count in equipment_counts}
+    # Total equipment by status
+    equipment_by_status = {
+        row.status: row.count
+        for row in EquipmentStatusCount.query.filter(EquipmentStatusCount.count > 0)
+    }
     
     # Active failures
-    active_failures = FailureReport.query.filter_by(resolved=False).count()
+    active_failures = db.session.query(
+        func.sum(EquipmentStats.open_failure_count)
+    ).scalar() or 0
     
-    # Upcoming preventive maintenance (next 30 days)
+    # Upcoming preventive maintenance (next 30 days) and overdue, from each
+    # equipment's current schedule so superseded log dates are not counted
     today = datetime.utcnow().date()
     upcoming_date = today + timedelta(days=30)
-    upcoming_maintenance = MaintenanceLog.query.filter(
-        MaintenanceLog.next_maintenance_date.between(today, upcoming_date)
+    upcoming_maintenance = EquipmentSchedule.query.filter(
+        EquipmentSchedule.next_maintenance_date.between(today, upcoming_date)
+    ).count()
+    overdue_maintenance = EquipmentSchedule.query.filter(
+        EquipmentSchedule.next_maintenance_date < today
     ).count()
     
     # Total downtime this month
-    first_day_of_month = today.replace(day=1)
     total_downtime = db.session.query(
-        func.sum(MaintenanceLog.downtime_hours)
+        func.sum(MonthlyStats.total_downtime)
     ).filter(
-        MaintenanceLog.maintenance_date >= first_day_of_month
+        MonthlyStats.month >= rollups.month_key(today)
     ).scalar() or 0
     
     # Downtime by equipment (for chart)
     downtime_by_equipment = db.session.query(
         Equipment.name,
-        func.sum(MaintenanceLog.downtime_hours).label('total_downtime')
-    ).join(MaintenanceLog).group_by(Equipment.id).all()
+        EquipmentStats.total_downtime
+    ).join(EquipmentStats).filter(
+        EquipmentStats.maintenance_count > 0
+    ).order_by(Equipment.id).all()
     
     # Failure frequency by equipment
     failures_by_equipment = db.session.query(
         Equipment.name,
-        func.count(FailureReport.id).label('failure_count')
-    ).join(FailureReport).group_by(Equipment.id).all()
+        EquipmentStats.failure_count
+    ).join(EquipmentStats).filter(
+        EquipmentStats.failure_count > 0
+    ).order_by(Equipment.id).all()
     
     return jsonify({
         'equipment_by_status': equipment_by_status,
         'active_failures': active_failures,
         'upcoming_maintenance': upcoming_maintenance,
+        'overdue_maintenance': overdue_maintenance,
         'total_downtime': float(total_downtime),
         'downtime_by_equipment': [
             {'equipment': name, 'downtime': float(downtime)}
@@ -527,46 +836,98 @@ def get_dashboard_data():
 
 @api.route('/reports/equipment/<int:equipment_id>', methods=['GET'])
 @login_required
+@cached_report(lambda equipment_id: [f'equipment:{equipment_id}', 'users'])
+@read_only
+@replica_read
 def get_equipment_report(equipment_id):
     """Get detailed equipment maintenance history report"""
     equipment = Equipment.query.get_or_404(equipment_id)
     
     # Get all maintenance logs
-    maintenance_logs = MaintenanceLog.query.filter_by(
-        equipment_id=equipment_id
-    ).order_by(MaintenanceLog.maintenance_date.desc()).all()
+    maintenance_logs = MAINTENANCE_LOG.dicts(db.session.execute(
+        MAINTENANCE_LOG.select().where(MaintenanceLog.equipment_id == equipment_id).order_by(MaintenanceLog.maintenance_date.desc())
+    ))
     
     # Get all failure reports
-    failure_reports = FailureReport.query.filter_by(
-        equipment_id=equipment_id
-    ).order_by(FailureReport.reported_date.desc()).all()
+    failure_reports = FAILURE_REPORT.dicts(db.session.execute(
+        FAILURE_REPORT.select().where(FailureReport.equipment_id == equipment_id).order_by(FailureReport.reported_date.desc())
+    ))
     
     # Calculate total downtime
-    total_downtime = sum(log.downtime_hours for log in maintenance_logs)
+    total_downtime = sum(log['downtime_hours'] for log in maintenance_logs)
     
-    return jsonify({
+    return json_response({
         'equipment': equipment.to_dict(),
-        'maintenance_logs': [log.to_dict() for log in maintenance_logs],
-        'failure_reports': [report.to_dict() for report in failure_reports],
+        'maintenance_logs': maintenance_logs,
+        'failure_reports': failure_reports,
         'total_downtime': total_downtime,
         'total_maintenance_count': len(maintenance_logs),
         'total_failure_count': len(failure_reports)
-    }), 200
+    })
 
 
 @api.route('/reports/downtime', methods=['GET'])
 @login_required
+@cached_report(lambda: downtime_tags(request.args))
+@read_only
+@replica_read
 def get_downtime_report():
-    """Get downtime analysis"""
-    # Downtime by month
-    downtime_by_month = db.session.query(
-        func.strftime('%Y-%m', MaintenanceLog.maintenance_date).label('month'),
-        func.sum(MaintenanceLog.downtime_hours).label('total_downtime')
-    ).group_by('month').order_by('month').all()
+    """
+    Get downtime analysis
+    Query params: from, to (dates, default last 365 days), bucket (day/week/month),
+    group_by (equipment/type/location), limit (grouped series to return)
+    """
+    try:
+        report = downtime_report(**downtime_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'downtime_by_month': [
-            {'month': month, 'downtime': float(downtime)}
-            for month, downtime in downtime_by_month
-        ]
-    }), 200
+    return jsonify(downtime_response(report)), 200
+
+
+@api.route('/reports/reliability', methods=['GET'])
+@login_required
+@cached_report(lambda: ['equipment', 'maintenance', 'failures'])
+@read_only
+@replica_read
+def get_reliability_report():
+    """
+    MTBF, MTTR, availability and monthly failure trend
+    Query params: from, to (dates, rounded to whole months; default last 12 months),
+    group_by (equipment/type/location)
+    """
+    try:
+        start = request.args.get('from')
+        start = datetime.fromisoformat(start).date() if start else None
+        end = request.args.get('to')
+        end = datetime.fromisoformat(end).date() if end else None
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to date format'}), 400
+    
+    try:
+        report = reliability_report(start, end, request.args.get('group_by', 'equipment'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(report), 200
+
+
+@api.route('/reports/cache-stats', methods=['GET'])
+@login_required
+@admin_required
+def get_report_cache_stats():
+    """Report cache hit/miss/eviction counters (admin only)"""
+    return jsonify(report_cache.stats()), 200
+
+
+@api.route('/admin/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics of this process (admins, or scrapers sending METRICS_TOKEN)"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Instrumentation is disabled'}), 404
+    if not scrape_authorized(current_app):
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Unauthorized access'}), 401
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,198 @@
+"""
+In-process job scheduler for reminders and daily summaries
+Each job has a schedule in Config.SCHEDULER_JOBS ('every 30m', 'every 2h',
+'daily 06:00' in UTC) and a row in job_runs holding its last run time, the
+last business date it fully processed (watermark) and a lease lock. The lock
+is taken with a conditional UPDATE, so when several gunicorn workers run the
+scheduler only one of them executes a given job at a time.
+"""
+import os
+import re
+import socket
+import threading
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from models import db, JobRun
+
+JOB_LEASE = timedelta(minutes=30)
+
+JOBS = {}
+
+
+def job(name):
+    """Register a scheduled job; it receives (watermark, today)"""
+    def register(func):
+        JOBS[name] = func
+        return func
+    return register
+
+
+@job('maintenance_reminders')
+def run_maintenance_reminders(watermark, today):
+    from email_service import check_and_send_maintenance_reminders
+
+    if watermark is not None and watermark >= today:
+        return  # Already covered today
+
+    # Catch up on every day missed since the watermark in one range query
+    max_days = current_app.config['SCHEDULER_MAX_CATCHUP_DAYS']
+    first_day = today if watermark is None else max(watermark + timedelta(days=1), today - timedelta(days=max_days))
+    check_and_send_maintenance_reminders(
+        first_day + timedelta(days=7),
+        today + timedelta(days=7),
+        today
+    )
+
+
+@job('daily_summary')
+def run_daily_summary(watermark, today):
+    from email_service import send_daily_summary
+
+    # A summary describes the current state, so missed days are not replayed
+    if watermark is None or watermark < today:
+        send_daily_summary(today)
+
+
+def parse_schedule(spec):
+    """
+    Parse a schedule spec
+
+    Returns:
+        ('every', timedelta) or ('daily', (hour, minute))
+    """
+    match = re.fullmatch(r'\s*every\s+(\d+)\s*([smh])\s*', spec)
+    if match:
+        unit = {'s': 'seconds', 'm': 'minutes', 'h': 'hours'}[match.group(2)]
+        return 'every', timedelta(**{unit: int(match.group(1))})
+
+    match = re.fullmatch(r'\s*daily\s+(\d{1,2}):(\d{2})\s*', spec)
+    if match:
+        return 'daily', (int(match.group(1)), int(match.group(2)))
+
+    raise ValueError(f"Invalid schedule: {spec!r}")
+
+
+def is_due(spec, last_run_at, now):
+    """Whether a job with this schedule should run now"""
+    kind, value = parse_schedule(spec)
+    if kind == 'every':
+        return last_run_at is None or now - last_run_at >= value
+
+    slot = now.replace(hour=value[0], minute=value[1], second=0, microsecond=0)
+    return now >= slot and (last_run_at is None or last_run_at < slot)
+
+
+def _job_state(name):
+    state = db.session.get(JobRun, name)
+    if state is None:
+        try:
+            state = JobRun(name=name)
+            db.session.add(state)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            state = db.session.get(JobRun, name)
+    return state
+
+
+def _acquire(name, now):
+    result = db.session.execute(
+        update(JobRun)
+        .where(JobRun.name == name)
+        .where(or_(JobRun.locked_until.is_(None), JobRun.locked_until < now))
+        # pid is read here, not at import, so forked workers get distinct ids
+        .values(locked_by=f'{socket.gethostname()}:{os.getpid()}', locked_until=now + JOB_LEASE)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def run_job(name, force=False):
+    """
+    Run one job if it is due (or forced) and no other worker holds its lock
+
+    Returns:
+        True if the job ran successfully
+    """
+    now = datetime.utcnow()
+    state = _job_state(name)
+    spec = current_app.config['SCHEDULER_JOBS'][name]
+
+    if not force and not is_due(spec, state.last_run_at, now):
+        return False
+    if not _acquire(name, now):
+        return False
+
+    db.session.refresh(state)
+    today = now.date()
+    try:
+        # A forced run ignores the watermark so the job does its normal daily work
+        JOBS[name](None if force else state.watermark, today)
+    except Exception as e:
+        db.session.rollback()
+        state = db.session.get(JobRun, name)
+        state.last_error = str(e)
+        state.locked_by = None
+        state.locked_until = None
+        db.session.commit()
+        print(f"Scheduled job {name} failed: {str(e)}")
+        return False
+
+    state.last_run_at = now
+    state.watermark = today
+    state.last_error = None
+    state.locked_by = None
+    state.locked_until = None
+    db.session.commit()
+    print(f"Scheduled job {name} completed")
+    return True
+
+
+class Scheduler(threading.Thread):
+    """Background thread that runs due jobs every SCHEDULER_TICK_SECONDS"""
+
+    def __init__(self, app):
+        super().__init__(name='job-scheduler', daemon=True)
+        self.app = app
+        self.stop_event = threading.Event()
+
+    def run(self):
+        tick = self.app.config['SCHEDULER_TICK_SECONDS']
+        while not self.stop_event.is_set():
+            with self.app.app_context():
+                for name in self.app.config['SCHEDULER_JOBS']:
+                    try:
+                        run_job(name)
+                    except Exception as e:
+                        print(f"Scheduler error in {name}: {str(e)}")
+                db.session.remove()
+            self.stop_event.wait(tick)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def init_scheduler(app):
+    """Validate job schedules, register CLI commands and start the scheduler if enabled"""
+    for name, spec in app.config['SCHEDULER_JOBS'].items():
+        if name not in JOBS:
+            raise ValueError(f"Unknown scheduled job: {name}")
+        parse_schedule(spec)
+
+    app.cli.add_command(run_job_command)
+
+    if app.config['SCHEDULER_ENABLED']:
+        Scheduler(app).start()
+
+
+@click.command('run-job')
+@click.argument('name', type=click.Choice(sorted(JOBS)))
+@with_appcontext
+def run_job_command(name):
+    """Run a scheduled job now, regardless of its schedule"""
+    if not run_job(name, force=True):
+        raise SystemExit(f"Job {name} did not run (locked by another worker or failed)")
@@ -0,0 +1,229 @@
+"""
+Full-text search over equipment, maintenance descriptions and failure descriptions
+On SQLite the searchable text lives in one FTS5 table, search_index, kept in
+sync by triggers on the source tables, so ORM writes, bulk imports and raw SQL
+are all indexed in the same transaction. A row's rowid encodes its kind and
+source id, which lets the triggers replace or delete it directly. Hits are
+ranked with bm25 and returned with highlighted snippets. Other databases fall
+back to a LIKE scan of the source tables.
+"""
+import re
+from datetime import date, datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text, or_
+from models import db, Equipment, MaintenanceLog, FailureReport
+
+SEARCH_KINDS = ('equipment', 'maintenance', 'failures')
+
+# kind -> (rowid tag, source table, equipment id, date, title, body)
+SOURCES = {
+    'equipment': (1, 'equipment', 'id', 'installation_date', 'name',
+                  "coalesce({row}.type, '') || ' ' || coalesce({row}.manufacturer, '') || ' ' || "
+                  "coalesce({row}.model, '') || ' ' || coalesce({row}.serial_number, '') || ' ' || "
+                  "coalesce({row}.location, '')"),
+    'maintenance': (2, 'maintenance_logs', 'equipment_id', 'maintenance_date', 'maintenance_type',
+                    '{row}.description'),
+    'failures': (3, 'failure_reports', 'equipment_id', 'reported_date', 'severity',
+                 '{row}.failure_description')
+}
+
+# Columns whose changes require re-indexing a row
+WATCHED_COLUMNS = {
+    'equipment': 'name, type, manufacturer, model, serial_number, location, installation_date',
+    'maintenance': 'equipment_id, maintenance_type, description, maintenance_date',
+    'failures': 'equipment_id, severity, failure_description, reported_date'
+}
+
+SNIPPET_TOKENS = 16
+
+# bm25 column weights: title hits count four times as much as body hits.
+# Ordering by FTS5's own rank column lets it compute snippets for returned rows only.
+RANKING = 'bm25(0.0, 0.0, 0.0, 0.0, 4.0, 1.0)'
+
+
+def init_search(app):
+    """Register search index commands with the Flask CLI"""
+    app.cli.add_command(rebuild_search_command)
+
+
+def _is_sqlite(executor):
+    bind = executor if hasattr(executor, 'dialect') else executor.get_bind()
+    return bind.dialect.name == 'sqlite'
+
+
+def _values(kind, row):
+    tag, _, equipment_id, happened_at, title, body = SOURCES[kind]
+    return (f"{row}.id * 4 + {tag}, '{kind}', {row}.id, {row}.{equipment_id}, "
+            f"{row}.{happened_at}, {row}.{title}, {body.format(row=row)}")
+
+
+def create_search_index(executor):
+    """Create the FTS5 table and its sync triggers if missing (SQLite only)"""
+    if not _is_sqlite(executor):
+        return
+
+    executor.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "kind UNINDEXED, ref_id UNINDEXED, equipment_id UNINDEXED, happened_at UNINDEXED, "
+        "title, body, tokenize = 'porter unicode61')"
+    ))
+
+    for kind, (tag, table, *_) in SOURCES.items():
+        insert_row = ("INSERT INTO search_index(rowid, kind, ref_id, equipment_id, happened_at, title, body) "
+                      f"VALUES ({_values(kind, 'new')});")
+        delete_row = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {tag};"
+
+        executor.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_insert AFTER INSERT ON {table} "
+            f"BEGIN {insert_row} END"
+        ))
+        executor.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_update "
+            f"AFTER UPDATE OF {WATCHED_COLUMNS[kind]} ON {table} "
+            f"BEGIN {delete_row} {insert_row} END"
+        ))
+        executor.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_delete AFTER DELETE ON {table} "
+            f"BEGIN {delete_row} END"
+        ))
+
+
+def rebuild_search_index(executor=None):
+    """Re-index every searchable row from the source tables"""
+    executor = executor or db.session
+    if not _is_sqlite(executor):
+        return
+
+    create_search_index(executor)
+    executor.execute(text("DELETE FROM search_index"))
+    for kind, (_, table, *_) in SOURCES.items():
+        executor.execute(text(
+            "INSERT INTO search_index(rowid, kind, ref_id, equipment_id, happened_at, title, body) "
+            f"SELECT {_values(kind, table)} FROM {table}"
+        ))
+    executor.execute(text("INSERT INTO search_index(search_index) VALUES ('optimize')"))
+
+
+def parse_query(query):
+    """
+    Split free text into terms; "quoted text" stays a phrase
+
+    Returns:
+        list of terms/phrases, empty if the query has no words
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\w+)', query):
+        words = re.findall(r'\w+', phrase) if phrase else [word]
+        if words:
+            terms.append(' '.join(words))
+    return terms
+
+
+def _match_expression(terms):
+    # Every term is quoted, so user input never reaches FTS5 query syntax
+    return ' AND '.join(f'"{term}"' for term in terms)
+
+
+def search(query, kind=None, limit=50, offset=0, executor=None):
+    """
+    Ranked search hits
+
+    Args:
+        query: Free text; all words must match, "quoted text" matches as a phrase
+        kind: Restrict to 'equipment', 'maintenance' or 'failures'
+        limit: Page size
+        offset: Hits to skip
+        executor: Session to query with (default: db.session)
+
+    Returns:
+        (hits, has_more)
+    """
+    terms = parse_query(query)
+    if not terms:
+        return [], False
+
+    executor = executor or db.session
+    if not _is_sqlite(executor):
+        return _search_like(terms, kind, limit, offset, executor)
+
+    rows = executor.execute(text(
+        "SELECT hit.kind, hit.ref_id, hit.equipment_id, equipment.name AS equipment_name, "
+        "hit.happened_at, hit.title, hit.snippet, hit.score "
+        "FROM (SELECT kind, ref_id, equipment_id, happened_at, title, "
+        f"snippet(search_index, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snippet, "
+        "rank AS score "
+        "FROM search_index WHERE search_index MATCH :match AND rank MATCH :rank "
+        + ("AND kind = :kind " if kind else "") +
+        "ORDER BY rank LIMIT :limit OFFSET :offset) AS hit "
+        "JOIN equipment ON equipment.id = hit.equipment_id "
+        "ORDER BY hit.score"
+    ), {'match': _match_expression(terms), 'rank': RANKING, 'kind': kind,
+        'limit': limit + 1, 'offset': offset}).all()
+
+    hits = [{
+        'kind': row.kind,
+        'id': row.ref_id,
+        'equipment_id': row.equipment_id,
+        'equipment_name': row.equipment_name,
+        'date': isoformat(row.happened_at),
+        'title': row.title,
+        'snippet': row.snippet,
+        'score': round(-row.score, 4)
+    } for row in rows[:limit]]
+    return hits, len(rows) > limit
+
+
+def isoformat(value):
+    """A hit's date as the other endpoints write it; the FTS table holds SQLite's text form"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value) if len(value) == 10 else datetime.fromisoformat(value)
+    return value.isoformat()
+
+
+def _search_like(terms, kind, limit, offset, executor):
+    """Unranked fallback for databases without FTS5, newest first"""
+    sources = {
+        'equipment': (Equipment, Equipment.id, Equipment.installation_date, Equipment.name,
+                      [Equipment.name, Equipment.type, Equipment.manufacturer, Equipment.model,
+                       Equipment.serial_number, Equipment.location]),
+        'maintenance': (MaintenanceLog, MaintenanceLog.equipment_id, MaintenanceLog.maintenance_date,
+                        MaintenanceLog.maintenance_type, [MaintenanceLog.description]),
+        'failures': (FailureReport, FailureReport.equipment_id, FailureReport.reported_date,
+                     FailureReport.severity, [FailureReport.failure_description])
+    }
+
+    hits = []
+    for name in ([kind] if kind else SEARCH_KINDS):
+        model, equipment_id, happened_at, title, columns = sources[name]
+        query = executor.query(model.id, equipment_id, Equipment.name, happened_at, title, columns[-1])
+        if model is not Equipment:
+            query = query.join(Equipment, equipment_id == Equipment.id)
+        for term in terms:
+            query = query.filter(or_(*[column.ilike(f'%{term}%') for column in columns]))
+        for row in query.order_by(happened_at.desc()).limit(offset + limit + 1):
+            hits.append({
+                'kind': name,
+                'id': row[0],
+                'equipment_id': row[1],
+                'equipment_name': row[2],
+                'date': isoformat(row[3]),
+                'title': row[4],
+                'snippet': (row[5] or '')[:200],
+                'score': None
+            })
+
+    hits.sort(key=lambda hit: hit['date'] or '', reverse=True)  # ISO strings sort chronologically
+    page = hits[offset:offset + limit + 1]
+    return page[:limit], len(page) > limit
+
+
+@click.command('rebuild-search')
+@with_appcontext
+def rebuild_search_command():
+    """Rebuild the full-text search index from the source tables"""
+    rebuild_search_index()
+    db.session.commit()
+    print("Search index rebuilt")
@@ -1,6 +1,22 @@
+"""
+Seed the database
+With no options, a handful of demo records. With --assets, a deterministic
+synthetic fleet of any size for load testing:
+
+    python seed_data.py --plants 10 --assets 5000 --years 5 --seed 42
+"""
+import argparse
+import math
+import random
+import time
+from collections import defaultdict
+from sqlalchemy import insert
 from app import create_app
 from models import db, Technician, Equipment, MaintenanceLog, FailureReport
-from datetime import datetime, timedelta
+from passwords import password_hasher
+from rollups import rebuild_rollups
+from search import rebuild_search_index
+from datetime import date, datetime, timedelta
 
 def seed_database():
     """Seed database with sample data"""
@@ -226,11 +242,210 @@ def seed_database():
         db.session.commit()
         print(f"Created {len(failure_data)} failure reports")
         
+        rebuild_rollups()
+        db.session.commit()
+        print("Built dashboard rollups")
+        
+        rebuild_search_index()
+        db.session.commit()
+        print("Built search index")
+        
         print("\nDatabase seeding completed successfully!")
         print("\nLogin Credentials:")
         print("Admin: admin@maintenance.com / admin123")
         print("Technician: tech@maintenance.com / tech123")
 
 
+# Synthetic fleet for load testing and benchmarks
+CHUNK = 20000  # Rows per bulk INSERT
+
+# type, manufacturer, model prefix, mean days between failures,
+# preventive maintenance interval in days, components
+ASSET_CATALOG = [
+    ('Turbine', 'General Electric', 'GE', 180, 90, ['blade', 'bearing', 'combustor', 'rotor']),
+    ('Compressor', 'Siemens', 'CC', 120, 60, ['valve', 'seal', 'impeller', 'bearing']),
+    ('Generator', 'Caterpillar', 'DG', 150, 90, ['winding', 'exciter', 'bearing', 'voltage regulator']),
+    ('Pump', 'Grundfos', 'HP', 90, 45, ['seal', 'impeller', 'bearing', 'coupling']),
+    ('Cooling System', 'SPX Cooling', 'CT', 110, 60, ['fan', 'coil', 'refrigerant line', 'thermostat']),
+    ('Conveyor', 'Siemens', 'CV', 75, 30, ['belt', 'roller', 'gearbox', 'drive motor'])
+]
+SECTIONS = ['Section 1', 'Section 2', 'Section 3', 'Workshop', 'Power House', 'Boiler Room']
+SYMPTOMS = ['Excessive vibration', 'Overheating', 'Leak', 'Unusual noise', 'Pressure drop', 'Abnormal wear']
+SEVERITIES = ['Low', 'Medium', 'High']
+SEVERITY_WEIGHTS = [6, 3, 1]
+REPAIR_HOURS = {'Low': 2.0, 'Medium': 6.0, 'High': 24.0}  # Median downtime of the corrective repair
+WEAR_OUT = 1.3  # Weibull shape of the time between failures (> 1: failure rate grows with age)
+
+
+def plant_name(index):
+    return f'Plant {chr(ord("A") + index)}' if index < 26 else f'Plant {index + 1}'
+
+
+def generate_dataset(plants=3, assets=300, years=2, technicians=None, seed=42, end=None):
+    """
+    Bulk-insert a synthetic fleet into the current app's (empty) database
+    
+    Every asset fails at Weibull-distributed intervals (mean set by its type,
+    scaled by a lognormal per-asset factor so a few assets are bad actors),
+    each failure is followed by a corrective repair with lognormal downtime
+    by severity, and preventive maintenance runs on the type's interval with
+    a few days of jitter. Failures still open at the end leave their asset
+    Under Maintenance or Out of Service. The same seed and end date always
+    produce the same rows.
+    
+    Args:
+        plants: number of plants the assets and technicians are spread over
+        assets: number of equipment items
+        years: years of history before end
+        technicians: generated technicians (default: one per 40 assets)
+        seed: random seed
+        end: last day of history (default: today)
+    
+    Returns:
+        dict of row counts per table
+    """
+    rng = random.Random(seed)
+    end = datetime.combine(end or date.today(), datetime.min.time())
+    start = end - timedelta(days=365 * years)
+    technicians = technicians or max(2, assets // 40)
+    counts = {'technicians': 0, 'equipment': 0, 'maintenance_logs': 0, 'failure_reports': 0}
+    
+    # Demo accounts first, then technicians spread over the plants; one hash for all
+    password_hash = password_hasher.hash('tech123')
+    users = [
+        {'id': 1, 'full_name': 'John Smith', 'email': 'admin@maintenance.com', 'role': 'admin',
+         'password_hash': password_hasher.hash('admin123'), 'is_active': True, 'created_at': start},
+        {'id': 2, 'full_name': 'Sarah Johnson', 'email': 'tech@maintenance.com', 'role': 'technician',
+         'password_hash': password_hash, 'is_active': True, 'created_at': start}
+    ]
+    crews = defaultdict(list)
+    for i in range(technicians):
+        user_id = len(users) + 1
+        crews[i % plants].append(user_id)
+        users.append({'id': user_id, 'full_name': f'Technician {i + 1}', 'email': f'tech{i + 1}@maintenance.com',
+                      'role': 'technician', 'password_hash': password_hash, 'is_active': True, 'created_at': start})
+    db.session.execute(insert(Technician), users)
+    counts['technicians'] = len(users)
+    
+    pending = {Equipment: [], FailureReport: [], MaintenanceLog: []}  # Insert order, for the foreign keys
+    
+    def flush():
+        for model, rows in pending.items():
+            if rows:
+                db.session.execute(insert(model), rows)
+                rows.clear()
+    
+    def at(day):
+        """A working-hours timestamp on the day of day"""
+        return datetime.combine(day.date(), datetime.min.time()) + timedelta(minutes=rng.randint(6 * 60, 20 * 60))
+    
+    for equipment_id in range(1, assets + 1):
+        kind, manufacturer, prefix, mtbf, interval, components = rng.choice(ASSET_CATALOG)
+        plant = rng.randrange(plants)
+        crew = crews[plant] or [1]
+        model = f'{prefix}-{rng.randint(1, 60) * 100}'
+        # Most assets predate the history window; some were commissioned during it
+        if rng.random() < 0.1:
+            installed = start + timedelta(days=rng.randint(0, 365 * years - 30))
+        else:
+            installed = start - timedelta(days=rng.randint(30, 3650))
+        
+        status = 'Active'
+        failures, logs = [], []
+        scale = mtbf * rng.lognormvariate(0, 0.4) / math.gamma(1 + 1 / WEAR_OUT)
+        t = max(start, installed)
+        while True:
+            t += timedelta(days=rng.weibullvariate(scale, WEAR_OUT))
+            if t >= end:
+                break
+            severity = rng.choices(SEVERITIES, SEVERITY_WEIGHTS)[0]
+            component = rng.choice(components)
+            symptom = rng.choice(SYMPTOMS)
+            reported = at(t)
+            repaired = reported + timedelta(hours=rng.lognormvariate(math.log(6), 1.5))  # Long tail: waiting for parts
+            resolved = repaired < end
+            failures.append({
+                'equipment_id': equipment_id, 'reported_by': rng.choice(crew),
+                'failure_description': f'{symptom} at the {component} of {kind.lower()} {model}.',
+                'severity': severity, 'reported_date': reported, 'resolved': resolved
+            })
+            if resolved:
+                logs.append({
+                    'equipment_id': equipment_id, 'technician_id': rng.choice(crew),
+                    'maintenance_type': 'Corrective',
+                    'description': f'Replaced {component} after {symptom.lower()}; unit tested and returned to service.',
+                    'maintenance_date': repaired,
+                    'downtime_hours': round(rng.lognormvariate(math.log(REPAIR_HOURS[severity]), 0.8), 1)
+                })
+            else:
+                status = 'Out of Service' if severity == 'High' else 'Under Maintenance'
+        
+        t = max(start, installed) + timedelta(days=rng.randint(0, interval))
+        while t < end:
+            component = rng.choice(components)
+            performed = at(t)
+            logs.append({
+                'equipment_id': equipment_id, 'technician_id': rng.choice(crew),
+                'maintenance_type': 'Preventive',
+                'description': f'Scheduled service: inspected and lubricated {component}, checked alignment and fasteners.',
+                'maintenance_date': performed,
+                'downtime_hours': round(rng.lognormvariate(math.log(1.5), 0.5), 1),
+                'next_maintenance_date': (performed + timedelta(days=interval)).date()
+            })
+            t += timedelta(days=interval + rng.gauss(0, 3))
+        
+        pending[Equipment].append({
+            'id': equipment_id, 'name': f'{kind} {model}', 'type': kind, 'manufacturer': manufacturer,
+            'model': model, 'serial_number': f'{prefix}-{installed.year}-{equipment_id:06d}',
+            'location': f'{plant_name(plant)} - {rng.choice(SECTIONS)}',
+            'installation_date': installed.date(), 'status': status
+        })
+        pending[FailureReport].extend(failures)
+        pending[MaintenanceLog].extend(logs)
+        counts['equipment'] += 1
+        counts['failure_reports'] += len(failures)
+        counts['maintenance_logs'] += len(logs)
+        if sum(len(rows) for rows in pending.values()) >= CHUNK:
+            flush()
+    flush()
+    
+    rebuild_rollups()
+    rebuild_search_index()
+    db.session.commit()
+    return counts
+
+
+def seed_large_database(**options):
+    """Replace the database with a generated fleet (see generate_dataset)"""
+    app = create_app()
+    
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        
+        print("Generating database...")
+        started = time.perf_counter()
+        counts = generate_dataset(**options)
+        for table, count in counts.items():
+            print(f"Created {count} {table.replace('_', ' ')}")
+        print(f"\nGenerated in {time.perf_counter() - started:.1f}s")
+        print("\nLogin Credentials:")
+        print("Admin: admin@maintenance.com / admin123")
+        print("Technicians: tech@maintenance.com, tech1@maintenance.com, ... / tech123")
+
+
 if __name__ == '__main__':
-    seed_database()
+    parser = argparse.ArgumentParser(description='Seed the database with demo data, or generate a large fleet')
+    parser.add_argument('--assets', type=int, help='Generate this many equipment items instead of the demo data')
+    parser.add_argument('--plants', type=int, default=3)
+    parser.add_argument('--years', type=int, default=2, help='Years of maintenance and failure history')
+    parser.add_argument('--technicians', type=int, help='Default: one per 40 assets')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=date.fromisoformat, help='Last day of history (default: today)')
+    args = parser.parse_args()
+    
+    if args.assets:
+        seed_large_database(plants=args.plants, assets=args.assets, years=args.years,
+                            technicians=args.technicians, seed=args.seed, end=args.end)
+    else:
+        seed_database()
@@ -0,0 +1,205 @@
+"""
+Lean JSON for list endpoints
+Instead of loading ORM objects (identity map, relationship loading) and
+calling to_dict() on each, a Projection selects just the columns that
+to_dict() reads, joined names included, as row tuples, and turns each row
+into the same dict. The encoders produce the exact bytes jsonify does for
+those dicts (sorted keys, compact separators, ASCII escapes, trailing
+newline), so clients see no difference.
+
+With orjson installed it does the encoding. Its output differs from the
+json module only for non-ASCII text and for floats below 1e-4 or from 1e16;
+bodies that may contain either are re-encoded with json, so the bytes stay
+the same. Full (unpaged) lists can be streamed as a JSON array in chunks, which
+keeps memory flat however many rows there are.
+"""
+import json
+import re
+from datetime import date, datetime
+from flask import current_app, stream_with_context
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, Technician, Equipment, MaintenanceLog, FailureReport, EquipmentSchedule
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_ROWS = 1000
+# orjson writes floats below 1e-4 as 0.0000..., and others with an exponent, where
+# json writes 1e-05 or 1e+16. Text that merely looks like either just takes the slow path.
+_EXPONENT = re.compile(rb'e[-1-9]')
+_TINY = b'0.0000'
+
+
+class Projection:
+    """The columns of a model's to_dict() as a select of labelled row tuples"""
+
+    def __init__(self, model, fields, joins=(), compute=None):
+        """
+        Args:
+            model: the model listed (the FROM table)
+            fields: {to_dict key: column expression}
+            joins: (target, onclause) pairs, outer joined in order
+            compute: function adding derived keys to a row's dict
+        """
+        self.model = model
+        self.fields = fields
+        self.joins = joins
+        self.compute = compute
+        self._keys = list(fields)
+        self._dates = [
+            key for key, column in fields.items()
+            if column.type.python_type in (date, datetime)
+        ]
+
+    def select(self):
+        query = select(*(column.label(key) for key, column in self.fields.items())).select_from(self.model)
+        for target, onclause in self.joins:
+            query = query.outerjoin(target, onclause)
+        return query
+
+    def to_dict(self, row):
+        item = dict(zip(self._keys, row))  # Several times faster than row._asdict()
+        if self.compute:
+            self.compute(item)
+        for key in self._dates:
+            value = item[key]
+            if value is not None:
+                item[key] = value.isoformat()
+        return item
+
+    def dicts(self, rows):
+        return [self.to_dict(row) for row in rows]
+
+
+def _schedule_status(item):
+    days_until = (item['next_maintenance_date'] - datetime.utcnow().date()).days  # UTC, like the /api/schedule filter
+    item['days_until'] = days_until
+    item['status'] = 'overdue' if days_until < 0 else 'due_soon'
+
+
+_scheduling_log = aliased(MaintenanceLog)
+_scheduling_technician = aliased(Technician)
+
+TECHNICIAN = Projection(Technician, {
+    'id': Technician.id,
+    'full_name': Technician.full_name,
+    'email': Technician.email,
+    'role': Technician.role,
+    'is_active': Technician.is_active,
+    'created_at': Technician.created_at,
+    'last_login': Technician.last_login
+})
+
+EQUIPMENT = Projection(Equipment, {
+    'id': Equipment.id,
+    'name': Equipment.name,
+    'type': Equipment.type,
+    'manufacturer': Equipment.manufacturer,
+    'model': Equipment.model,
+    'serial_number': Equipment.serial_number,
+    'location': Equipment.location,
+    'installation_date': Equipment.installation_date,
+    'status': Equipment.status
+})
+
+MAINTENANCE_LOG = Projection(MaintenanceLog, {
+    'id': MaintenanceLog.id,
+    'equipment_id': MaintenanceLog.equipment_id,
+    'equipment_name': Equipment.name,
+    'technician_id': MaintenanceLog.technician_id,
+    'technician_name': Technician.full_name,
+    'maintenance_type': MaintenanceLog.maintenance_type,
+    'description': MaintenanceLog.description,
+    'maintenance_date': MaintenanceLog.maintenance_date,
+    'downtime_hours': MaintenanceLog.downtime_hours,
+    'next_maintenance_date': MaintenanceLog.next_maintenance_date
+}, joins=[
+    (Equipment, MaintenanceLog.equipment_id == Equipment.id),
+    (Technician, MaintenanceLog.technician_id == Technician.id)
+])
+
+FAILURE_REPORT = Projection(FailureReport, {
+    'id': FailureReport.id,
+    'equipment_id': FailureReport.equipment_id,
+    'equipment_name': Equipment.name,
+    'reported_by': FailureReport.reported_by,
+    'reporter_name': Technician.full_name,
+    'failure_description': FailureReport.failure_description,
+    'severity': FailureReport.severity,
+    'reported_date': FailureReport.reported_date,
+    'resolved': FailureReport.resolved
+}, joins=[
+    (Equipment, FailureReport.equipment_id == Equipment.id),
+    (Technician, FailureReport.reported_by == Technician.id)
+])
+
+EQUIPMENT_SCHEDULE = Projection(EquipmentSchedule, {
+    'equipment_id': EquipmentSchedule.equipment_id,
+    'equipment_name': Equipment.name,
+    'equipment_type': Equipment.type,
+    'location': Equipment.location,
+    'next_maintenance_date': EquipmentSchedule.next_maintenance_date,
+    'last_maintenance_date': EquipmentSchedule.last_maintenance_date,
+    'maintenance_log_id': EquipmentSchedule.maintenance_log_id,
+    'maintenance_type': _scheduling_log.maintenance_type,
+    'technician_name': _scheduling_technician.full_name
+}, joins=[
+    (Equipment, EquipmentSchedule.equipment_id == Equipment.id),
+    (_scheduling_log, EquipmentSchedule.maintenance_log_id == _scheduling_log.id),
+    (_scheduling_technician, _scheduling_log.technician_id == _scheduling_technician.id)
+], compute=_schedule_status)
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode()
+
+
+def dumps(obj):
+    """obj as compact JSON bytes, identical to what jsonify writes"""
+    if orjson is not None:
+        body = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        if body.isascii() and _TINY not in body and not _EXPONENT.search(body):
+            return body
+    return _json_dumps(obj)
+
+
+def _fast_path():
+    """Whether the app's JSON provider writes what dumps() writes"""
+    provider = current_app.json
+    compact = provider.compact if provider.compact is not None else not current_app.debug
+    return compact and getattr(provider, 'sort_keys', False) and getattr(provider, 'ensure_ascii', False)
+
+
+def json_response(obj, status=200):
+    """Response with obj as JSON, byte-for-byte what jsonify(obj) returns"""
+    if not _fast_path():
+        response = current_app.json.response(obj)
+    else:
+        response = current_app.response_class(dumps(obj) + b'\n', mimetype=current_app.json.mimetype)
+    response.status_code = status
+    return response
+
+
+def stream_array(projection, query):
+    """
+    Response streaming every row of a projection query as one JSON array
+    Rows are fetched and encoded CHUNK_ROWS at a time.
+    """
+    if not _fast_path():
+        return json_response(projection.dicts(db.session.execute(query)))
+
+    def generate():
+        result = db.session.execute(query.execution_options(yield_per=CHUNK_ROWS))
+        try:
+            separator = b'['
+            for rows in result.partitions():
+                yield separator + dumps(projection.dicts(rows))[1:-1]
+                separator = b','
+            yield (b'[]' if separator == b'[' else b']') + b'\n'
+        finally:
+            result.close()
+
+    return current_app.response_class(stream_with_context(generate()), mimetype=current_app.json.mimetype)
@@ -116,9 +116,21 @@ const API = {
         return this.request('/reports/downtime');
     },
 
+    async getSchedule(filters = {}) {
+        const params = new URLSearchParams(filters);
+        return this.request(`/schedule?${params}`);
+    },
+
+    // Export files are streamed by the server straight into a browser download
+    exportUrl(kind, filters = {}) {
+        const params = new URLSearchParams(filters);
+        return `/api/export/${kind}?${params}`;
+    },
+
     // User Management APIs
-    async getUsers() {
-        return this.request('/users');
+    async getUsers(filters = {}) {
+        const params = new URLSearchParams(filters);
+        return this.request(`/users?${params}`);
     },
 
     async createUser(data) {
@@ -151,6 +163,42 @@ const API = {
     }
 };
 
+// ===== Live Updates =====
+// One Server-Sent Events connection per session. The browser reconnects on
+// its own and sends Last-Event-ID, so missed events are replayed; 'reset'
+// means they were not, and the current page reloads its data instead.
+const LIVE_EVENT_TYPES = ['equipment.status', 'maintenance.created', 'failure.created', 'failure.resolved', 'failure.reopened', 'reset'];
+
+const LiveUpdates = {
+    source: null,
+    handlers: {},
+
+    connect() {
+        if (this.source || !window.EventSource) return;
+        this.source = new EventSource('/api/events');
+        LIVE_EVENT_TYPES.forEach(type => {
+            this.source.addEventListener(type, event => this.dispatch(type, JSON.parse(event.data)));
+        });
+    },
+
+    disconnect() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+    },
+
+    // Each page registers its handlers when rendered, replacing the previous page's
+    setHandlers(handlers) {
+        this.handlers = handlers;
+    },
+
+    dispatch(type, data) {
+        const handler = this.handlers[type];
+        if (handler) handler(data);
+    }
+};
+
 // ===== Utility Functions =====
 function showLoading() {
     document.getElementById('loadingOverlay').classList.add('active');
@@ -219,6 +267,84 @@ function getMaintenanceTypeBadge(type) {
     return `<span class="badge ${typeMap[type] || ''}">${type}</span>`;
 }
 
+// ===== Paged Lists =====
+const PAGE_SIZE = 50;
+const activePagedLists = {};  // sentinelId -> the list currently filling that table
+
+// Loads a keyset-paginated list page by page as the sentinel scrolls into view.
+// Creating a list for a sentinel disposes the previous one (reloads, filter changes),
+// so only the newest list ever appends rows to the table.
+function createPagedList({ fetchPage, onPage, sentinelId }) {
+    if (activePagedLists[sentinelId]) activePagedLists[sentinelId].dispose();
+
+    const state = { cursor: null, done: false, loading: false, disposed: false };
+    const sentinel = document.getElementById(sentinelId);
+    let observer = null;
+
+    function dispose() {
+        state.disposed = true;
+        state.done = true;
+        if (observer) observer.disconnect();
+        if (activePagedLists[sentinelId] === list) delete activePagedLists[sentinelId];
+    }
+
+    function sentinelVisible() {
+        return sentinel && sentinel.isConnected &&
+            sentinel.getBoundingClientRect().top < window.innerHeight + 200;
+    }
+
+    async function loadMore() {
+        if (state.loading || state.done) return;
+        state.loading = true;
+
+        try {
+            const params = { limit: PAGE_SIZE };
+            if (state.cursor) params.cursor = state.cursor;
+
+            const page = await fetchPage(params);
+            if (state.disposed) return;  // Replaced while the page was in flight
+            onPage(page.items, state.cursor === null);
+            state.cursor = page.next_cursor;
+            state.done = !page.next_cursor;
+        } finally {
+            state.loading = false;
+        }
+
+        if (state.disposed) return;
+        if (state.done) {
+            if (observer) observer.disconnect();
+        } else if (sentinelVisible()) {
+            // Short pages leave the sentinel on screen, keep filling
+            await loadMore();
+        }
+    }
+
+    if (sentinel && 'IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (!sentinel.isConnected) {
+                observer.disconnect();
+                return;
+            }
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMore().catch(() => showAlert('Failed to load more rows', 'error'));
+            }
+        }, { rootMargin: '200px' });
+        observer.observe(sentinel);
+    }
+
+    const list = { loadMore, dispose };
+    activePagedLists[sentinelId] = list;
+    return list;
+}
+
+function renderPagedRows(tbody, rowsHtml, isFirstPage) {
+    if (isFirstPage) {
+        tbody.innerHTML = rowsHtml;
+    } else {
+        tbody.insertAdjacentHTML('beforeend', rowsHtml);
+    }
+}
+
 // ===== Navigation =====
 function updateNavigation() {
     const navMenu = document.getElementById('navMenu');
@@ -256,6 +382,7 @@ async function checkAuth() {
         AppState.currentUser = user;
         AppState.isAuthenticated = true;
         updateNavigation();
+        LiveUpdates.connect();
         return true;
     } catch (error) {
         AppState.currentUser = null;
@@ -276,6 +403,7 @@ async function handleLogin(event) {
         AppState.currentUser = response.user;
         AppState.isAuthenticated = true;
         updateNavigation();
+        LiveUpdates.connect();
         navigateTo('dashboard');
     } catch (error) {
         showAlert(error.message || 'Login failed', 'error');
@@ -288,6 +416,7 @@ async function handleLogout() {
     try {
         showLoading();
         await API.logout();
+        LiveUpdates.disconnect();
         AppState.currentUser = null;
         AppState.isAuthenticated = false;
         updateNavigation();
@@ -339,6 +468,7 @@ function renderLoginPage() {
 function navigateTo(page) {
     AppState.currentPage = page;
     updateNavigation();
+    LiveUpdates.setHandlers({});
 
     const routes = {
         'dashboard': renderDashboard,
@@ -1,5 +1,15 @@
 // ===== Enhanced Dashboard Page =====
+// Last loaded dashboard data and charts, kept current by live update events
+const DashboardState = {
+    data: null,
+    downtimeChart: null,
+    failureChart: null
+};
+
 async function renderDashboard() {
+    DashboardState.data = null;
+    LiveUpdates.setHandlers(dashboardLiveHandlers());
+
     const mainContent = document.getElementById('mainContent');
 
     mainContent.innerHTML = `
@@ -44,8 +54,9 @@ async function renderDashboard() {
         showLoading();
         const data = await API.getDashboardData();
         renderKPIs(data);
-        renderDowntimeChart(data.downtime_by_equipment);
-        renderFailureChart(data.failures_by_equipment);
+        DashboardState.downtimeChart = renderDowntimeChart(data.downtime_by_equipment);
+        DashboardState.failureChart = renderFailureChart(data.failures_by_equipment);
+        DashboardState.data = data;
     } catch (error) {
         showAlert('Failed to load dashboard data', 'error');
     } finally {
@@ -53,6 +64,58 @@ async function renderDashboard() {
     }
 }
 
+// Apply live events to the loaded figures instead of reloading the dashboard
+function dashboardLiveHandlers() {
+    const update = apply => event => {
+        if (!DashboardState.data) return;
+        apply(DashboardState.data, event);
+        renderKPIs(DashboardState.data, false);
+    };
+
+    return {
+        'equipment.status': update((data, event) => {
+            const counts = data.equipment_by_status;
+            if (event.previous_status) {
+                counts[event.previous_status] = Math.max((counts[event.previous_status] || 0) - 1, 0);
+            }
+            if (event.status) {
+                counts[event.status] = (counts[event.status] || 0) + 1;
+            }
+        }),
+        'failure.created': update((data, failure) => {
+            data.active_failures += 1;
+            addChartValue(DashboardState.failureChart, failure.equipment_name, 1);
+        }),
+        'failure.resolved': update(data => {
+            data.active_failures = Math.max(data.active_failures - 1, 0);
+        }),
+        'failure.reopened': update(data => {
+            data.active_failures += 1;
+        }),
+        'maintenance.created': update((data, log) => {
+            const downtime = Number(log.downtime_hours) || 0;
+            if (log.maintenance_date.slice(0, 7) === new Date().toISOString().slice(0, 7)) {
+                data.total_downtime += downtime;
+            }
+            addChartValue(DashboardState.downtimeChart, log.equipment_name, downtime);
+        }),
+        'reset': () => renderDashboard()
+    };
+}
+
+function addChartValue(chart, label, amount) {
+    if (!chart || !amount) return;
+    const dataset = chart.data.datasets[0];
+    const index = chart.data.labels.indexOf(label);
+    if (index === -1) {
+        chart.data.labels.push(label);
+        dataset.data.push(amount);
+    } else {
+        dataset.data[index] += amount;
+    }
+    chart.update('none');
+}
+
 // Animated counter function
 function animateCounter(element, target, duration = 1000) {
     const start = 0;
@@ -70,7 +133,7 @@ function animateCounter(element, target, duration = 1000) {
     }, 16);
 }
 
-function renderKPIs(data) {
+function renderKPIs(data, animate = true) {
     const kpiGrid = document.getElementById('kpiGrid');
 
     const totalEquipment = Object.values(data.equipment_by_status).reduce((a, b) => a + b, 0);
@@ -110,8 +173,8 @@ function renderKPIs(data) {
             <div class="kpi-icon">📅</div>
             <div class="kpi-label">Upcoming Maintenance</div>
             <div class="kpi-value" data-target="${data.upcoming_maintenance}">0</div>
-            <div class="kpi-trend">
-                <span>📆</span> Next 30 Days
+            <div class="kpi-trend ${data.overdue_maintenance > 0 ? 'up' : ''}">
+                <span>📆</span> Next 30 Days${data.overdue_maintenance > 0 ? ` · ${data.overdue_maintenance} overdue` : ''}
             </div>
         </div>
 
@@ -125,10 +188,14 @@ function renderKPIs(data) {
         </div>
     `;
 
-    // Animate all counters
+    // Animate all counters (live updates show the new values directly)
     document.querySelectorAll('.kpi-value').forEach(el => {
         const target = parseFloat(el.getAttribute('data-target'));
-        animateCounter(el, target);
+        if (animate) {
+            animateCounter(el, target);
+        } else {
+            el.textContent = Math.round(target);
+        }
     });
 }
 
@@ -137,7 +204,7 @@ function renderDowntimeChart(data) {
 
     if (data.length === 0) {
         ctx.parentElement.innerHTML = '<p class="text-center" style="color: var(--text-muted); padding: 2rem;">No downtime data available</p>';
-        return;
+        return null;
     }
 
     // Create gradient
@@ -145,7 +212,7 @@ function renderDowntimeChart(data) {
     gradient.addColorStop(0, 'rgba(249, 115, 22, 0.8)');
     gradient.addColorStop(1, 'rgba(249, 115, 22, 0.2)');
 
-    new Chart(ctx, {
+    return new Chart(ctx, {
         type: 'bar',
         data: {
             labels: data.map(item => item.equipment),
@@ -226,7 +293,7 @@ function renderFailureChart(data) {
 
     if (data.length === 0) {
         ctx.parentElement.innerHTML = '<p class="text-center" style="color: var(--text-muted); padding: 2rem;">No failure data available</p>';
-        return;
+        return null;
     }
 
     const colors = [
@@ -238,7 +305,7 @@ function renderFailureChart(data) {
         'rgba(236, 72, 153, 0.9)'
     ];
 
-    new Chart(ctx, {
+    return new Chart(ctx, {
         type: 'doughnut',
         data: {
             labels: data.map(item => item.equipment),
@@ -43,17 +43,27 @@ async function renderEquipmentPage() {
                     </tbody>
                 </table>
             </div>
+            <div id="equipmentSentinel" class="scroll-sentinel"></div>
         </div>
     `;
 
+    LiveUpdates.setHandlers({
+        'equipment.status': showEquipmentStatus,
+        'reset': filterEquipment
+    });
     loadEquipment();
 }
 
 async function loadEquipment(filters = {}) {
+    const list = createPagedList({
+        sentinelId: 'equipmentSentinel',
+        fetchPage: params => API.getEquipment({ ...filters, ...params }),
+        onPage: renderEquipmentTable
+    });
+
     try {
         showLoading();
-        const equipment = await API.getEquipment(filters);
-        renderEquipmentTable(equipment);
+        await list.loadMore();
     } catch (error) {
         showAlert('Failed to load equipment', 'error');
     } finally {
@@ -61,23 +71,23 @@ async function loadEquipment(filters = {}) {
     }
 }
 
-function renderEquipmentTable(equipment) {
+function renderEquipmentTable(equipment, isFirstPage = true) {
     const tbody = document.getElementById('equipmentTableBody');
     const isAdmin = AppState.currentUser.role === 'admin';
 
-    if (equipment.length === 0) {
+    if (isFirstPage && equipment.length === 0) {
         tbody.innerHTML = '<tr><td colspan="7" class="text-center" style="padding: 2rem; color: var(--text-muted);">No equipment found</td></tr>';
         return;
     }
 
-    tbody.innerHTML = equipment.map(eq => `
-        <tr>
+    renderPagedRows(tbody, equipment.map(eq => `
+        <tr data-equipment-id="${eq.id}">
             <td><strong>${eq.name}</strong></td>
             <td>${eq.type}</td>
             <td>${eq.manufacturer || 'N/A'}</td>
             <td>${eq.serial_number || 'N/A'}</td>
             <td>${eq.location || 'N/A'}</td>
-            <td>${getStatusBadge(eq.status)}</td>
+            <td class="equipment-status">${getStatusBadge(eq.status)}</td>
             <td class="table-actions">
                 <button class="btn btn-sm btn-outline" onclick="viewEquipmentDetail(${eq.id})">View</button>
                 ${isAdmin ? `
@@ -86,7 +96,7 @@ function renderEquipmentTable(equipment) {
                 ` : ''}
             </td>
         </tr>
-    `).join('');
+    `).join(''), isFirstPage);
 }
 
 function filterEquipment() {
@@ -95,6 +105,20 @@ function filterEquipment() {
     loadEquipment(filters);
 }
 
+// Live status change: update the row in place, or drop it if it no longer
+// matches the status filter (or the equipment was deleted)
+function showEquipmentStatus(event) {
+    const row = document.querySelector(`tr[data-equipment-id="${event.equipment_id}"]`);
+    if (!row) return;
+
+    const filter = document.getElementById('statusFilter')?.value;
+    if (!event.status || (filter && filter !== event.status)) {
+        row.remove();
+    } else {
+        row.querySelector('.equipment-status').innerHTML = getStatusBadge(event.status);
+    }
+}
+
 async function viewEquipmentDetail(id) {
     try {
         showLoading();
@@ -32,6 +32,7 @@ async function renderFailuresPage() {
                     </tbody>
                 </table>
             </div>
+            <div id="activeFailuresSentinel" class="scroll-sentinel"></div>
         </div>
 
         <div class="card mt-2">
@@ -54,22 +55,34 @@ async function renderFailuresPage() {
                     </tbody>
                 </table>
             </div>
+            <div id="resolvedFailuresSentinel" class="scroll-sentinel"></div>
         </div>
     `;
 
+    LiveUpdates.setHandlers({
+        'failure.created': showActiveFailure,
+        'failure.resolved': showResolvedFailure,
+        'failure.reopened': showActiveFailure,
+        'reset': loadFailures
+    });
     loadFailures();
 }
 
 async function loadFailures() {
+    const activeList = createPagedList({
+        sentinelId: 'activeFailuresSentinel',
+        fetchPage: params => API.getFailureReports({ resolved: false, ...params }),
+        onPage: renderActiveFailuresTable
+    });
+    const resolvedList = createPagedList({
+        sentinelId: 'resolvedFailuresSentinel',
+        fetchPage: params => API.getFailureReports({ resolved: true, ...params }),
+        onPage: renderResolvedFailuresTable
+    });
+
     try {
         showLoading();
-        const allFailures = await API.getFailureReports();
-
-        const activeFailures = allFailures.filter(f => !f.resolved);
-        const resolvedFailures = allFailures.filter(f => f.resolved);
-
-        renderActiveFailuresTable(activeFailures);
-        renderResolvedFailuresTable(resolvedFailures);
+        await Promise.all([activeList.loadMore(), resolvedList.loadMore()]);
     } catch (error) {
         showAlert('Failed to load failure reports', 'error');
     } finally {
@@ -77,16 +90,31 @@ async function loadFailures() {
     }
 }
 
-function renderActiveFailuresTable(failures) {
+function renderActiveFailuresTable(failures, isFirstPage = true) {
     const tbody = document.getElementById('activeFailuresTableBody');
 
-    if (failures.length === 0) {
+    if (isFirstPage && failures.length === 0) {
         tbody.innerHTML = '<tr><td colspan="6" class="text-center" style="padding: 2rem; color: var(--text-muted);">No active failures</td></tr>';
         return;
     }
 
-    tbody.innerHTML = failures.map(failure => `
-        <tr>
+    renderPagedRows(tbody, failures.map(activeFailureRow).join(''), isFirstPage);
+}
+
+function renderResolvedFailuresTable(failures, isFirstPage = true) {
+    const tbody = document.getElementById('resolvedFailuresTableBody');
+
+    if (isFirstPage && failures.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="5" class="text-center" style="padding: 2rem; color: var(--text-muted);">No resolved failures</td></tr>';
+        return;
+    }
+
+    renderPagedRows(tbody, failures.map(resolvedFailureRow).join(''), isFirstPage);
+}
+
+function activeFailureRow(failure) {
+    return `
+        <tr data-failure-id="${failure.id}">
             <td>${formatDateTime(failure.reported_date)}</td>
             <td><strong>${failure.equipment_name}</strong></td>
             <td>${getSeverityBadge(failure.severity)}</td>
@@ -96,26 +124,40 @@ function renderActiveFailuresTable(failures) {
                 <button class="btn btn-sm btn-primary" onclick="resolveFailure(${failure.id})">Resolve</button>
             </td>
         </tr>
-    `).join('');
+    `;
 }
 
-function renderResolvedFailuresTable(failures) {
-    const tbody = document.getElementById('resolvedFailuresTableBody');
-
-    if (failures.length === 0) {
-        tbody.innerHTML = '<tr><td colspan="5" class="text-center" style="padding: 2rem; color: var(--text-muted);">No resolved failures</td></tr>';
-        return;
-    }
-
-    tbody.innerHTML = failures.map(failure => `
-        <tr>
+function resolvedFailureRow(failure) {
+    return `
+        <tr data-failure-id="${failure.id}">
             <td>${formatDateTime(failure.reported_date)}</td>
             <td><strong>${failure.equipment_name}</strong></td>
             <td>${getSeverityBadge(failure.severity)}</td>
             <td>${failure.failure_description}</td>
             <td>${failure.reporter_name}</td>
         </tr>
-    `).join('');
+    `;
+}
+
+// Move a single failure between the tables; safe to apply twice, since both
+// the save response and the live event for it arrive here
+function placeFailure(failure, tbodyId, rowHtml) {
+    document.querySelectorAll(`tr[data-failure-id="${failure.id}"]`).forEach(row => row.remove());
+
+    const tbody = document.getElementById(tbodyId);
+    if (!tbody) return;
+    if (!tbody.querySelector('tr[data-failure-id]')) {
+        tbody.innerHTML = '';  // Drop the empty-table placeholder
+    }
+    tbody.insertAdjacentHTML('afterbegin', rowHtml);
+}
+
+function showActiveFailure(failure) {
+    placeFailure(failure, 'activeFailuresTableBody', activeFailureRow(failure));
+}
+
+function showResolvedFailure(failure) {
+    placeFailure(failure, 'resolvedFailuresTableBody', resolvedFailureRow(failure));
 }
 
 async function showFailureModal() {
@@ -179,10 +221,10 @@ async function saveFailureReport(event) {
 
     try {
         showLoading();
-        await API.createFailureReport(data);
+        const failure = await API.createFailureReport(data);
         showAlert('Failure report submitted successfully', 'success');
         closeModal();
-        loadFailures();
+        showActiveFailure(failure);
     } catch (error) {
         showAlert(error.message || 'Failed to submit failure report', 'error');
     } finally {
@@ -197,9 +239,9 @@ async function resolveFailure(id) {
 
     try {
         showLoading();
-        await API.updateFailureReport(id, { resolved: true });
+        const failure = await API.updateFailureReport(id, { resolved: true });
         showAlert('Failure marked as resolved', 'success');
-        loadFailures();
+        showResolvedFailure(failure);
     } catch (error) {
         showAlert(error.message || 'Failed to resolve failure', 'error');
     } finally {
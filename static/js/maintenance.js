@@ -33,17 +33,27 @@ async function renderMaintenancePage() {
                     </tbody>
                 </table>
             </div>
+            <div id="maintenanceSentinel" class="scroll-sentinel"></div>
         </div>
     `;
 
     loadMaintenanceLogs();
 }
 
+// Logs loaded so far, keyed by id, for the detail modal
+let loadedMaintenanceLogs = {};
+
 async function loadMaintenanceLogs() {
+    loadedMaintenanceLogs = {};
+    const list = createPagedList({
+        sentinelId: 'maintenanceSentinel',
+        fetchPage: params => API.getMaintenanceLogs(params),
+        onPage: renderMaintenanceTable
+    });
+
     try {
         showLoading();
-        const logs = await API.getMaintenanceLogs();
-        renderMaintenanceTable(logs);
+        await list.loadMore();
     } catch (error) {
         showAlert('Failed to load maintenance logs', 'error');
     } finally {
@@ -51,15 +61,16 @@ async function loadMaintenanceLogs() {
     }
 }
 
-function renderMaintenanceTable(logs) {
+function renderMaintenanceTable(logs, isFirstPage = true) {
     const tbody = document.getElementById('maintenanceTableBody');
+    logs.forEach(log => { loadedMaintenanceLogs[log.id] = log; });
 
-    if (logs.length === 0) {
+    if (isFirstPage && logs.length === 0) {
         tbody.innerHTML = '<tr><td colspan="7" class="text-center" style="padding: 2rem; color: var(--text-muted);">No maintenance logs found</td></tr>';
         return;
     }
 
-    tbody.innerHTML = logs.map(log => `
+    renderPagedRows(tbody, logs.map(log => `
         <tr>
             <td>${formatDateTime(log.maintenance_date)}</td>
             <td><strong>${log.equipment_name}</strong></td>
@@ -71,16 +82,14 @@ function renderMaintenanceTable(logs) {
                 <button class="btn btn-sm btn-outline" onclick="viewMaintenanceDetail(${log.id})">View</button>
             </td>
         </tr>
-    `).join('');
+    `).join(''), isFirstPage);
 }
 
 function viewMaintenanceDetail(id) {
-    API.getMaintenanceLogs().then(logs => {
-        const log = logs.find(l => l.id === id);
-        if (log) {
-            showMaintenanceDetailModal(log);
-        }
-    });
+    const log = loadedMaintenanceLogs[id];
+    if (log) {
+        showMaintenanceDetailModal(log);
+    }
 }
 
 function showMaintenanceDetailModal(log) {
@@ -22,6 +22,47 @@ async function renderReportsPage() {
                 <div id="equipmentReportContent"></div>
             </div>
         </div>
+
+        <div class="card">
+            <div class="card-header">
+                <h3 class="card-title">Export Data</h3>
+            </div>
+            <div class="card-body">
+                <div class="form-row">
+                    <div class="form-group">
+                        <label class="form-label">Records</label>
+                        <select id="exportKind" class="form-select">
+                            <option value="maintenance">Maintenance History</option>
+                            <option value="failures">Failure Reports</option>
+                        </select>
+                    </div>
+                    <div class="form-group">
+                        <label class="form-label">Format</label>
+                        <select id="exportFormat" class="form-select">
+                            <option value="csv">CSV</option>
+                            <option value="ndjson">NDJSON</option>
+                        </select>
+                    </div>
+                </div>
+                <div class="form-row">
+                    <div class="form-group">
+                        <label class="form-label">From</label>
+                        <input type="date" id="exportFrom" class="form-input">
+                    </div>
+                    <div class="form-group">
+                        <label class="form-label">To</label>
+                        <input type="date" id="exportTo" class="form-input">
+                    </div>
+                </div>
+                <div class="form-group">
+                    <label class="form-label">Equipment</label>
+                    <select id="exportEquipment" class="form-select">
+                        <option value="">All equipment</option>
+                    </select>
+                </div>
+                <button class="btn btn-primary" onclick="downloadExport()">⬇️ Download</button>
+            </div>
+        </div>
     `;
 
     loadEquipmentList();
@@ -32,13 +73,27 @@ async function loadEquipmentList() {
         const equipment = await API.getEquipment();
         const select = document.getElementById('reportEquipment');
 
-        select.innerHTML = '<option value="">Choose equipment...</option>' +
-            equipment.map(eq => `<option value="${eq.id}">${eq.name}</option>`).join('');
+        const options = equipment.map(eq => `<option value="${eq.id}">${eq.name}</option>`).join('');
+        select.innerHTML = '<option value="">Choose equipment...</option>' + options;
+        document.getElementById('exportEquipment').innerHTML = '<option value="">All equipment</option>' + options;
     } catch (error) {
         showAlert('Failed to load equipment list', 'error');
     }
 }
 
+function downloadExport() {
+    const filters = { format: document.getElementById('exportFormat').value };
+    const from = document.getElementById('exportFrom').value;
+    const to = document.getElementById('exportTo').value;
+    const equipmentId = document.getElementById('exportEquipment').value;
+
+    if (from) filters.from = from;
+    if (to) filters.to = to;
+    if (equipmentId) filters.equipment_id = equipmentId;
+
+    window.location.href = API.exportUrl(document.getElementById('exportKind').value, filters);
+}
+
 async function loadEquipmentReport() {
     const equipmentId = document.getElementById('reportEquipment').value;
     const contentDiv = document.getElementById('equipmentReportContent');
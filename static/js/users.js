@@ -44,6 +44,7 @@ async function renderUsersPage() {
                     </tbody>
                 </table>
             </div>
+            <div id="usersSentinel" class="scroll-sentinel"></div>
         </div>
     `;
 
@@ -51,10 +52,15 @@ async function renderUsersPage() {
 }
 
 async function loadUsers() {
+    const list = createPagedList({
+        sentinelId: 'usersSentinel',
+        fetchPage: params => API.getUsers(params),
+        onPage: renderUsersTable
+    });
+
     try {
         showLoading();
-        const users = await API.getUsers();
-        renderUsersTable(users);
+        await list.loadMore();
     } catch (error) {
         showAlert('Failed to load users', 'error');
     } finally {
@@ -62,15 +68,15 @@ async function loadUsers() {
     }
 }
 
-function renderUsersTable(users) {
+function renderUsersTable(users, isFirstPage = true) {
     const tbody = document.getElementById('usersTableBody');
 
-    if (users.length === 0) {
+    if (isFirstPage && users.length === 0) {
         tbody.innerHTML = '<tr><td colspan="7" class="text-center" style="padding: 2rem; color: var(--text-muted);">No users found</td></tr>';
         return;
     }
 
-    tbody.innerHTML = users.map(user => `
+    renderPagedRows(tbody, users.map(user => `
         <tr>
             <td><strong>${user.full_name}</strong></td>
             <td>${user.email}</td>
@@ -100,7 +106,7 @@ function renderUsersTable(users) {
                 </button>
             </td>
         </tr>
-    `).join('');
+    `).join(''), isFirstPage);
 }
 
 function showUserModal(userId = null) {
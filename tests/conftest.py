@@ -0,0 +1,109 @@
+"""
+Shared fixtures
+One app per test session on a temporary SQLite database, filled with a small
+generated fleet (see seed_data.generate_dataset). Mail, background writers
+and rate limits are off; tests that need them configure their own.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Config reads the environment when it is imported, so this runs before the app is
+DATA_DIR = tempfile.mkdtemp(prefix='cmms-tests-')
+DATABASE_PATH = os.path.join(DATA_DIR, 'maintenance.db')
+for name in ('REPLICA_DATABASE_URL', 'REPORT_CACHE_PATH', 'RATE_LIMIT_STORAGE_PATH'):
+    os.environ.pop(name, None)
+os.environ.update({
+    'DATABASE_URL': f'sqlite:///{DATABASE_PATH}',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',  # Hash strength is not under test
+    'PASSWORD_HASH_WORKERS': '0',
+    'RATE_LIMIT_ENABLED': 'false',
+    'MAIL_ENABLED': 'false',
+    'OUTBOX_WORKER_ENABLED': 'false',
+    'SCHEDULER_ENABLED': 'false',
+    'EVENTS_RELAY_ENABLED': 'false',  # Tests poll the relay themselves
+    'LAST_LOGIN_FLUSH_SECONDS': '3600',  # No background writes while a test counts statements
+    'USER_STAMP_CHECK_SECONDS': '3600'  # Only this process's own writes re-read the users stamp
+})
+
+ADMIN = {'email': 'admin@maintenance.com', 'password': 'admin123'}
+TECHNICIAN = {'email': 'tech@maintenance.com', 'password': 'tech123'}
+
+
+class Client(FlaskClient):
+    """Test client that reads streamed bodies before returning, as a browser would"""
+
+    def open(self, *args, **kwargs):
+        kwargs.setdefault('buffered', True)
+        return super().open(*args, **kwargs)
+
+
+@contextmanager
+def recorded_statements():
+    """(statement, parameters) of every SQL statement the current thread runs in the block"""
+    statements = []
+    thread = threading.get_ident()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    from models import db
+    from seed_data import generate_dataset
+    from user_cache import last_login_writer
+
+    app = create_app()
+    app.test_client_class = Client
+    with app.app_context():
+        generate_dataset(plants=2, assets=40, years=1, technicians=6, seed=7, end=date(2025, 6, 30))
+
+    yield app
+
+    last_login_writer.flush()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    response = client.post('/api/login', json=ADMIN)
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def technician_client(app):
+    client = app.test_client()
+    response = client.post('/api/login', json=TECHNICIAN)
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def record_statements():
+    """with record_statements() as statements: ..."""
+    return recorded_statements
@@ -0,0 +1,38 @@
+"""
+Downtime report ranges
+Maintenance times are stored in UTC, so the default range ends on the UTC
+date whatever the server's local time zone.
+"""
+import os
+import time
+from datetime import date, datetime, timedelta
+import pytest
+from cache import report_cache
+
+
+@pytest.fixture
+def local_date_is_not_utc():
+    """Local time zone in which today's date is not the UTC date"""
+    previous = os.environ.get('TZ')
+    # POSIX TZ offsets are west of UTC: AOE is UTC-12, LINT is UTC+14
+    os.environ['TZ'] = 'AOE12' if datetime.utcnow().hour < 12 else 'LINT-14'
+    time.tzset()
+    yield
+    if previous is None:
+        os.environ.pop('TZ', None)
+    else:
+        os.environ['TZ'] = previous
+    time.tzset()
+
+
+def test_default_range_ends_today_in_utc(admin_client, local_date_is_not_utc):
+    today = datetime.utcnow().date()
+    assert date.today() != today
+
+    report_cache.clear()
+    report = admin_client.get('/api/reports/downtime').get_json()
+    assert report['to'] == today.isoformat()
+    assert report['from'] == (today - timedelta(days=365)).isoformat()
+
+    report = admin_client.get(f'/api/reports/downtime?from={today - timedelta(days=7)}&bucket=day').get_json()
+    assert report['buckets'][-1] == today.isoformat()
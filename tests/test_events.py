@@ -0,0 +1,95 @@
+"""
+Live update events relayed through the live_events table
+A write stores its events in its own transaction; the relay of every process
+tails the table by id, so the streams of all workers see the change.
+"""
+import json
+import time
+from sqlalchemy import insert, func
+from events import EventHub, EventRelay, queue_event
+from models import db, Equipment, LiveEvent
+
+
+def worker_relay(app):
+    """Relay and hub of one worker process, starting after the newest stored event"""
+    relay = EventRelay(EventHub(buffer_size=10))
+    with app.app_context():
+        relay.hub.start_at(db.session.scalar(db.select(func.max(LiveEvent.id))) or 0)
+    return relay
+
+
+def store(app, *event_ids):
+    """Commit events with the given ids, as other transactions would"""
+    with app.app_context():
+        db.session.execute(insert(LiveEvent.__table__), [
+            {'id': event_id, 'event_type': 'equipment.status', 'payload': '{}', 'created_at': time.time()}
+            for event_id in event_ids
+        ])
+        db.session.commit()
+
+
+def poll(app, relay):
+    with app.app_context():
+        return relay.poll()
+
+
+def test_write_reaches_the_streams_of_every_worker(app, admin_client):
+    workers = [worker_relay(app), worker_relay(app)]
+    after = workers[0].hub.last_id
+
+    response = admin_client.post('/api/failures', json={
+        'equipment_id': 7, 'failure_description': 'Belt slipping', 'severity': 'Low'
+    })
+    assert response.status_code == 201
+
+    seen = []
+    for relay in workers:
+        assert poll(app, relay) == 1
+        [(event_id, event_type, payload)] = relay.hub.wait(after, 0)
+        assert event_type == 'failure.created'
+        assert json.loads(payload)['id'] == response.get_json()['id']
+        seen.append(event_id)
+    assert seen[0] == seen[1]  # Last-Event-ID means the same event on every worker
+    assert poll(app, workers[0]) == 0
+
+
+def test_rolled_back_transaction_stores_no_event(app):
+    relay = worker_relay(app)
+    with app.app_context():
+        equipment = db.session.get(Equipment, 7)
+        queue_event('equipment.status', {'equipment_id': equipment.id, 'status': 'Inactive'})
+        db.session.rollback()
+        db.session.commit()
+        assert 'pending_events' not in db.session.info
+    assert poll(app, relay) == 0
+
+
+def test_relay_waits_for_a_missing_id_then_moves_past_it(app):
+    relay = worker_relay(app)
+    last = relay.hub.last_id
+    relay.gap_seconds = 3600
+
+    store(app, last + 2)
+    assert poll(app, relay) == 0  # last + 1 may still be committing
+    store(app, last + 1)
+    assert poll(app, relay) == 2
+    assert [event[0] for event in relay.hub.wait(last, 0)] == [last + 1, last + 2]
+
+    store(app, last + 4)
+    relay.gap_seconds = 0  # last + 3 never commits
+    assert poll(app, relay) == 1
+    assert relay.hub.last_id == last + 4
+
+
+def test_hub_resets_clients_it_cannot_catch_up():
+    hub = EventHub(buffer_size=2)
+    hub.start_at(10)
+    for event_id in (11, 13, 14):
+        hub.publish(event_id, 'equipment.status', '{}')
+
+    assert [event[0] for event in hub.wait(11, 0)] == [13, 14]
+    assert [event[0] for event in hub.wait(13, 0)] == [14]
+    assert hub.wait(14, 0) == []
+    assert hub.wait(10, 0) is None  # 11 has left the buffer
+    assert hub.wait(20, 0) is None  # An id from another database
+    assert hub.parse_id(hub.format_id(13)) == 13
@@ -0,0 +1,64 @@
+"""
+Query plans of the list, history and dashboard requests
+Every SELECT a request runs is explained with EXPLAIN QUERY PLAN: the
+filter or sort under test must be served by its index (see models.py and
+migrations.py), and the maintenance log and failure report tables must
+never be read with a full table scan.
+"""
+import re
+import pytest
+from cache import report_cache
+from models import db
+
+FACT_TABLES = ('maintenance_logs', 'failure_reports')
+
+CASES = [
+    ('/api/equipment?status=Active', 'equipment', 'ix_equipment_status'),
+    ('/api/equipment?type=Pump', 'equipment', 'ix_equipment_type'),
+    ('/api/maintenance', 'maintenance_logs', 'ix_maintenance_logs_date_downtime'),
+    ('/api/maintenance?limit=20', 'maintenance_logs', 'ix_maintenance_logs_date_downtime'),
+    ('/api/maintenance?equipment_id=3', 'maintenance_logs', 'ix_maintenance_logs_equipment_date'),
+    ('/api/failures', 'failure_reports', 'ix_failure_reports_reported_date'),
+    ('/api/failures?resolved=false', 'failure_reports', 'ix_failure_reports_resolved_date'),
+    ('/api/failures?equipment_id=3', 'failure_reports', 'ix_failure_reports_equipment_date'),
+    ('/api/schedule', 'equipment_schedule', 'ix_equipment_schedule_next_maintenance_date'),
+    ('/api/equipment/3', 'maintenance_logs', 'ix_maintenance_logs_equipment_date'),
+    ('/api/equipment/3', 'failure_reports', 'ix_failure_reports_equipment_date'),
+    ('/api/reports/equipment/3', 'maintenance_logs', 'ix_maintenance_logs_equipment_date'),
+    ('/api/reports/equipment/3', 'failure_reports', 'ix_failure_reports_equipment_date'),
+    ('/api/reports/dashboard', 'equipment_schedule', 'ix_equipment_schedule_next_maintenance_date'),
+    ('/api/reports/downtime', 'maintenance_logs', 'ix_maintenance_logs_date_downtime'),
+    ('/api/reports/downtime?group_by=type', 'maintenance_logs', 'ix_maintenance_logs_date_downtime')
+]
+
+
+def query_plans(app, client, record_statements, url):
+    """EXPLAIN QUERY PLAN lines of every SELECT the request runs"""
+    report_cache.clear()  # Run the report queries, not a cached response
+    with record_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, url
+
+    lines = []
+    with app.app_context():
+        connection = db.session.connection()
+        for statement, parameters in statements:
+            if statement.lstrip().upper().startswith('SELECT'):
+                rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+                lines.extend(row[3] for row in rows)
+    return lines
+
+
+@pytest.mark.parametrize('url, table, index', CASES)
+def test_request_uses_index(app, admin_client, record_statements, url, table, index):
+    lines = query_plans(app, admin_client, record_statements, url)
+
+    used = [line for line in lines if re.match(rf'(SCAN|SEARCH) {table}\b', line)]
+    assert used, f'{url} does not read {table}'
+    assert any(f'INDEX {index}' in line for line in used), used
+
+    table_scans = [
+        line for line in lines
+        if re.match(rf'SCAN ({"|".join(FACT_TABLES)})\b', line) and 'INDEX' not in line
+    ]
+    assert not table_scans, table_scans
@@ -0,0 +1,165 @@
+"""
+Email outbox delivery against a local fake SMTP server
+Requests only queue messages; drain_outbox() sends a batch over one SMTP
+connection, retries rejected messages with backoff and dead-letters them
+after OUTBOX_MAX_ATTEMPTS.
+"""
+import email
+import email.policy
+import socketserver
+import threading
+import pytest
+from email_service import enqueue_email
+from models import db, OutboxMessage
+from outbox import drain_outbox
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: accepts (or rejects) every message and keeps it"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 fake.smtp ready')
+        recipients = []
+        for line in self.rfile:
+            verb = line.decode().strip()[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 fake.smtp')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(line.decode().split(':', 1)[1].strip().strip('<>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                if server.reject:
+                    self.reply('554 Message rejected')
+                    continue
+                message = email.message_from_bytes(data, policy=email.policy.default)
+                with server.lock:
+                    server.messages.append((recipients, message))
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.reject = False
+
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    server = FakeSMTPServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Flask-Mail reads its settings once, in init_app
+    state = app.extensions['mail']
+    settings = {'server': '127.0.0.1', 'port': server.server_address[1], 'use_tls': False,
+                'use_ssl': False, 'username': None, 'password': None, 'suppress': False}
+    for name, value in settings.items():
+        monkeypatch.setattr(state, name, value)
+
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def queue(app, count):
+    with app.app_context():
+        messages = [
+            enqueue_email(f'Test message {i}', ['tech@maintenance.com'], f'Body {i}')
+            for i in range(count)
+        ]
+        db.session.commit()
+        return [message.id for message in messages]
+
+
+def outbox_rows(app, ids):
+    with app.app_context():
+        return {
+            message.id: (message.status, message.attempts, message.last_error)
+            for message in OutboxMessage.query.filter(OutboxMessage.id.in_(ids))
+        }
+
+
+def test_failure_alert_is_queued_then_sent(app, admin_client, smtp_server, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAIL_ENABLED', True)
+
+    response = admin_client.post('/api/failures', json={
+        'equipment_id': 5, 'failure_description': 'Bearing seized', 'severity': 'High'
+    })
+    assert response.status_code == 201
+    assert smtp_server.connections == 0  # Nothing is sent in the request
+
+    with app.app_context():
+        message = OutboxMessage.query.filter(OutboxMessage.subject.like('%CRITICAL FAILURE%')).one()
+        message_id = message.id
+        assert message.status == 'pending'
+        drain_outbox()
+
+    assert outbox_rows(app, [message_id])[message_id][0] == 'sent'
+    recipients, sent = smtp_server.messages[-1]
+    assert recipients == ['admin@maintenance.com']
+    assert 'CRITICAL FAILURE' in sent['Subject']
+    assert 'Bearing seized' in sent.get_content()
+
+
+def test_batch_is_sent_over_one_connection(app, smtp_server):
+    ids = queue(app, 5)
+
+    with app.app_context():
+        assert drain_outbox() == 5
+
+    assert smtp_server.connections == 1
+    assert [sent['Subject'] for _, sent in smtp_server.messages] == [f'Test message {i}' for i in range(5)]
+    assert all(status == 'sent' and attempts == 1 for status, attempts, _ in outbox_rows(app, ids).values())
+
+
+def test_rejected_message_is_retried_then_dead(app, smtp_server, monkeypatch):
+    monkeypatch.setitem(app.config, 'OUTBOX_MAX_ATTEMPTS', 2)
+    monkeypatch.setitem(app.config, 'OUTBOX_BACKOFF_SECONDS', 0)  # Due again straight away
+    smtp_server.reject = True
+    [message_id] = queue(app, 1)
+
+    with app.app_context():
+        drain_outbox()
+        status, attempts, error = outbox_rows(app, [message_id])[message_id]
+        assert (status, attempts) == ('pending', 1)
+        assert '554' in error
+
+        drain_outbox()
+        assert outbox_rows(app, [message_id])[message_id][:2] == ('dead', 2)
+
+        smtp_server.reject = False
+        assert drain_outbox() == 0  # Dead messages are not offered again
+    assert smtp_server.messages == []
+
+
+def test_unreachable_server_keeps_messages_pending(app, smtp_server):
+    ids = queue(app, 2)
+    smtp_server.shutdown()
+    smtp_server.server_close()  # Connections are refused
+
+    with app.app_context():
+        assert drain_outbox() == 2
+
+    assert all(status == 'pending' and attempts == 1 for status, attempts, _ in outbox_rows(app, ids).values())
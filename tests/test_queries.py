@@ -0,0 +1,75 @@
+"""
+Statements per request on the list and history endpoints
+Rows are serialized from one projection query with the equipment and
+technician names joined in, so a request runs the same number of
+statements however many rows (and distinct related rows) it returns.
+"""
+from datetime import datetime, timedelta
+import rollups
+from cache import report_cache
+from models import db, Technician, Equipment, MaintenanceLog, FailureReport
+
+EQUIPMENT_ID = 1
+
+URLS = [
+    '/api/equipment',
+    '/api/maintenance',
+    f'/api/maintenance?equipment_id={EQUIPMENT_ID}',
+    '/api/failures',
+    '/api/failures?resolved=false',
+    '/api/schedule',
+    f'/api/equipment/{EQUIPMENT_ID}',
+    f'/api/reports/equipment/{EQUIPMENT_ID}'
+]
+
+
+def count_statements(client, record_statements):
+    client.get('/api/current_user')  # Reloads the session user if the users table changed
+    counts = {}
+    for url in URLS:
+        report_cache.clear()  # Count the queries, not a cached response
+        with record_statements() as statements:
+            response = client.get(url)
+        assert response.status_code == 200, url
+        counts[url] = len(statements)
+    return counts
+
+
+def add_history(technicians=10, per_equipment=3):
+    """New technicians, each with logs and open failures on every equipment item"""
+    users = [
+        Technician(full_name=f'Contractor {i}', email=f'contractor{i}@maintenance.com',
+                   role='technician', password_hash='-')
+        for i in range(technicians)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+
+    started = datetime(2025, 7, 1, 8)
+    for equipment_id in db.session.scalars(db.select(Equipment.id)):
+        for i in range(per_equipment * technicians):
+            user = users[i % technicians]
+            at = started + timedelta(hours=i)
+            log = MaintenanceLog(equipment_id=equipment_id, technician_id=user.id, maintenance_type='Inspection',
+                                 description='Contractor inspection', maintenance_date=at, downtime_hours=0.5,
+                                 next_maintenance_date=(at + timedelta(days=30)).date())
+            report = FailureReport(equipment_id=equipment_id, reported_by=user.id, severity='Low',
+                                   failure_description='Noise found on inspection', reported_date=at)
+            db.session.add_all([log, report])
+            db.session.flush()
+            rollups.record_maintenance(log)
+            rollups.record_failure(report)
+    db.session.commit()
+
+
+def test_statement_count_does_not_grow_with_rows(app, admin_client, record_statements):
+    before = count_statements(admin_client, record_statements)
+    rows_before = len(admin_client.get(f'/api/equipment/{EQUIPMENT_ID}').get_json()['maintenance_logs'])
+
+    with app.app_context():
+        add_history()
+
+    after = count_statements(admin_client, record_statements)
+    rows_after = len(admin_client.get(f'/api/equipment/{EQUIPMENT_ID}').get_json()['maintenance_logs'])
+    assert rows_after >= rows_before + 30
+    assert after == before
@@ -0,0 +1,161 @@
+"""
+Token-bucket rate limits driven by a fake clock
+Each rule is checked on both backends; time only moves when a test advances it.
+"""
+import pytest
+from ratelimit import (RateLimiter, MemoryBackend, SQLiteBackend, AdmissionControl, parse_limit, limiter,
+                       forwarded_client, trust_proxies)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmp_path / 'limits.db'))
+    return MemoryBackend()
+
+
+def make_limiter(backend, clock, rules):
+    rate_limiter = RateLimiter(clock=clock)
+    rate_limiter.configure(rules, backend=backend)
+    return rate_limiter
+
+
+def test_parse_limit():
+    assert parse_limit('10/minute') == (10 / 60, 10)
+    assert parse_limit(' 2 / hours ') == (2 / 3600, 2)
+    for spec in ('10', '10/fortnight', '0/second', 'ten/minute'):
+        with pytest.raises(ValueError):
+            parse_limit(spec)
+
+
+def test_burst_then_refill(backend, clock):
+    rate_limiter = make_limiter(backend, clock, {'login': {'ip': '3/minute'}})
+    keys = {'ip': '10.0.0.1'}
+
+    assert [rate_limiter.hit('login', keys) for _ in range(3)] == [0, 0, 0]
+    assert rate_limiter.hit('login', keys) == pytest.approx(20)  # One token every 20 seconds
+
+    clock.advance(19)
+    assert rate_limiter.hit('login', keys) == pytest.approx(1)
+    clock.advance(1)
+    assert rate_limiter.hit('login', keys) == 0
+    assert rate_limiter.hit('login', keys) == pytest.approx(20)
+
+    clock.advance(3600)  # Refills up to the burst, no further
+    assert [rate_limiter.hit('login', keys) for _ in range(4)][-1] == pytest.approx(20)
+
+
+def test_keys_have_separate_buckets(backend, clock):
+    rate_limiter = make_limiter(backend, clock, {'signup': {'ip': '1/hour'}})
+
+    assert rate_limiter.hit('signup', {'ip': '10.0.0.1'}) == 0
+    assert rate_limiter.hit('signup', {'ip': '10.0.0.1'}) == pytest.approx(3600)
+    assert rate_limiter.hit('signup', {'ip': '10.0.0.2'}) == 0
+
+
+def test_refused_request_takes_no_tokens(backend, clock):
+    rate_limiter = make_limiter(backend, clock, {'login': {'ip': '5/minute', 'account': '2/minute'}})
+    attacked = {'ip': '10.0.0.1', 'account': 'admin@maintenance.com'}
+
+    assert [rate_limiter.hit('login', attacked) for _ in range(2)] == [0, 0]
+    for _ in range(10):
+        assert rate_limiter.hit('login', attacked) == pytest.approx(30)  # The account bucket refuses
+
+    # The address still has the three tokens the refused attempts did not take
+    other = {'ip': '10.0.0.1', 'account': 'tech@maintenance.com'}
+    assert [rate_limiter.hit('login', other) for _ in range(2)] == [0, 0]
+    third = {'ip': '10.0.0.1', 'account': 'tech1@maintenance.com'}
+    assert rate_limiter.hit('login', third) == 0
+    assert rate_limiter.hit('login', third) == pytest.approx(12)  # Now the address bucket refuses
+
+
+def test_missing_keys_and_disabled_limiter(backend, clock):
+    rate_limiter = make_limiter(backend, clock, {'login': {'ip': '1/minute', 'account': '1/minute'}})
+
+    assert rate_limiter.hit('login', {'ip': None, 'account': None}) == 0
+    assert rate_limiter.hit('unknown', {'ip': '10.0.0.1'}) == 0
+
+    rate_limiter.configure({'login': {'ip': '1/minute'}}, backend=backend, enabled=False)
+    assert [rate_limiter.hit('login', {'ip': '10.0.0.1'}) for _ in range(5)] == [0] * 5
+
+
+def test_sqlite_buckets_are_shared(tmp_path, clock):
+    path = str(tmp_path / 'limits.db')
+    rules = {'login': {'ip': '2/minute'}}
+    first = make_limiter(SQLiteBackend(path), clock, rules)
+    second = make_limiter(SQLiteBackend(path), clock, rules)  # Another worker process
+
+    assert first.hit('login', {'ip': '10.0.0.1'}) == 0
+    assert second.hit('login', {'ip': '10.0.0.1'}) == 0
+    assert first.hit('login', {'ip': '10.0.0.1'}) == pytest.approx(30)
+
+
+def test_login_answers_429_with_retry_after(client, clock, monkeypatch):
+    monkeypatch.setattr(limiter, 'clock', clock)
+    monkeypatch.setattr(limiter, 'backend', MemoryBackend())
+    monkeypatch.setattr(limiter, 'rules', {'login': {'account': parse_limit('2/minute')}})
+    monkeypatch.setattr(limiter, 'enabled', True)
+    attempt = {'email': 'admin@maintenance.com', 'password': 'wrong'}
+
+    assert [client.post('/api/login', json=attempt).status_code for _ in range(2)] == [401, 401]
+    response = client.post('/api/login', json=attempt)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+
+    clock.advance(30)
+    assert client.post('/api/login', json=attempt).status_code == 401
+
+
+def test_forwarded_for_separates_clients_behind_a_proxy(app, client, clock, monkeypatch):
+    monkeypatch.setattr(limiter, 'clock', clock)
+    monkeypatch.setattr(limiter, 'backend', MemoryBackend())
+    monkeypatch.setattr(limiter, 'rules', {'login': {'ip': parse_limit('1/minute')}})
+    monkeypatch.setattr(limiter, 'enabled', True)
+    attempt = {'email': 'admin@maintenance.com', 'password': 'wrong'}
+
+    def login(forwarded_for):
+        return client.post('/api/login', json=attempt, headers={'X-Forwarded-For': forwarded_for}).status_code
+
+    # Without a trusted proxy every client has the proxy's address
+    assert [login('10.0.0.1'), login('10.0.0.2')] == [401, 429]
+
+    monkeypatch.setitem(app.config, 'PROXY_FIX_X_FOR', 1)
+    monkeypatch.setattr(app, 'wsgi_app', app.wsgi_app)
+    trust_proxies(app)
+    assert [login('10.0.0.3'), login('10.0.0.4'), login('10.0.0.3')] == [401, 401, 429]
+    assert login('10.0.0.5, 10.0.0.4') == 429  # Only the address the proxy appended counts
+
+
+def test_forwarded_client_of_an_asgi_scope():
+    scope = {'client': ('127.0.0.1', 50000), 'headers': [(b'x-forwarded-for', b'10.0.0.5, 10.0.0.4')]}
+    assert forwarded_client(scope, 1) == ('10.0.0.4', 0)
+    assert forwarded_client(scope, 2) == ('10.0.0.5', 0)
+    assert forwarded_client(scope, 3) == ('127.0.0.1', 50000)  # Fewer hops than proxies: not trusted
+    assert forwarded_client({'client': ('127.0.0.1', 50000), 'headers': []}, 1) == ('127.0.0.1', 50000)
+
+
+def test_admission_control_refuses_beyond_the_cap():
+    admission = AdmissionControl(limit=2)
+    assert admission.admit() and admission.admit()
+    assert not admission.admit()
+    admission.release()
+    assert admission.admit()
+
+    unlimited = AdmissionControl(limit=0)
+    assert all(unlimited.admit() for _ in range(100))
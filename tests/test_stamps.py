@@ -0,0 +1,63 @@
+"""
+Table stamps and rollup deltas written once per transaction
+Writers only touch the shared stamp and rollup rows just before they commit,
+so the locks on those rows are held for the commit alone.
+"""
+import rollups
+from conditional import stamps
+from models import db, FailureReport
+
+
+def test_write_stamps_once_at_commit(app, admin_client, record_statements):
+    etag = admin_client.get('/api/failures').headers['ETag']
+    assert admin_client.get('/api/failures', headers={'If-None-Match': etag}).status_code == 304
+
+    with record_statements() as statements:
+        response = admin_client.post('/api/failures', json={
+            'equipment_id': 6, 'failure_description': 'Oil seep at the flange', 'severity': 'Low'
+        })
+    assert response.status_code == 201
+
+    sql = [' '.join(statement.split()) for statement, _ in statements]
+    stamp_writes = [i for i, statement in enumerate(sql) if statement.startswith('UPDATE table_versions')]
+    rollup_writes = [i for i, statement in enumerate(sql) if 'INTO equipment_stats' in statement or 'INTO monthly_stats' in statement]
+    report_insert = next(i for i, statement in enumerate(sql) if statement.startswith('INSERT INTO failure_reports'))
+    assert len(stamp_writes) == 1
+    assert len(rollup_writes) == 2
+    assert min(stamp_writes + rollup_writes) > report_insert
+
+    assert admin_client.get('/api/failures', headers={'If-None-Match': etag}).status_code == 200
+    with app.app_context():
+        assert rollups.check_rollups() == []
+
+
+def test_several_flushes_write_each_row_once(app, record_statements):
+    with app.app_context():
+        with record_statements() as statements:
+            for i in range(3):
+                report = FailureReport(equipment_id=8, reported_by=1, severity='Low',
+                                       failure_description=f'Vibration alarm {i}')
+                db.session.add(report)
+                db.session.flush()
+                rollups.record_failure(report)
+            db.session.commit()
+        assert rollups.check_rollups() == []
+
+    sql = [' '.join(statement.split()) for statement, _ in statements]
+    assert sum(statement.startswith('UPDATE table_versions') for statement in sql) == 1
+    assert sum('INTO equipment_stats' in statement for statement in sql) == 1
+    assert sum('INTO monthly_stats' in statement for statement in sql) == 1
+
+
+def test_rolled_back_transaction_leaves_no_trace(app):
+    with app.app_context():
+        before = stamps(['failures', 'equipment'])
+        report = FailureReport(equipment_id=7, reported_by=1, failure_description='Never saved', severity='Low')
+        db.session.add(report)
+        db.session.flush()
+        rollups.record_failure(report)
+        db.session.rollback()
+
+        db.session.commit()  # Nothing is left waiting for the next commit
+        assert stamps(['failures', 'equipment']) == before
+        assert rollups.check_rollups() == []
@@ -0,0 +1,74 @@
+"""
+Authenticated users from the per-process cache
+A request from a cached user runs no query; the users stamp is re-read after
+this process commits a change to users, or once the check interval passes.
+Logins only bump the 'logins' stamp, which the users list reads.
+"""
+from sqlalchemy import update
+from conditional import bump
+from models import db, Technician
+from user_cache import user_cache, last_login_writer
+
+TECHNICIAN_ID = 2
+
+
+def test_cached_user_request_runs_no_query(admin_client, record_statements):
+    admin_client.get('/api/current_user')
+
+    with record_statements() as statements:
+        response = admin_client.get('/api/current_user')
+    assert response.status_code == 200
+    assert statements == []
+
+
+def test_deactivation_applies_at_once_in_this_process(admin_client, technician_client):
+    assert technician_client.get('/api/current_user').status_code == 200
+
+    assert admin_client.put(f'/api/users/{TECHNICIAN_ID}/toggle-active').get_json()['is_active'] is False
+    assert technician_client.get('/api/current_user').status_code == 401
+
+    assert admin_client.put(f'/api/users/{TECHNICIAN_ID}/toggle-active').get_json()['is_active'] is True
+
+
+def test_other_process_changes_apply_after_the_check_interval(app, technician_client, monkeypatch):
+    assert technician_client.get('/api/current_user').status_code == 200
+
+    # As another worker would: the change and the stamp commit without this process's session
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(update(Technician).where(Technician.id == TECHNICIAN_ID).values(is_active=False))
+            bump(['users'], connection)
+    try:
+        assert technician_client.get('/api/current_user').status_code == 200  # Within the interval
+
+        monkeypatch.setattr(user_cache, 'check_interval', 0)
+        assert technician_client.get('/api/current_user').status_code == 401
+    finally:
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(update(Technician).where(Technician.id == TECHNICIAN_ID).values(is_active=True))
+                bump(['users'], connection)
+        user_cache.expire_version()
+
+
+def test_login_does_not_invalidate_cached_users(app, admin_client, technician_client):
+    last_login_writer.flush()  # The fixtures' own logins
+    assert technician_client.get('/api/current_user').status_code == 200
+    users = admin_client.get('/api/users')
+    with app.app_context():
+        version = user_cache.version()
+    assert user_cache.get(TECHNICIAN_ID, version) is not None
+
+    assert app.test_client().post('/api/login', json={'email': 'tech1@maintenance.com', 'password': 'tech123'}).status_code == 200
+    assert last_login_writer.flush() == 1
+
+    user_cache.expire_version()  # Read the stamp as every other worker would
+    with app.app_context():
+        assert user_cache.version() == version
+    assert user_cache.get(TECHNICIAN_ID, version) is not None
+
+    # The users list shows last_login, so it is revalidated
+    response = admin_client.get('/api/users', headers={'If-None-Match': users.headers['ETag']})
+    assert response.status_code == 200
+    logins = {user['email']: user['last_login'] for user in response.get_json()}
+    assert logins['tech1@maintenance.com'] is not None
@@ -0,0 +1,225 @@
+"""
+Per-process cache of authenticated users
+Flask-Login's user_loader runs on every authenticated request. Instead of
+loading the technician each time, users are kept as column snapshots stamped
+with the 'users' table version (see conditional.py). Every transaction that
+changes a technician bumps that stamp in the database. Each process re-reads
+the stamp at most every USER_STAMP_CHECK_SECONDS, and straight after it
+commits a change to users itself, so an authenticated request usually runs
+no query at all. update_user, toggle_user_active and delete_user take effect
+at once in the process that made the change and within the check interval
+in every other one. Inactive users are not loaded, so a deactivated account
+is logged out as soon as its process sees the new stamp.
+
+last_login is not committed on the login path: logins are queued and a
+background thread writes them in one batch every LAST_LOGIN_FLUSH_SECONDS.
+The batch bumps the 'logins' stamp, not 'users', so a burst of logins does
+not empty every worker's cache; a cached snapshot in the process that took
+the login gets the new time directly.
+"""
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import update, bindparam
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from conditional import bump, stamps, on_stamp_commit, LOGINS
+from models import db, Technician
+
+COLUMNS = [column.key for column in Technician.__table__.columns]
+STAMP = 'users'
+STALE = object()  # The stamp is due to be re-read
+
+
+class UserCache:
+    """LRU of technician snapshots validated against the users table stamp"""
+
+    def __init__(self, max_entries=1024, ttl=300, check_interval=1):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries, ttl, check_interval):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.expire_version()
+
+    def cached_version(self):
+        """
+        The users stamp as last read by this process
+
+        Returns:
+            (stamp, generation); stamp is STALE once the check interval has
+            passed, and the caller reads it and hands it to store_version
+        """
+        with self._lock:
+            fresh = self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+            return (self._version if fresh else STALE), self._generation
+
+    def store_version(self, version, generation):
+        """Remember a stamp read after cached_version returned generation; returns it"""
+        with self._lock:
+            if generation == self._generation:  # Not expired by a commit while it was read
+                self._version, self._checked_at = version, time.monotonic()
+        return version
+
+    def expire_version(self):
+        """Re-read the stamp on next use"""
+        with self._lock:
+            self._generation += 1
+            self._checked_at = None
+
+    def version(self):
+        """(version, changed_at) of the users stamp, or None before it exists"""
+        version, generation = self.cached_version()
+        if version is STALE:
+            version = self.store_version(stamps([STAMP]).get(STAMP), generation)
+        return version
+
+    def get(self, user_id, version):
+        """Cached snapshot of the user if taken at this stamp version, else None"""
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] != version or entry[1] < time.time():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[2]
+
+    def put(self, user_id, version, snapshot):
+        """Store a snapshot read after version was taken"""
+        if version is None:
+            return
+        with self._lock:
+            self._entries[user_id] = (version, time.time() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_last_login(self, user_id, logged_in_at):
+        """Show a login time in the cached snapshot, if any, without expiring it"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (entry[0], entry[1], {**entry[2], 'last_login': logged_in_at})
+
+    def load(self, user_id):
+        """Active user by id as a detached Technician, or None"""
+        # Version first: a change committed meanwhile leaves the entry outdated, never stale
+        version = self.version()
+        snapshot = self.get(user_id, version)
+        if snapshot is None:
+            user = db.session.get(Technician, user_id)
+            if user is None:
+                return None
+            snapshot = {key: getattr(user, key) for key in COLUMNS}
+            self.put(user_id, version, snapshot)
+        return build_user(snapshot)
+
+
+def build_user(snapshot):
+    """Detached Technician for one request; never shared between threads"""
+    if not snapshot['is_active']:
+        return None
+    user = Technician(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+user_cache = UserCache()
+
+
+@on_stamp_commit
+def _users_committed(names):
+    if STAMP in names:
+        user_cache.expire_version()  # This process's own change applies on the next request
+
+
+class LastLoginWriter:
+    """Queue of login times, written in batches by a background thread"""
+
+    def __init__(self):
+        self.interval = 5
+        self.app = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def configure(self, app):
+        self.app = app
+        self.interval = app.config['LAST_LOGIN_FLUSH_SECONDS']
+
+    def record(self, user):
+        """Queue a login; the user object shows the new time without being marked dirty"""
+        now = datetime.utcnow()
+        set_committed_value(user, 'last_login', now)
+        user_cache.set_last_login(user.id, now)
+        with self._lock:
+            self._pending[user.id] = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-writer', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write queued login times in one batch; returns how many"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        with self.app.app_context():
+            try:
+                # Core executemany: a user deleted since logging in just matches no row
+                table = Technician.__table__
+                db.session.execute(
+                    update(table).where(table.c.id == bindparam('user_id')).values(last_login=bindparam('logged_in_at')),
+                    [{'user_id': user_id, 'logged_in_at': logged_in_at} for user_id, logged_in_at in pending.items()]
+                )
+                bump([LOGINS])  # The users list shows last_login; cached users stay valid
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Last login flush failed: {str(e)}")
+                with self._lock:
+                    for user_id, logged_in_at in pending.items():
+                        self._pending.setdefault(user_id, logged_in_at)  # Retried next time
+                return 0
+            finally:
+                db.session.remove()
+        return len(pending)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+last_login_writer = LastLoginWriter()
+atexit.register(last_login_writer.flush)  # Logins still queued at shutdown
+
+
+def init_user_cache(app):
+    """Size the user cache and configure the last_login writer"""
+    user_cache.configure(
+        max_entries=app.config['USER_CACHE_SIZE'],
+        ttl=app.config['USER_CACHE_TTL'],
+        check_interval=app.config['USER_STAMP_CHECK_SECONDS']
+    )
+    last_login_writer.configure(app)